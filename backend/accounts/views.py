@@ -10,6 +10,7 @@ from django.conf import settings as django_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from core.audit import record as record_audit
 from .serializers import UserSerializer, UserProfileSerializer
 
 User = get_user_model()
@@ -36,6 +37,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         if not user:
             raise serializers.ValidationError('No active account found with the given credentials')
         
+        record_audit('login', instance=user, user=user)
+        
         # Create tokens manually
         refresh = RefreshToken.for_user(user)
         
@@ -67,7 +70,7 @@ class UserViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         if self.action in ['update', 'partial_update', 'destroy', 'list', 'retrieve']:
             # Only admins can manage other users
-            if not (self.request.user.is_staff or self.request.user.user_type in ['admin', 'superadmin']):
+            if not (self.request.user.is_staff or self.request.principal.is_admin):
                 return [permissions.IsAdminUser()]
         return super().get_permissions()
     
@@ -121,6 +124,7 @@ class UserViewSet(viewsets.ModelViewSet):
                     pass
             
             if user:
+                record_audit('login', instance=user, user=user)
                 refresh = RefreshToken.for_user(user)
                 return Response({
                     'access': str(refresh.access_token),
@@ -161,7 +165,7 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], url_path='reset_password')
     def reset_password(self, request, pk=None):
         """Admin action to reset a user's password."""
-        if request.user.user_type not in ['admin', 'superadmin'] and not request.user.is_superuser:
+        if not request.principal.is_admin and not request.user.is_superuser:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         user = self.get_object()
         new_password = request.data.get('password')
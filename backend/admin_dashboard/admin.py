@@ -1,3 +1,18 @@
 from django.contrib import admin
+from .models import DailyMetric, MonthlyMetric
 
-# Register your models here.
+
+@admin.register(DailyMetric)
+class DailyMetricAdmin(admin.ModelAdmin):
+    list_display = ['date', 'metric', 'dimension', 'value']
+    list_filter = ['metric']
+    search_fields = ['metric', 'dimension']
+    date_hierarchy = 'date'
+
+
+@admin.register(MonthlyMetric)
+class MonthlyMetricAdmin(admin.ModelAdmin):
+    list_display = ['date', 'metric', 'dimension', 'value']
+    list_filter = ['metric']
+    search_fields = ['metric', 'dimension']
+    date_hierarchy = 'date'
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AdminDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_dashboard'
+
+    def ready(self):
+        import admin_dashboard.signals  # noqa: F401
@@ -0,0 +1,37 @@
+"""
+Management command: rebuild_dashboard_metrics
+
+Recomputes the DailyMetric and MonthlyMetric rollups behind the admin
+dashboard and the timeseries endpoint from the raw tables. The rollups are
+normally maintained incrementally by admin_dashboard.signals; run this once
+after migrating an existing database, or after bulk imports and queryset
+updates that bypass model signals.
+
+Usage:
+    python manage.py rebuild_dashboard_metrics
+    python manage.py rebuild_dashboard_metrics --metric pledges --metric pledged_amount
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from admin_dashboard.metrics import METRICS, rebuild_metrics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily and monthly rollups behind the admin dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metric',
+            action='append',
+            dest='metrics',
+            help=f'Only rebuild this metric (repeatable): {", ".join(METRICS)}',
+        )
+
+    def handle(self, *args, **options):
+        metrics = options['metrics']
+        unknown = set(metrics or []) - set(METRICS)
+        if unknown:
+            raise CommandError(f'Unknown metric(s): {", ".join(sorted(unknown))}')
+
+        daily, monthly = rebuild_metrics(metrics)
+        self.stdout.write(self.style.SUCCESS(f'Stored {daily} daily and {monthly} monthly metric rows.'))
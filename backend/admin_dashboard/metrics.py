@@ -0,0 +1,397 @@
+"""
+Admin dashboard metrics.
+
+Every counter on the admin home page, and the growth charts behind the
+timeseries endpoint, are read from the DailyMetric and MonthlyMetric rollups
+instead of the raw tables. Each Series below counts the rows of one model
+(or sums one of their amounts) per creation day, optionally split by a field
+(the dimension) and limited to rows whose fields take the `include` values.
+admin_dashboard.signals applies +/- deltas to both rollups as rows are
+created, changed or deleted, `update_with_metrics` does the same for bulk
+queryset updates (which send no signals), and `rebuild_metrics` (run by the
+rebuild_dashboard_metrics command) recomputes them with one grouped query
+per series.
+
+`timeseries` answers any date range at day, week, month or year granularity,
+reading monthly rows for whole months and daily rows for the partial months
+at either end. The assembled dashboard payloads are cached for
+ADMIN_DASHBOARD_CACHE_TTL seconds.
+"""
+from collections import Counter, namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import DailyMetric, MonthlyMetric
+
+
+DEFAULT_CACHE_TTL = 60
+
+STATS_CACHE_KEY = 'admin_dashboard:stats'
+SYSTEM_METRICS_CACHE_KEY = 'admin_dashboard:system-metrics'
+
+GRANULARITIES = ('day', 'week', 'month', 'year')
+MAX_BUCKETS = 1000
+
+PLEDGE_STATUSES = ('pledged', 'committed', 'accepted', 'invested')
+
+
+class Series(namedtuple('Series', 'metric model date_field dimension_field include value_field')):
+    """
+    Rows of `model` per `date_field` day, split by `dimension_field`. Counts
+    rows, or sums `value_field` when set; `include` maps a field to the values
+    a row needs to be counted at all.
+    """
+
+    def __new__(cls, metric, model, date_field, dimension_field=None, include=None, value_field=None):
+        return super().__new__(cls, metric, model, date_field, dimension_field, include or {}, value_field)
+
+    @property
+    def fields(self):
+        names = {self.date_field, self.dimension_field, self.value_field, *self.include}
+        return {name for name in names if name}
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+
+SERIES = [
+    Series('users', 'accounts.User', 'date_joined', dimension_field='user_type'),
+    Series('enterprises', 'enterprises.Enterprise', 'created_at', dimension_field='sector'),
+    Series('enterprises_vetted', 'enterprises.Enterprise', 'created_at', include={'is_vetted': (True,)}),
+    Series('assessments', 'assessments.Assessment', 'created_at', dimension_field='status'),
+    Series('campaigns', 'campaigns.Campaign', 'created_at', dimension_field='status'),
+    Series('amount_raised', 'campaigns.Campaign', 'created_at', dimension_field='campaign_type',
+           value_field='amount_raised'),
+    Series('pledges', 'campaigns.CampaignInterest', 'created_at', dimension_field='status',
+           include={'status': PLEDGE_STATUSES}),
+    Series('pledged_amount', 'campaigns.CampaignInterest', 'created_at', dimension_field='status',
+           include={'status': PLEDGE_STATUSES}, value_field='committed_amount'),
+    Series('audit_actions', 'core.AuditLog', 'timestamp', dimension_field='action'),
+    Series('audit_models', 'core.AuditLog', 'timestamp', dimension_field='model_name'),
+]
+
+METRICS = {series.metric: series for series in SERIES}
+
+
+def series_for(model):
+    label = model._meta.label
+    return [series for series in SERIES if series.model == label]
+
+
+def tracked_values(instance, series_list):
+    """The fields the rollups depend on, or None if any of them is deferred"""
+    values = {}
+    for series in series_list:
+        for name in series.fields:
+            attname = instance._meta.get_field(name).attname
+            if attname not in instance.__dict__:
+                return None
+            values[name] = instance.__dict__[attname]
+    return values
+
+
+def contributions(values, series_list):
+    """Counter of (metric, day, dimension) -> value a row with these `values` adds to the rollups"""
+    counts = Counter()
+    for series in series_list:
+        if any(values[name] not in allowed for name, allowed in series.include.items()):
+            continue
+        moment = values[series.date_field]
+        if moment is None:
+            continue
+        day = timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+        dimension = str(values[series.dimension_field] or '') if series.dimension_field else ''
+        if series.value_field:
+            # Views may assign request data (strings) before saving
+            amount = Decimal(str(values[series.value_field] or 0))
+        else:
+            amount = 1
+        counts[(series.metric, day, dimension)] += amount
+    return counts
+
+
+def _add(model, metric, day, dimension, delta):
+    rows = model.objects.filter(metric=metric, date=day, dimension=dimension)
+    if rows.update(value=F('value') + delta):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(metric=metric, date=day, dimension=dimension, value=delta)
+    except IntegrityError:
+        # Another request created the row first
+        rows.update(value=F('value') + delta)
+
+
+def apply_deltas(deltas):
+    """Add each non-zero delta to its DailyMetric and MonthlyMetric rows, creating rows as needed"""
+    monthly = Counter()
+    for (metric, day, dimension), delta in deltas.items():
+        if not delta:
+            continue
+        _add(DailyMetric, metric, day, dimension, delta)
+        monthly[(metric, day.replace(day=1), dimension)] += delta
+    for (metric, month, dimension), delta in monthly.items():
+        if delta:
+            _add(MonthlyMetric, metric, month, dimension, delta)
+
+
+def update_with_metrics(queryset, **values):
+    """
+    queryset.update(**values) that also moves the rollups of the updated rows.
+    `values` must be plain values, not expressions. Returns the number of rows
+    updated.
+    """
+    series_list = series_for(queryset.model)
+    tracked = set().union(*(series.fields for series in series_list))
+    if not tracked & set(values):
+        return queryset.update(**values)
+
+    changes = {name: value for name, value in values.items() if name in tracked}
+    with transaction.atomic():
+        rows = list(queryset.values('pk', *tracked))
+        updated = queryset.model._default_manager.filter(pk__in=[row['pk'] for row in rows]).update(**values)
+        deltas = Counter()
+        for row in rows:
+            deltas.subtract(contributions(row, series_list))
+            deltas.update(contributions({**row, **changes}, series_list))
+        apply_deltas(deltas)
+    return updated
+
+
+def rebuild_metrics(metrics=None):
+    """
+    Recompute the rollups of `metrics` (default: all) from the raw tables,
+    plus the audit rows moved to the archive files (core.archive). Returns
+    the number of (daily, monthly) rows written.
+    """
+    selected = [series for series in SERIES if metrics is None or series.metric in metrics]
+    daily = Counter()
+    for series in selected:
+        queryset = series.get_model().objects.all()
+        for name, allowed in series.include.items():
+            queryset = queryset.filter(**{f'{name}__in': allowed})
+        dimension = F(series.dimension_field) if series.dimension_field else Value('')
+        total = Sum(series.value_field) if series.value_field else Count('pk')
+        grouped = (
+            queryset
+            .annotate(day=TruncDate(series.date_field), bucket=dimension)
+            .values('day', 'bucket')
+            .annotate(total=total)
+            .order_by()
+        )
+        for row in grouped:
+            if row['total'] and row['day'] is not None:
+                daily[(series.metric, row['day'], str(row['bucket'] or ''))] += row['total']
+
+    archived_series = [series for series in selected if series.model == 'core.AuditLog']
+    if archived_series:
+        from core.archive import archived_records
+        for record in archived_records():
+            record['timestamp'] = parse_datetime(record['timestamp'])
+            daily.update(contributions(record, archived_series))
+
+    monthly = Counter()
+    for (metric, day, dimension), value in daily.items():
+        monthly[(metric, day.replace(day=1), dimension)] += value
+
+    names = [series.metric for series in selected]
+    with transaction.atomic():
+        DailyMetric.objects.filter(metric__in=names).delete()
+        MonthlyMetric.objects.filter(metric__in=names).delete()
+        for model, rows in ((DailyMetric, daily), (MonthlyMetric, monthly)):
+            model.objects.bulk_create(
+                [
+                    model(metric=metric, date=day, dimension=dimension, value=value)
+                    for (metric, day, dimension), value in rows.items()
+                ],
+                batch_size=1000,
+            )
+    clear_dashboard_cache()
+    return len(daily), len(monthly)
+
+
+def _number(series, value):
+    return float(value) if series.value_field else int(value)
+
+
+def metric_totals(metrics=None, start=None, end=None):
+    """{metric: {dimension: total}} over all days (or start..end inclusive), in one grouped query"""
+    rows = DailyMetric.objects.all()
+    if metrics is not None:
+        rows = rows.filter(metric__in=metrics)
+    if start is not None:
+        rows = rows.filter(date__gte=start)
+    if end is not None:
+        rows = rows.filter(date__lte=end)
+    totals = {}
+    for row in rows.values('metric', 'dimension').annotate(total=Sum('value')).order_by():
+        series = METRICS.get(row['metric'])
+        total = _number(series, row['total']) if series else row['total']
+        totals.setdefault(row['metric'], {})[row['dimension']] = total
+    return totals
+
+
+def period_start(day, granularity):
+    """First day of the day/week/month/year bucket containing `day` (weeks start on Monday)"""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _periods(start, end, granularity):
+    periods = []
+    current = period_start(start, granularity)
+    while current <= end:
+        periods.append(current)
+        if len(periods) > MAX_BUCKETS:
+            raise ValueError(f"Range too long for {granularity} granularity (max {MAX_BUCKETS} points)")
+        if granularity == 'day':
+            current += timedelta(days=1)
+        elif granularity == 'week':
+            current += timedelta(days=7)
+        elif granularity == 'month':
+            current = _next_month(current)
+        else:
+            current = current.replace(year=current.year + 1)
+    return periods
+
+
+def timeseries(metric, start, end, granularity='day', dimension=None, by_dimension=False):
+    """
+    Values of `metric` from `start` to `end` (inclusive) bucketed by
+    `granularity`, zero-filled, as a list of {'period', 'value'} dicts.
+    `dimension` limits the series to one dimension value; `by_dimension` adds
+    a per-dimension breakdown to each point. Raises ValueError for unknown
+    metrics or granularities and for ranges with too many points.
+    """
+    series = METRICS.get(metric)
+    if series is None:
+        raise ValueError(f"Unknown metric: {metric}")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularity must be one of {', '.join(GRANULARITIES)}")
+    if start > end:
+        raise ValueError("start must not be after end")
+    periods = _periods(start, end, granularity)
+
+    # Whole months come from MonthlyMetric, the partial months at each end from DailyMetric
+    full_start = start if start.day == 1 else _next_month(start)
+    if _next_month(end) - timedelta(days=1) == end:
+        full_end = end
+    else:
+        full_end = end.replace(day=1) - timedelta(days=1)
+    sources = []
+    if granularity in ('month', 'year') and full_start < full_end:
+        sources.append((MonthlyMetric, full_start, full_end))
+        if start < full_start:
+            sources.append((DailyMetric, start, full_start - timedelta(days=1)))
+        if full_end < end:
+            sources.append((DailyMetric, full_end + timedelta(days=1), end))
+    else:
+        sources.append((DailyMetric, start, end))
+
+    totals = {period: Counter() for period in periods}
+    for model, low, high in sources:
+        rows = model.objects.filter(metric=metric, date__gte=low, date__lte=high)
+        if dimension is not None:
+            rows = rows.filter(dimension=dimension)
+        for day, dim, value in rows.values_list('date', 'dimension', 'value'):
+            totals[period_start(day, granularity)][dim] += value
+
+    points = []
+    for period in periods:
+        point = {
+            'period': period,
+            'value': _number(series, sum(totals[period].values())),
+        }
+        if by_dimension:
+            point['dimensions'] = {
+                dim: _number(series, value) for dim, value in sorted(totals[period].items()) if value
+            }
+        points.append(point)
+    return points
+
+
+def _cache_ttl():
+    return getattr(settings, 'ADMIN_DASHBOARD_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+
+def clear_dashboard_cache():
+    cache.delete_many([STATS_CACHE_KEY, SYSTEM_METRICS_CACHE_KEY])
+
+
+def dashboard_stats():
+    """Payload for DashboardStatsView"""
+    def compute():
+        totals = metric_totals(['enterprises', 'enterprises_vetted', 'assessments', 'users'])
+        enterprises = sum(totals.get('enterprises', {}).values())
+        vetted = sum(totals.get('enterprises_vetted', {}).values())
+        assessments = totals.get('assessments', {})
+        return {
+            'totalEnterprises': enterprises,
+            'vettedEnterprises': vetted,
+            'pendingEnterprises': enterprises - vetted,
+            'activeAssessments': assessments.get('in_progress', 0),
+            'completedAssessments': assessments.get('completed', 0) + assessments.get('reviewed', 0),
+            'pendingReviews': assessments.get('completed', 0),
+            'totalUsers': sum(totals.get('users', {}).values()),
+            'totalPayments': 0  # Will implement when payments are ready
+        }
+    return cache.get_or_set(STATS_CACHE_KEY, compute, _cache_ttl())
+
+
+def _month_starts(count, before):
+    """First day of each of the `count` calendar months preceding `before`'s month"""
+    year, month = before.year, before.month
+    starts = []
+    for _ in range(count):
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+        starts.append(date(year, month, 1))
+    return list(reversed(starts))
+
+
+def system_metrics():
+    """Payload for SystemMetricsView"""
+    def compute():
+        # User growth over the last 6 calendar months
+        today = timezone.localdate()
+        months = _month_starts(6, today)
+        growth = timeseries('users', months[0], today.replace(day=1) - timedelta(days=1), 'month')
+        totals = metric_totals(['assessments', 'enterprises'])
+        assessments = totals.get('assessments', {})
+        return {
+            'userGrowth': [
+                {'label': point['period'].strftime('%B'), 'value': point['value']}
+                for point in growth
+            ],
+            'assessmentCompletion': [
+                {'label': 'Completed', 'value': assessments.get('completed', 0) + assessments.get('reviewed', 0)},
+                {'label': 'In Progress', 'value': assessments.get('in_progress', 0)},
+                {'label': 'Pending', 'value': assessments.get('draft', 0)},
+            ],
+            'sectorDistribution': [
+                {'label': sector, 'value': count}
+                for sector, count in sorted(totals.get('enterprises', {}).items())
+                if sector and count
+            ],
+            'monthlyRevenue': []  # Will implement when payments are ready
+        }
+    return cache.get_or_set(SYSTEM_METRICS_CACHE_KEY, compute, _cache_ttl())
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('metric', models.CharField(max_length=50)),
+                ('dimension', models.CharField(blank=True, default='', max_length=100)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+            options={
+                'ordering': ['-date', 'metric', 'dimension'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['metric', 'date'], name='admin_dashb_metric_a3f384_idx')],
+                'unique_together': {('metric', 'dimension', 'date')},
+            },
+        ),
+    ]
@@ -1,3 +1,43 @@
 from django.db import models
 
-# Create your models here.
+
+class MetricRollup(models.Model):
+    """A metric's value for one period, optionally split by a dimension"""
+    date = models.DateField()
+    metric = models.CharField(max_length=50)
+    dimension = models.CharField(max_length=100, blank=True, default='')
+    value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    def __str__(self):
+        label = f"{self.metric}[{self.dimension}]" if self.dimension else self.metric
+        return f"{self.date} {label}: {self.value}"
+
+    class Meta:
+        abstract = True
+        unique_together = ['metric', 'dimension', 'date']
+        ordering = ['-date', 'metric', 'dimension']
+
+
+class DailyMetric(MetricRollup):
+    """
+    Per-day rollup of a dashboard metric, kept current by admin_dashboard.signals.
+    Rows are bucketed by the day the counted object was created, so summing a
+    metric over all days gives its current total.
+    """
+
+    class Meta(MetricRollup.Meta):
+        indexes = [
+            models.Index(fields=['metric', 'date']),
+        ]
+
+
+class MonthlyMetric(MetricRollup):
+    """
+    Per-month rollup of the same metrics as DailyMetric; `date` is the first
+    day of the month. Lets long ranges be read without summing daily rows.
+    """
+
+    class Meta(MetricRollup.Meta):
+        indexes = [
+            models.Index(fields=['metric', 'date']),
+        ]
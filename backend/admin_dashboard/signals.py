@@ -0,0 +1,82 @@
+from collections import Counter
+
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+
+from core.audit import audit_logs_written
+from core.models import AuditLog
+from .metrics import SERIES, apply_deltas, contributions, series_for, tracked_values
+
+
+def _remember_loaded_values(sender, instance, **kwargs):
+    """Note the tracked values a row was loaded with, so saves need no extra query."""
+    # post_init runs inside Model.__init__, before from_db clears _state.adding
+    if instance.pk is not None:
+        instance._metric_values = tracked_values(instance, series_for(sender))
+
+
+def _snapshot(sender, instance, update_fields=None, **kwargs):
+    """Work out what an existing row contributed before this save changes it."""
+    instance._metric_contributions = None
+    if instance._state.adding or instance.pk is None:
+        return
+    series_list = series_for(sender)
+    tracked = set().union(*(series.fields for series in series_list))
+    if update_fields is not None and not tracked & set(update_fields):
+        return
+
+    previous = getattr(instance, '_metric_values', None)
+    if previous is None:
+        # Loaded with deferred fields (or built by hand): read the stored row
+        previous = sender._default_manager.filter(pk=instance.pk).values(*tracked).first()
+    if previous is not None:
+        instance._metric_contributions = contributions(previous, series_list)
+
+
+def _record_save(sender, instance, created, **kwargs):
+    series_list = series_for(sender)
+    current = tracked_values(instance, series_list)
+    if current is None:
+        return
+    deltas = contributions(current, series_list)
+    if not created:
+        before = getattr(instance, '_metric_contributions', None)
+        if before is None:
+            return
+        deltas.subtract(before)
+    apply_deltas(deltas)
+    instance._metric_values = current
+
+
+def _record_delete(sender, instance, **kwargs):
+    series_list = series_for(sender)
+    values = getattr(instance, '_metric_values', None) or tracked_values(instance, series_list)
+    if values is None:
+        return
+    deltas = contributions(values, series_list)
+    apply_deltas({key: -value for key, value in deltas.items()})
+
+
+def _record_bulk_create(sender, instances, **kwargs):
+    """Rows saved with bulk_create never send post_save; count them in one pass."""
+    series_list = series_for(sender)
+    deltas = Counter()
+    for instance in instances:
+        values = tracked_values(instance, series_list)
+        if values is not None:
+            deltas.update(contributions(values, series_list))
+    apply_deltas(deltas)
+
+
+def connect_metric_signals():
+    """Keep the rollups current for every model in metrics.SERIES."""
+    for model in {series.get_model() for series in SERIES}:
+        uid = f'admin_dashboard.metrics.{model._meta.label}'
+        post_init.connect(_remember_loaded_values, sender=model, dispatch_uid=f'{uid}.post_init')
+        pre_save.connect(_snapshot, sender=model, dispatch_uid=f'{uid}.pre_save')
+        post_save.connect(_record_save, sender=model, dispatch_uid=f'{uid}.post_save')
+        post_delete.connect(_record_delete, sender=model, dispatch_uid=f'{uid}.post_delete')
+    # The audit writer saves AuditLog rows in batches
+    audit_logs_written.connect(_record_bulk_create, sender=AuditLog, dispatch_uid='admin_dashboard.metrics.audit')
+
+
+connect_metric_signals()
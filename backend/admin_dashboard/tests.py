@@ -1,3 +1,246 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from assessments.models import Assessment, Questionnaire
+from campaigns.models import Campaign, CampaignInterest
+from enterprises.models import Enterprise
+from investors.models import Investor
+from .metrics import metric_totals, timeseries, update_with_metrics
+from .models import DailyMetric, MonthlyMetric
+
+User = get_user_model()
+
+
+class DashboardMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('+250744000001', 'admin@example.com', None, user_type='admin')
+        cls.questionnaire = Questionnaire.objects.create(title='Readiness', description='', created_by=cls.admin)
+        cls.enterprises = []
+        for n, sector in enumerate(['technology', 'technology', 'agriculture']):
+            owner = User.objects.create_user(f'+25074410000{n}', f'owner{n}@example.com', None)
+            cls.enterprises.append(Enterprise.objects.create(
+                user=owner,
+                business_name=f'Metrics {n}',
+                tin_number=f'MET00{n}',
+                enterprise_type='limited_company',
+                sector=sector,
+                district='Gasabo',
+                phone=f'+25074410000{n}',
+                year_established=2020,
+                number_of_employees=5,
+                is_vetted=n == 0,
+            ))
+        for n, status in enumerate(['in_progress', 'completed', 'reviewed']):
+            Assessment.objects.create(
+                enterprise=cls.enterprises[n], questionnaire=cls.questionnaire,
+                fiscal_year=2026, status=status,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def raw_totals(self):
+        return {
+            'users': User.objects.count(),
+            'enterprises': Enterprise.objects.count(),
+            'enterprises_vetted': Enterprise.objects.filter(is_vetted=True).count(),
+            'assessments_completed': Assessment.objects.filter(status='completed').count(),
+        }
+
+    def rollup_totals(self):
+        totals = metric_totals()
+        return {
+            'users': sum(totals.get('users', {}).values()),
+            'enterprises': sum(totals.get('enterprises', {}).values()),
+            'enterprises_vetted': sum(totals.get('enterprises_vetted', {}).values()),
+            'assessments_completed': totals.get('assessments', {}).get('completed', 0),
+        }
+
+    def test_rollups_follow_creates_updates_and_deletes(self):
+        self.assertEqual(self.rollup_totals(), self.raw_totals())
+
+        assessment = Assessment.objects.get(status='in_progress')
+        assessment.status = 'completed'
+        assessment.save()
+        enterprise = Enterprise.objects.get(business_name='Metrics 2')
+        enterprise.sector = 'manufacturing'
+        enterprise.is_vetted = True
+        enterprise.save()
+        User.objects.filter(phone_number='+250744100001').get().delete()
+
+        self.assertEqual(self.rollup_totals(), self.raw_totals())
+        self.assertEqual(
+            metric_totals()['enterprises'],
+            {'technology': 1, 'agriculture': 0, 'manufacturing': 1},
+        )
+
+    def test_saves_that_do_not_touch_tracked_fields_skip_rollups(self):
+        assessment = Assessment.objects.first()
+        assessment.fiscal_year = 2025
+        with self.assertNumQueries(1):
+            assessment.save()
+        with self.assertNumQueries(1):
+            self.admin.save(update_fields=['last_login'])
+
+    def test_rebuild_matches_incremental_rollups(self):
+        rows = lambda model, **filters: set(
+            model.objects.filter(**filters).values_list('metric', 'dimension', 'date', 'value')
+        )
+        incremental = (rows(DailyMetric, value__gt=0), rows(MonthlyMetric, value__gt=0))
+
+        call_command('rebuild_dashboard_metrics', stdout=StringIO())
+
+        self.assertEqual((rows(DailyMetric), rows(MonthlyMetric)), incremental)
+
+    def test_dashboard_stats_are_cached(self):
+        response = self.client.get('/api/admin_dashboard/api/dashboard-stats/')
+
+        self.assertEqual(response.data['totalEnterprises'], 3)
+        self.assertEqual(response.data['vettedEnterprises'], 1)
+        self.assertEqual(response.data['activeAssessments'], 1)
+        self.assertEqual(response.data['completedAssessments'], 2)
+        self.assertEqual(response.data['pendingReviews'], 1)
+        self.assertEqual(response.data['totalUsers'], 4)
+        with self.assertNumQueries(0):
+            self.client.get('/api/admin_dashboard/api/dashboard-stats/')
+
+    def test_user_growth_counts_calendar_months(self):
+        last_month = timezone.now().replace(day=1) - timedelta(days=1)
+        User.objects.filter(phone_number='+250744100000').update(date_joined=last_month)
+        User.objects.filter(phone_number='+250744100001').update(date_joined=last_month - timedelta(days=365))
+        call_command('rebuild_dashboard_metrics', stdout=StringIO())
+
+        response = self.client.get('/api/admin_dashboard/api/system-metrics/')
+
+        growth = response.data['userGrowth']
+        self.assertEqual(len(growth), 6)
+        self.assertEqual(growth[-1], {'label': last_month.strftime('%B'), 'value': 1})
+        self.assertEqual(
+            response.data['sectorDistribution'],
+            [{'label': 'agriculture', 'value': 1}, {'label': 'technology', 'value': 2}],
+        )
+
+
+class TimeseriesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('+250745000001', 'admin@example.com', None, user_type='admin')
+        owner = User.objects.create_user('+250745000002', 'owner@example.com', None)
+        enterprise = Enterprise.objects.create(
+            user=owner,
+            business_name='Series Ltd',
+            tin_number='SER001',
+            enterprise_type='limited_company',
+            sector='technology',
+            district='Gasabo',
+            phone='+250745000002',
+            year_established=2020,
+            number_of_employees=5,
+        )
+        cls.campaign = Campaign.objects.create(
+            enterprise=enterprise,
+            title='Seed',
+            description='Seed round',
+            campaign_type='equity',
+            target_amount=Decimal('1000000'),
+            min_investment=Decimal('1000'),
+            status='active',
+        )
+        partner = User.objects.create_user('+250745000003', 'partner@example.com', None, user_type='investor')
+        cls.investor = Investor.objects.create(
+            user=partner,
+            investor_type='bank',
+            organization_name='Series Bank',
+            contact_email=partner.email,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_pledges_and_amounts_follow_saves(self):
+        interest = CampaignInterest.objects.create(campaign=self.campaign, investor=self.investor)
+        self.assertNotIn('pledges', metric_totals())
+
+        # Views assign the posted amount as a string before saving
+        interest.status = 'pledged'
+        interest.committed_amount = '2500.50'
+        interest.save()
+        self.campaign.amount_raised = Decimal('2500.50')
+        self.campaign.save(update_fields=['amount_raised'])
+
+        totals = metric_totals(['pledges', 'pledged_amount', 'amount_raised', 'campaigns'])
+        self.assertEqual(totals['pledges'], {'pledged': 1})
+        self.assertEqual(totals['pledged_amount'], {'pledged': 2500.5})
+        self.assertEqual(totals['amount_raised'], {'equity': 2500.5})
+        self.assertEqual(totals['campaigns'], {'active': 1})
+
+        interest.status = 'withdrawn'
+        interest.save()
+        self.assertEqual(metric_totals(['pledges'])['pledges'], {'pledged': 0})
+
+    def test_admin_bulk_approve_moves_rollups(self):
+        self.campaign.status = 'approved'
+        self.campaign.save(update_fields=['status'])
+        request = RequestFactory().post('/admin/campaigns/campaign/')
+        request.user = self.admin
+
+        site._registry[Campaign].approve_campaigns(request, Campaign.objects.filter(pk=self.campaign.pk))
+
+        self.assertEqual(metric_totals(['campaigns'])['campaigns'], {'active': 1, 'approved': 0})
+        # Updates that touch no tracked field leave the rollups alone
+        with self.assertNumQueries(1):
+            update_with_metrics(Campaign.objects.filter(pk=self.campaign.pk), title='Seed round')
+
+    def test_month_buckets_combine_monthly_and_daily_rows(self):
+        joined = {
+            '+250745000001': timezone.make_aware(timezone.datetime(2026, 1, 20)),
+            '+250745000002': timezone.make_aware(timezone.datetime(2026, 2, 3)),
+            '+250745000003': timezone.make_aware(timezone.datetime(2026, 3, 31)),
+        }
+        for phone, moment in joined.items():
+            User.objects.filter(phone_number=phone).update(date_joined=moment)
+        call_command('rebuild_dashboard_metrics', '--metric', 'users', stdout=StringIO())
+
+        # Jan 15 - Mar 10: partial January and March from daily rows, February from monthly
+        with self.assertNumQueries(3):
+            points = timeseries('users', date(2026, 1, 15), date(2026, 3, 10), 'month', by_dimension=True)
+
+        self.assertEqual(
+            [(point['period'], point['value']) for point in points],
+            [(date(2026, 1, 1), 1), (date(2026, 2, 1), 1), (date(2026, 3, 1), 0)],
+        )
+        self.assertEqual(points[0]['dimensions'], {'admin': 1})
+        weeks = timeseries('users', date(2026, 1, 1), date(2026, 3, 31), 'week')
+        self.assertEqual(sum(point['value'] for point in weeks), 3)
+        self.assertEqual(weeks[0]['period'], date(2025, 12, 29))
+
+    def test_timeseries_endpoint(self):
+        today = timezone.localdate()
+        response = self.client.get('/api/admin_dashboard/api/timeseries/', {
+            'metric': 'campaigns', 'start': today.isoformat(), 'end': today.isoformat(),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['series'], [{'period': today, 'value': 1}])
+
+        for params in ({}, {'metric': 'unknown'}, {'metric': 'users', 'granularity': 'hour'},
+                       {'metric': 'users', 'start': 'yesterday'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/admin_dashboard/api/timeseries/', params)
+                self.assertEqual(response.status_code, 400)
@@ -6,4 +6,5 @@ urlpatterns = [
     path('api/recent-assessments/', views.RecentAssessmentsView.as_view(), name='recent-assessments'),
     path('api/recent-enterprises/', views.RecentEnterprisesView.as_view(), name='recent-enterprises'),
     path('api/system-metrics/', views.SystemMetricsView.as_view(), name='system-metrics'),
+    path('api/timeseries/', views.MetricTimeseriesView.as_view(), name='metric-timeseries'),
 ]
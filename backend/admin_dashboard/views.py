@@ -3,14 +3,13 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.db.models import Count, Q
+from datetime import date, timedelta
 from django.utils import timezone
-from datetime import timedelta
-from accounts.models import User
 from enterprises.models import Enterprise
-from assessments.models import Assessment, Questionnaire
+from assessments.models import Assessment
 from assessments.serializers import AssessmentSerializer
 from enterprises.serializers import EnterpriseSerializer
+from .metrics import dashboard_stats, system_metrics, timeseries
 
 
 class DashboardStatsView(APIView):
@@ -21,30 +20,8 @@ class DashboardStatsView(APIView):
         if not request.user.is_staff and request.user.user_type not in ['admin', 'superadmin']:
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Calculate stats
-        total_enterprises = Enterprise.objects.count()
-        vetted_enterprises = Enterprise.objects.filter(is_vetted=True).count()
-        pending_enterprises = total_enterprises - vetted_enterprises
-        
-        # Assessment stats
-        total_assessments = Assessment.objects.count()
-        completed_assessments = Assessment.objects.filter(status='submitted').count()
-        pending_assessments = Assessment.objects.filter(status='pending').count()
-        in_progress_assessments = Assessment.objects.filter(status='in_progress').count()
-        
-        # User stats
-        total_users = User.objects.count()
-        
-        stats = {
-            'totalEnterprises': total_enterprises,
-            'vettedEnterprises': vetted_enterprises,
-            'pendingEnterprises': pending_enterprises,
-            'activeAssessments': in_progress_assessments,
-            'completedAssessments': completed_assessments,
-            'pendingReviews': pending_assessments,
-            'totalUsers': total_users,
-            'totalPayments': 0  # Will implement when payments are ready
-        }
+        # Served from the DailyMetric rollups, cached briefly
+        stats = dashboard_stats()
         
         return Response(stats)
 
@@ -80,7 +57,7 @@ class RecentEnterprisesView(APIView):
         limit = int(request.GET.get('limit', 10))
         
         # Get recent enterprises
-        enterprises = Enterprise.objects.select_related('owner').order_by('-created_at')[:limit]
+        enterprises = Enterprise.objects.select_related('user').order_by('-created_at')[:limit]
         
         # Serialize the data
         serializer = EnterpriseSerializer(enterprises, many=True)
@@ -95,40 +72,51 @@ class SystemMetricsView(APIView):
         if not request.user.is_staff and request.user.user_type not in ['admin', 'superadmin']:
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
         
-        # User growth over last 6 months
-        months = []
-        user_growth = []
-        now = timezone.now()
-        
-        for i in range(6, 0, -1):
-            month_date = now - timedelta(days=30 * i)
-            month_label = month_date.strftime('%B')
-            users_count = User.objects.filter(date_joined__month=month_date.month).count()
-            months.append(month_label)
-            user_growth.append(users_count)
-        
-        # Assessment completion rates
-        assessment_completion = [
-            {'label': 'Completed', 'value': Assessment.objects.filter(status='submitted').count()},
-            {'label': 'In Progress', 'value': Assessment.objects.filter(status='in_progress').count()},
-            {'label': 'Pending', 'value': Assessment.objects.filter(status='pending').count()},
-        ]
-        
-        # Sector distribution
-        sector_distribution = []
-        sectors = Enterprise.objects.values('sector').annotate(count=Count('sector'))
-        for sector in sectors:
-            if sector['sector']:
-                sector_distribution.append({
-                    'label': sector['sector'],
-                    'value': sector['count']
-                })
-        
-        metrics = {
-            'userGrowth': [{'label': months[i], 'value': user_growth[i]} for i in range(len(months))],
-            'assessmentCompletion': assessment_completion,
-            'sectorDistribution': sector_distribution,
-            'monthlyRevenue': []  # Will implement when payments are ready
-        }
+        # Served from the DailyMetric rollups, cached briefly
+        metrics = system_metrics()
         
         return Response(metrics)
+
+
+class MetricTimeseriesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Growth series for one metric from the rollup tables.
+
+        Query params: metric (required), start and end (YYYY-MM-DD, default
+        the last 30 days), granularity (day, week, month or year), dimension
+        (limit to one value) and by_dimension=true for a per-dimension split.
+        """
+        if not request.user.is_staff and request.user.user_type not in ['admin', 'superadmin']:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+
+        metric = request.GET.get('metric')
+        if not metric:
+            return Response({'error': 'metric is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+            start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=29)
+        except ValueError:
+            return Response({'error': 'start and end must be YYYY-MM-DD dates'}, status=status.HTTP_400_BAD_REQUEST)
+
+        granularity = request.GET.get('granularity', 'day')
+        try:
+            points = timeseries(
+                metric, start, end, granularity,
+                dimension=request.GET.get('dimension'),
+                by_dimension=request.GET.get('by_dimension') == 'true',
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'metric': metric,
+            'granularity': granularity,
+            'start': start,
+            'end': end,
+            'total': sum(point['value'] for point in points),
+            'series': points,
+        })
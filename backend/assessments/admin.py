@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     AssessmentCategory, Questionnaire, Question, QuestionOption,
     Assessment, AssessmentResponse, CategoryScore, Recommendation,
-    QuestionRecommendation, Service
+    QuestionRecommendation, Service, InsightCacheEntry, InsightCacheStats
 )
 
 @admin.register(Service)
@@ -73,3 +73,14 @@ class QuestionRecommendationAdmin(admin.ModelAdmin):
         """Show first 50 chars of recommendation"""
         return obj.recommendation_text[:50] + '...' if len(obj.recommendation_text) > 50 else obj.recommendation_text
     recommendation_preview.short_description = 'Recommendation'
+
+@admin.register(InsightCacheEntry)
+class InsightCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['key', 'hit_count', 'created_at', 'last_used_at', 'expires_at']
+    search_fields = ['key']
+    readonly_fields = ['key', 'insights', 'hit_count', 'created_at', 'last_used_at']
+
+@admin.register(InsightCacheStats)
+class InsightCacheStatsAdmin(admin.ModelAdmin):
+    list_display = ['hits', 'misses', 'evictions', 'reset_at']
+    readonly_fields = ['hits', 'misses', 'evictions', 'reset_at']
@@ -0,0 +1,128 @@
+"""
+Content-addressed cache for AI assessment insights.
+
+Entries are keyed by a SHA-256 of the normalized prompt context (enterprise
+profile, overall and category scores, response set) plus the insights client
+and CACHE_VERSION, so re-running insights for an assessment whose inputs have
+not changed is served from the database instead of calling the model.
+Entries expire after AI_INSIGHTS_CACHE_TTL seconds and the least recently
+used are evicted beyond AI_INSIGHTS_CACHE_MAX_ENTRIES. Hit, miss and
+eviction counters live on the single InsightCacheStats row.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InsightCacheEntry, InsightCacheStats
+
+
+# Bump when the prompt template or insight parsing changes; old keys stop matching
+CACHE_VERSION = 1
+
+DEFAULT_TTL_SECONDS = 60 * 60 * 24 * 30
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def insights_cache_key(context):
+    """Hash of the prompt context and the client that would answer it"""
+    normalized = json.dumps(
+        {
+            'version': CACHE_VERSION,
+            'client': getattr(settings, 'AI_INSIGHTS_CLIENT', ''),
+            'context': context,
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str,
+    )
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _count(field, amount=1):
+    updated = InsightCacheStats.objects.filter(pk=1).update(**{field: F(field) + amount})
+    if not updated:
+        InsightCacheStats.objects.get_or_create(pk=1)
+        InsightCacheStats.objects.filter(pk=1).update(**{field: F(field) + amount})
+
+
+def get_cached_insights(key):
+    """Return the cached insights for `key`, or None on a miss or expired entry"""
+    now = timezone.now()
+    insights = (
+        InsightCacheEntry.objects.filter(key=key, expires_at__gt=now)
+        .values_list('insights', flat=True)
+        .first()
+    )
+    if insights is None:
+        _count('misses')
+        return None
+
+    InsightCacheEntry.objects.filter(key=key).update(hit_count=F('hit_count') + 1, last_used_at=now)
+    _count('hits')
+    return insights
+
+
+def cache_insights(key, insights):
+    """Store parsed insights under `key`, then evict to stay within the size limit"""
+    ttl = getattr(settings, 'AI_INSIGHTS_CACHE_TTL', DEFAULT_TTL_SECONDS)
+    now = timezone.now()
+    InsightCacheEntry.objects.update_or_create(
+        key=key,
+        defaults={
+            'insights': insights,
+            'last_used_at': now,
+            'expires_at': now + timedelta(seconds=ttl),
+        },
+    )
+    evict()
+
+
+def evict():
+    """
+    Delete expired entries, then the least recently used ones beyond
+    AI_INSIGHTS_CACHE_MAX_ENTRIES. Returns the number of entries removed.
+    """
+    max_entries = getattr(settings, 'AI_INSIGHTS_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+    removed, _ = InsightCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+
+    overflow = list(
+        InsightCacheEntry.objects.order_by('-last_used_at', '-id')
+        .values_list('id', flat=True)[max_entries:]
+    )
+    if overflow:
+        removed += InsightCacheEntry.objects.filter(id__in=overflow).delete()[0]
+
+    if removed:
+        _count('evictions', removed)
+    return removed
+
+
+def cache_stats():
+    """Counters plus current size, for the insights_cache command and admin"""
+    stats = InsightCacheStats.objects.filter(pk=1).first() or InsightCacheStats(pk=1, reset_at=None)
+    lookups = stats.hits + stats.misses
+    return {
+        'entries': InsightCacheEntry.objects.count(),
+        'hits': stats.hits,
+        'misses': stats.misses,
+        'evictions': stats.evictions,
+        'hit_rate': round(stats.hits / lookups * 100, 1) if lookups else 0.0,
+        'reset_at': stats.reset_at,
+    }
+
+
+def reset_stats():
+    """Zero the hit, miss and eviction counters"""
+    InsightCacheStats.objects.update_or_create(
+        pk=1, defaults={'hits': 0, 'misses': 0, 'evictions': 0, 'reset_at': timezone.now()},
+    )
+
+
+def clear_cache():
+    """Delete every entry. Returns the number removed."""
+    removed, _ = InsightCacheEntry.objects.all().delete()
+    return removed
@@ -1,44 +1,131 @@
 """
 AI utilities for generating assessment insights using Google Gemini API
+
+The model is reached through an insights client (settings.AI_INSIGHTS_CLIENT,
+GeminiClient by default) exposing `generate(prompt) -> str`, so tests and
+local development can swap in a fake without touching the prompt or parser.
 """
 import google.generativeai as genai
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import F, FloatField, Window
+from django.db.models.functions import Abs, Cast, NullIf, RowNumber
+from django.utils.module_loading import import_string
 import json
 
-# Configure Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
+from .ai_cache import cache_insights, get_cached_insights, insights_cache_key
+
+# Responses included in the prompt's "Sample Responses" section
+PROMPT_RESPONSE_LIMIT = 15
+
+
+class GeminiClient:
+    """Calls Gemini and returns the raw text of the first candidate"""
+    model_name = 'gemini-2.5-flash'
+
+    def __init__(self):
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY not configured")
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+
+    def generate(self, prompt):
+        # Use Gemini Flash for fast, cost-effective generation
+        model = genai.GenerativeModel(self.model_name)
+        
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=0.7,
+                top_p=0.95,
+                top_k=40,
+                max_output_tokens=8192,  # Increased from 2048 to allow complete responses
+                response_mime_type="application/json",
+            ),
+            safety_settings={
+                'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
+                'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
+                'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
+                'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
+            }
+        )
+                
+        # Check if response was blocked
+        if not response.candidates:
+            if response.prompt_feedback:
+                raise ValueError(f"No candidates returned. Prompt feedback: {response.prompt_feedback}")
+            raise ValueError("No candidates returned by Gemini API")
+        
+        candidate = response.candidates[0]
+        
+        # Check finish reason (1 = STOP, 2 = MAX_TOKENS)
+        # Note: finish_reason is an enum, compare by value
+        finish_reason_name = candidate.finish_reason.name if hasattr(candidate.finish_reason, 'name') else str(candidate.finish_reason)
+        if finish_reason_name not in ['STOP', '1']:
+            raise ValueError(f"Generation stopped abnormally. Finish reason: {finish_reason_name} ({candidate.finish_reason})")
+        
+        if not candidate.content or not candidate.content.parts:
+            raise ValueError("Response has no content parts")
+
+        return response.text
 
-def generate_assessment_insights(assessment, enterprise):
+
+def get_insights_client():
+    """Instantiate the client class named by settings.AI_INSIGHTS_CLIENT"""
+    client_path = getattr(settings, 'AI_INSIGHTS_CLIENT', 'assessments.ai_utils.GeminiClient')
+    return import_string(client_path)()
+
+
+def select_informative_responses(assessment, limit=PROMPT_RESPONSE_LIMIT):
     """
-    Generate strengths, weaknesses, and recommendations using Gemini AI
+    Pick the `limit` responses most worth showing the model, in SQL.
     
-    Args:
-        assessment: Assessment instance with scores and responses
-        enterprise: Enterprise instance with business details
-        
-    Returns:
-        dict: {
-            'strengths': [list of strength strings],
-            'weaknesses': [list of weakness strings],
-            'recommendations': [list of recommendation dicts with title, description, priority, suggested_actions]
-        }
+    Responses scoring furthest from the 50% midpoint (clear strengths and
+    clear gaps) rank first within their category, and categories take turns
+    so one large category cannot crowd out the rest. The result is returned
+    in questionnaire order with questions, categories and selected options
+    loaded.
     """
-    if not settings.GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY not configured")
+    ratio = Cast('score', FloatField()) / Cast(NullIf('question__max_score', 0), FloatField())
+    selected = (
+        assessment.responses
+        .annotate(informativeness=Abs(ratio - 0.5))
+        .annotate(category_rank=Window(
+            RowNumber(),
+            partition_by=[F('question__category_id')],
+            order_by=[F('informativeness').desc(nulls_last=True), 'question__order', 'question_id'],
+        ))
+        .select_related('question__category')
+        .prefetch_related('selected_options')
+        .order_by('category_rank', F('informativeness').desc(nulls_last=True), 'question__order', 'question_id')
+        [:limit]
+    )
+    return sorted(selected, key=lambda response: (response.question.order, response.question_id))
+
+
+def build_insights_context(assessment, enterprise):
+    """
+    Collect every input the prompt is rendered from as plain JSON data.
+    Lists are put in a stable order so the same assessment state always
+    yields the same context (and the same ai_cache key).
     
+    Runs three queries whatever the assessment size: category scores,
+    the selected responses with their questions, and their options.
+    """
     # Prepare assessment data
     category_scores = []
-    for cat_score in assessment.category_scores.all():
+    for cat_score in assessment.category_scores.select_related('category'):
         category_scores.append({
             'category': cat_score.category.name,
             'score': float(cat_score.score),
             'max_score': float(cat_score.max_score),
             'percentage': float(cat_score.percentage)
         })
+    category_scores.sort(key=lambda item: item['category'])
     
     # Prepare responses with questions
     responses_data = []
-    for response in assessment.responses.all():
+    for response in select_informative_responses(assessment):
         question = response.question
         response_info = {
             'category': question.category.name,
@@ -48,10 +135,11 @@ def generate_assessment_insights(assessment, enterprise):
         }
         
         # Add answer details
-        if response.selected_options.exists():
-            response_info['answer'] = [opt.text for opt in response.selected_options.all()]
+        selected_options = response.selected_options.all()
+        if selected_options:
+            response_info['answer'] = sorted(opt.text for opt in selected_options)
         elif response.text_response:
-            response_info['answer'] = response.text_response
+            response_info['answer'] = response.text_response.strip()
         elif response.number_response is not None:
             response_info['answer'] = float(response.number_response)
         
@@ -80,19 +168,30 @@ def generate_assessment_insights(assessment, enterprise):
     if hasattr(enterprise, 'description') and enterprise.description:
         enterprise_details.append(f"Description: {enterprise.description}")
     
-    enterprise_profile = " | ".join(enterprise_details)
-    
-    # Build comprehensive prompt
-    prompt = f"""Analyze this investment readiness assessment for a Rwandan SME and provide actionable insights.
+    return {
+        'business_name': enterprise.business_name,
+        'sector': enterprise.sector,
+        'enterprise_profile': " | ".join(enterprise_details),
+        'percentage_score': float(assessment.percentage_score),
+        'total_score': float(assessment.total_score),
+        'max_possible_score': float(assessment.max_possible_score),
+        'category_scores': category_scores,
+        'responses': responses_data,
+    }
+
 
-**Enterprise:** {enterprise_profile}
-**Overall Score:** {float(assessment.percentage_score):.1f}% ({float(assessment.total_score):.1f}/{float(assessment.max_possible_score):.1f})
+def render_insights_prompt(context):
+    """Render the Gemini prompt from build_insights_context() output"""
+    return f"""Analyze this investment readiness assessment for a Rwandan SME and provide actionable insights.
+
+**Enterprise:** {context['enterprise_profile']}
+**Overall Score:** {context['percentage_score']:.1f}% ({context['total_score']:.1f}/{context['max_possible_score']:.1f})
 
 **Category Scores:**
-{json.dumps(category_scores, indent=2)}
+{json.dumps(context['category_scores'], indent=2)}
 
 **Sample Responses:**
-{json.dumps(responses_data[:15], indent=2)}
+{json.dumps(context['responses'], indent=2)}
 
 Return JSON with:
 - 3-5 strengths (areas ≥70%)
@@ -106,7 +205,7 @@ Format:
   "recommendations": [
     {{
       "title": "Action-oriented title",
-      "description": "Why important for {enterprise.business_name} in {enterprise.sector}",
+      "description": "Why important for {context['business_name']} in {context['sector']}",
       "priority": "high|medium|low",
       "suggested_actions": "3-5 concrete, measurable steps",
       "category": "Related category name"
@@ -116,84 +215,129 @@ Format:
 }}
 
 Priority guide: high=critical gaps (<50%), medium=improvements (50-70%), low=optimization (>70%)"""
-    
+
+
+def build_insights_prompt(assessment, enterprise):
+    """Build the Gemini prompt from the assessment's scores, responses and enterprise profile"""
+    return render_insights_prompt(build_insights_context(assessment, enterprise))
+
+
+def parse_insights(response_text):
+    """Extract and validate the insights JSON object from a model response"""
+    response_text = response_text.strip()
+
+    # Remove markdown code blocks if present
+    if response_text.startswith('```json'):
+        response_text = response_text[7:]
+    if response_text.startswith('```'):
+        response_text = response_text[3:]
+    if response_text.endswith('```'):
+        response_text = response_text[:-3]
+    response_text = response_text.strip()
+
+    # Try to find JSON object in the response
+    # Sometimes the AI adds extra text before or after the JSON
+    start_idx = response_text.find('{')
+    end_idx = response_text.rfind('}')
+
+    if start_idx != -1 and end_idx != -1:
+        response_text = response_text[start_idx:end_idx + 1]
+
+    # Parse JSON
     try:
-        # Use Gemini 1.5 Flash for fast, cost-effective generation
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                top_p=0.95,
-                top_k=40,
-                max_output_tokens=8192,  # Increased from 2048 to allow complete responses
-                response_mime_type="application/json",
-            ),
-            safety_settings={
-                'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-                'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-                'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-                'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
-            }
-        )
-                
-        # Check if response was blocked
-        if not response.candidates:
-            if response.prompt_feedback:
-                raise ValueError(f"No candidates returned. Prompt feedback: {response.prompt_feedback}")
-            raise ValueError("No candidates returned by Gemini API")
-        
-        candidate = response.candidates[0]
-        
-        # Check finish reason (1 = STOP, 2 = MAX_TOKENS)
-        # Note: finish_reason is an enum, compare by value
-        finish_reason_name = candidate.finish_reason.name if hasattr(candidate.finish_reason, 'name') else str(candidate.finish_reason)
-        if finish_reason_name not in ['STOP', '1']:
-            raise ValueError(f"Generation stopped abnormally. Finish reason: {finish_reason_name} ({candidate.finish_reason})")
-        
-        if not candidate.content or not candidate.content.parts:
-            raise ValueError("Response has no content parts")
-        
-        # Extract JSON from response
-        response_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
-        
-        # Try to find JSON object in the response
-        # Sometimes the AI adds extra text before or after the JSON
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}')
-        
-        if start_idx != -1 and end_idx != -1:
-            response_text = response_text[start_idx:end_idx + 1]
-        
-        # Parse JSON
-        try:
-            insights = json.loads(response_text)
-        except json.JSONDecodeError as e:
-            # Log the problematic response for debugging
-            print(f"JSON parsing error: {e}")
-            print(f"Response text (first 1000 chars): {response_text[:1000]}")
-            print(f"Response text (last 500 chars): {response_text[-500:]}")
-            raise ValueError(f"Failed to parse AI response as JSON: {str(e)}")
-        
-        # Validate structure
-        if not all(key in insights for key in ['strengths', 'weaknesses', 'recommendations']):
-            raise ValueError("Invalid response structure from AI")
-        
-        return insights
-        
+        insights = json.loads(response_text)
     except json.JSONDecodeError as e:
+        # Log the problematic response for debugging
         print(f"JSON parsing error: {e}")
+        print(f"Response text (first 1000 chars): {response_text[:1000]}")
+        print(f"Response text (last 500 chars): {response_text[-500:]}")
         raise ValueError(f"Failed to parse AI response as JSON: {str(e)}")
+
+    # Validate structure
+    if not all(key in insights for key in ['strengths', 'weaknesses', 'recommendations']):
+        raise ValueError("Invalid response structure from AI")
+
+    return insights
+
+
+def generate_assessment_insights(assessment, enterprise, client=None, use_cache=True):
+    """
+    Generate strengths, weaknesses, and recommendations using Gemini AI
+    
+    Args:
+        assessment: Assessment instance with scores and responses
+        enterprise: Enterprise instance with business details
+        client: Insights client; defaults to get_insights_client()
+        use_cache: Serve unchanged assessments from the ai_cache; when False
+            the model is always called (the fresh result is still cached)
+        
+    Returns:
+        dict: {
+            'strengths': [list of strength strings],
+            'weaknesses': [list of weakness strings],
+            'recommendations': [list of recommendation dicts with title, description, priority, suggested_actions]
+        }
+    """
+    context = build_insights_context(assessment, enterprise)
+    key = insights_cache_key(context)
+    if use_cache:
+        cached = get_cached_insights(key)
+        if cached is not None:
+            return cached
+    
+    try:
+        if client is None:
+            client = get_insights_client()
+        insights = parse_insights(client.generate(render_insights_prompt(context)))
+    except ValueError:
+        raise
     except Exception as e:
         print(f"Gemini API error: {e}")
         raise ValueError(f"Failed to generate insights: {str(e)}")
+    
+    cache_insights(key, insights)
+    return insights
+
+
+def store_assessment_insights(assessment, insights):
+    """
+    Save generated insights on the assessment and replace its recommendations.
+    Returns the number of recommendations created.
+    """
+    from .models import AssessmentCategory, Recommendation
+    
+    # Fallback category: the first scored category, as before
+    fallback = assessment.category_scores.select_related('category').first()
+    fallback_category = fallback.category if fallback else None
+    
+    with transaction.atomic():
+        # Store strengths and weaknesses
+        assessment.ai_strengths = insights.get('strengths', [])
+        assessment.ai_weaknesses = insights.get('weaknesses', [])
+        assessment.ai_generated_at = timezone.now()
+        assessment.save()
+        
+        # Clear existing recommendations
+        assessment.recommendations.all().delete()
+        
+        # Create recommendations from AI insights
+        recommendations = []
+        for rec_data in insights.get('recommendations', []):
+            # Find the category by name, or use a default
+            category = None
+            if rec_data.get('category'):
+                category = AssessmentCategory.objects.filter(
+                    name__icontains=rec_data['category']
+                ).first()
+            
+            recommendations.append(Recommendation(
+                assessment=assessment,
+                category=category or fallback_category,
+                title=rec_data.get('title', 'Recommendation'),
+                description=rec_data.get('description', ''),
+                priority=rec_data.get('priority', 'medium'),
+                suggested_actions=rec_data.get('suggested_actions', '')
+            ))
+        Recommendation.objects.bulk_create(recommendations)
+    
+    return len(recommendations)
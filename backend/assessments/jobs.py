@@ -0,0 +1,33 @@
+"""
+Background job handlers for assessments (run by `python manage.py run_jobs`).
+"""
+from core.jobs import PermanentJobError, register
+from .ai_utils import generate_assessment_insights, store_assessment_insights
+from .models import Assessment
+
+
+GENERATE_INSIGHTS = 'assessments.generate_insights'
+
+
+@register(GENERATE_INSIGHTS)
+def generate_insights(payload):
+    """
+    Generate AI insights for `payload['assessment_id']` and replace its
+    recommendations. `payload['refresh']` skips the insight cache.
+    """
+    try:
+        assessment = Assessment.objects.select_related('enterprise').get(pk=payload['assessment_id'])
+    except (KeyError, Assessment.DoesNotExist):
+        raise PermanentJobError(f"Assessment {payload.get('assessment_id')} not found")
+    
+    insights = generate_assessment_insights(
+        assessment, assessment.enterprise, use_cache=not payload.get('refresh', False)
+    )
+    recommendations = store_assessment_insights(assessment, insights)
+    
+    return {
+        'assessment_id': assessment.pk,
+        'strengths': len(assessment.ai_strengths),
+        'weaknesses': len(assessment.ai_weaknesses),
+        'recommendations': recommendations,
+    }
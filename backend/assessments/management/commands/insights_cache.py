@@ -0,0 +1,40 @@
+"""
+Management command: insights_cache
+
+Reports AI insight cache usage (entries, hits, misses, evictions) so the
+saved Gemini calls can be tracked, and optionally evicts or clears entries.
+
+Usage:
+    python manage.py insights_cache
+    python manage.py insights_cache --evict         # drop expired / over-limit entries
+    python manage.py insights_cache --clear --reset-stats
+"""
+
+from django.core.management.base import BaseCommand
+from assessments.ai_cache import cache_stats, clear_cache, evict, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Show AI insight cache statistics, evict stale entries or clear the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true', help='Remove expired and least recently used entries')
+        parser.add_argument('--clear', action='store_true', help='Remove every cached entry')
+        parser.add_argument('--reset-stats', action='store_true', help='Zero the hit/miss counters')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            removed = clear_cache()
+            self.stdout.write(self.style.SUCCESS(f'Cleared {removed} cached insight(s).'))
+        elif options['evict']:
+            removed = evict()
+            self.stdout.write(self.style.SUCCESS(f'Evicted {removed} cached insight(s).'))
+        if options['reset_stats']:
+            reset_stats()
+
+        stats = cache_stats()
+        since = f" since {stats['reset_at']:%Y-%m-%d %H:%M}" if stats['reset_at'] else ''
+        self.stdout.write(
+            f"Entries: {stats['entries']}  Hits: {stats['hits']}  Misses: {stats['misses']}  "
+            f"Hit rate: {stats['hit_rate']}%  Evictions: {stats['evictions']}{since}"
+        )
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:12
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def remove_duplicate_category_scores(apps, schema_editor):
+    """Keep only the newest CategoryScore per (assessment, category) before adding the constraint."""
+    CategoryScore = apps.get_model('assessments', 'CategoryScore')
+    latest = (
+        CategoryScore.objects.values('assessment_id', 'category_id')
+        .annotate(keep_id=Max('id'))
+        .values_list('keep_id', flat=True)
+    )
+    CategoryScore.objects.exclude(id__in=list(latest)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0009_add_services_to_recommendation'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_category_scores, reverse_code=migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='categoryscore',
+            unique_together={('assessment', 'category')},
+        ),
+    ]
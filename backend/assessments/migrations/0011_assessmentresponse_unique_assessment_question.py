@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-16 10:05
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def remove_duplicate_responses(apps, schema_editor):
+    """Keep only the newest AssessmentResponse per (assessment, question) before adding the constraint."""
+    AssessmentResponse = apps.get_model('assessments', 'AssessmentResponse')
+    latest = (
+        AssessmentResponse.objects.values('assessment_id', 'question_id')
+        .annotate(keep_id=Max('id'))
+        .values_list('keep_id', flat=True)
+    )
+    AssessmentResponse.objects.exclude(id__in=list(latest)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0010_categoryscore_unique_assessment_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_responses, reverse_code=migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='assessmentresponse',
+            unique_together={('assessment', 'question')},
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_targets(apps, schema_editor):
+    """Index the target_* lists of existing questionnaires."""
+    Questionnaire = apps.get_model('assessments', 'Questionnaire')
+    QuestionnaireTarget = apps.get_model('assessments', 'QuestionnaireTarget')
+    dimension_fields = {
+        'sector': 'target_sectors',
+        'management_structure': 'target_management_structures',
+        'district': 'target_districts',
+    }
+    rows = set()
+    for questionnaire in Questionnaire.objects.all():
+        for dimension, field in dimension_fields.items():
+            for value in getattr(questionnaire, field) or []:
+                rows.add((questionnaire.pk, dimension, str(value)))
+    QuestionnaireTarget.objects.bulk_create([
+        QuestionnaireTarget(questionnaire_id=pk, dimension=dimension, value=value)
+        for pk, dimension, value in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0011_assessmentresponse_unique_assessment_question'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionnaireTarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('sector', 'Sector'), ('management_structure', 'Management Structure'), ('district', 'District')], max_length=30)),
+                ('value', models.CharField(max_length=100)),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='targets', to='assessments.questionnaire')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dimension', 'value'], name='assessments_dimensi_22a625_idx')],
+                'unique_together': {('questionnaire', 'dimension', 'value')},
+            },
+        ),
+        migrations.RunPython(backfill_targets, reverse_code=migrations.RunPython.noop),
+    ]
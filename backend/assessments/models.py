@@ -36,6 +36,36 @@ class AssessmentCategory(models.Model):
     class Meta:
         verbose_name_plural = "Assessment Categories"
 
+class QuestionnaireQuerySet(models.QuerySet):
+    def for_enterprise(self, enterprise):
+        """
+        Questionnaires whose targeting matches `enterprise`, resolved in SQL
+        against QuestionnaireTarget. Same rules as Questionnaire.matches_enterprise:
+        a questionnaire with no target lists matches everyone, and an empty
+        list or unset employee bound does not restrict.
+        """
+        def dimension_matches(dimension, value):
+            targets = QuestionnaireTarget.objects.filter(
+                questionnaire=models.OuterRef('pk'), dimension=dimension,
+            )
+            return ~models.Exists(targets) | models.Exists(targets.filter(value=value))
+
+        untargeted = ~models.Exists(
+            QuestionnaireTarget.objects.filter(questionnaire=models.OuterRef('pk'))
+        )
+        employees = enterprise.number_of_employees
+        targeted_match = (
+            dimension_matches('sector', enterprise.sector)
+            & dimension_matches('management_structure', enterprise.management_structure)
+            & dimension_matches('district', enterprise.district)
+            & (models.Q(min_employees__isnull=True) | models.Q(min_employees=0)
+               | models.Q(min_employees__lte=employees))
+            & (models.Q(max_employees__isnull=True) | models.Q(max_employees=0)
+               | models.Q(max_employees__gte=employees))
+        )
+        return self.filter(untargeted | targeted_match)
+
+
 class Questionnaire(models.Model):
     LANGUAGES = (
         ('en', 'English'),
@@ -69,10 +99,25 @@ class Questionnaire(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = QuestionnaireQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.title} v{self.version} ({self.get_language_display()})"
     
+    def sync_targets(self):
+        """Rebuild the QuestionnaireTarget rows from the target_* JSON lists."""
+        rows = {
+            (dimension, str(value))
+            for dimension, field in QuestionnaireTarget.DIMENSION_FIELDS.items()
+            for value in getattr(self, field) or []
+        }
+        self.targets.all().delete()
+        QuestionnaireTarget.objects.bulk_create([
+            QuestionnaireTarget(questionnaire=self, dimension=dimension, value=value)
+            for dimension, value in rows
+        ])
+    
     def calculate_estimated_time(self):
         """Calculate estimated time based on number of questions (3 minutes per question)"""
         question_count = self.questions.count()
@@ -109,6 +154,39 @@ class Questionnaire(models.Model):
         
         return matches
 
+class QuestionnaireTarget(models.Model):
+    """
+    One row per value in a questionnaire's target_* lists, so eligibility can
+    be answered with indexed lookups (see QuestionnaireQuerySet.for_enterprise).
+    Maintained by assessments.signals whenever a questionnaire is saved.
+    """
+    DIMENSIONS = (
+        ('sector', 'Sector'),
+        ('management_structure', 'Management Structure'),
+        ('district', 'District'),
+    )
+
+    # dimension -> Questionnaire JSON field it mirrors
+    DIMENSION_FIELDS = {
+        'sector': 'target_sectors',
+        'management_structure': 'target_management_structures',
+        'district': 'target_districts',
+    }
+
+    questionnaire = models.ForeignKey(Questionnaire, on_delete=models.CASCADE, related_name='targets')
+    dimension = models.CharField(max_length=30, choices=DIMENSIONS)
+    value = models.CharField(max_length=100)
+
+    def __str__(self):
+        return f"{self.questionnaire_id}: {self.dimension}={self.value}"
+
+    class Meta:
+        unique_together = ['questionnaire', 'dimension', 'value']
+        indexes = [
+            models.Index(fields=['dimension', 'value']),
+        ]
+
+
 class Question(models.Model):
     QUESTION_TYPES = (
         ('multiple_choice', 'Multiple Choice'),
@@ -235,6 +313,9 @@ class AssessmentResponse(models.Model):
     
     def __str__(self):
         return f"{self.assessment} - Q{self.question.order}"
+    
+    class Meta:
+        unique_together = ['assessment', 'question']
 
 class CategoryScore(models.Model):
     assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE, related_name='category_scores')
@@ -245,6 +326,9 @@ class CategoryScore(models.Model):
     
     def __str__(self):
         return f"{self.assessment} - {self.category.name}: {self.percentage}%"
+    
+    class Meta:
+        unique_together = ['assessment', 'category']
 
 class Recommendation(models.Model):
     PRIORITY_LEVELS = (
@@ -268,3 +352,35 @@ class Recommendation(models.Model):
     
     def __str__(self):
         return f"{self.assessment} - {self.title}"
+
+class InsightCacheEntry(models.Model):
+    """Parsed AI insights keyed by a hash of the prompt inputs (see assessments.ai_cache)"""
+    key = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the normalized prompt context")
+    insights = models.JSONField()
+    hit_count = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Insights {self.key[:12]} ({self.hit_count} hits)"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_used_at']),
+            models.Index(fields=['expires_at']),
+        ]
+
+class InsightCacheStats(models.Model):
+    """Single row of running counters for the AI insight cache"""
+    hits = models.PositiveBigIntegerField(default=0)
+    misses = models.PositiveBigIntegerField(default=0)
+    evictions = models.PositiveBigIntegerField(default=0)
+    reset_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.hits} hits / {self.misses} misses"
+    
+    class Meta:
+        verbose_name_plural = 'Insight cache stats'
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Questionnaire, QuestionnaireTarget
+
+
+# Saves touching none of these leave QuestionnaireTarget untouched
+TARGET_FIELDS = set(QuestionnaireTarget.DIMENSION_FIELDS.values())
+
+
+@receiver(post_save, sender=Questionnaire)
+def sync_questionnaire_targets(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the eligibility index in step with the target_* lists."""
+    if update_fields is not None and not TARGET_FIELDS & set(update_fields):
+        return
+    if created and not any(getattr(instance, field) for field in TARGET_FIELDS):
+        return
+    instance.sync_targets()
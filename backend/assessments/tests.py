@@ -1,3 +1,553 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Job
+from enterprises.models import Enterprise
+from .ai_cache import cache_stats
+from .ai_utils import build_insights_context, generate_assessment_insights
+from .models import (
+    AssessmentCategory, Questionnaire, QuestionnaireTarget, Question, QuestionOption,
+    QuestionRecommendation, Assessment, AssessmentResponse, CategoryScore,
+    Recommendation, Service, InsightCacheEntry,
+)
+
+User = get_user_model()
+
+
+class FakeLLMClient:
+    """Stands in for GeminiClient; records prompts and returns canned insights."""
+    prompts = []
+    failures = 0
+
+    def generate(self, prompt):
+        FakeLLMClient.prompts.append(prompt)
+        if FakeLLMClient.failures:
+            FakeLLMClient.failures -= 1
+            raise ConnectionError('Gemini unavailable')
+        return '```json\n' + json.dumps({
+            'strengths': ['Finance is well managed'],
+            'weaknesses': ['Operations lack documented processes'],
+            'recommendations': [
+                {'title': 'Document processes', 'priority': 'high', 'category': 'Operations'},
+                {'title': 'Keep books current', 'priority': 'low', 'category': 'Finance'},
+            ],
+        }) + '\n```'
+
+
+class AssessmentFixtureMixin:
+    """A questionnaire split across two weighted categories, plus one enterprise."""
+
+    @classmethod
+    def create_assessment(cls, questions_per_category=3):
+        cls.admin = User.objects.create_user(
+            '+250711000001', 'admin@example.com', 'pass', user_type='admin',
+        )
+        owner = User.objects.create_user('+250711000002', 'owner@example.com', 'pass')
+        cls.enterprise = Enterprise.objects.create(
+            user=owner,
+            business_name='Scoring Ltd',
+            tin_number='SCORE001',
+            enterprise_type='limited_company',
+            sector='technology',
+            district='Gasabo',
+            phone='+250711000002',
+            year_established=2020,
+            number_of_employees=5,
+        )
+        cls.finance = AssessmentCategory.objects.create(
+            name='Finance', description='', weight=Decimal('2.0'),
+        )
+        cls.operations = AssessmentCategory.objects.create(
+            name='Operations', description='', weight=Decimal('1.0'),
+        )
+        cls.questionnaire = Questionnaire.objects.create(
+            title='Readiness', description='', created_by=cls.admin,
+        )
+        order = 0
+        cls.questions = []
+        for category in (cls.finance, cls.operations):
+            for _ in range(questions_per_category):
+                order += 1
+                question = Question.objects.create(
+                    questionnaire=cls.questionnaire,
+                    category=category,
+                    text=f'Question {order}',
+                    question_type='single_choice',
+                    order=order,
+                    max_score=10,
+                )
+                for score in (0, 5, 10):
+                    QuestionOption.objects.create(question=question, text=str(score), score=score)
+                cls.questions.append(question)
+        cls.assessment = Assessment.objects.create(
+            enterprise=cls.enterprise,
+            questionnaire=cls.questionnaire,
+            fiscal_year=2026,
+            status='in_progress',
+        )
+
+
+class AssessmentScoringTests(AssessmentFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_assessment()
+        # Finance answers 10 on every question, operations 5
+        for question in cls.questions:
+            AssessmentResponse.objects.create(
+                assessment=cls.assessment,
+                question=question,
+                score=10 if question.category == cls.finance else 5,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def regrade(self):
+        return self.client.post(f'/api/assessments/api/assessments/{self.assessment.pk}/regrade/')
+
+    def test_category_and_weighted_totals(self):
+        self.assertEqual(self.regrade().status_code, 200)
+
+        scores = {s.category_id: s for s in CategoryScore.objects.filter(assessment=self.assessment)}
+        self.assertEqual(scores[self.finance.pk].score, 30)
+        self.assertEqual(scores[self.finance.pk].max_score, 30)
+        self.assertEqual(scores[self.finance.pk].percentage, 100)
+        self.assertEqual(scores[self.operations.pk].score, 15)
+        self.assertEqual(scores[self.operations.pk].percentage, 50)
+
+        self.assessment.refresh_from_db()
+        # (30*2 + 15*1) / (30*2 + 30*1)
+        self.assertEqual(self.assessment.total_score, 75)
+        self.assertEqual(self.assessment.max_possible_score, 90)
+        self.assertEqual(self.assessment.percentage_score, Decimal('83.33'))
+
+    def test_regrade_updates_existing_category_scores(self):
+        self.regrade()
+        AssessmentResponse.objects.filter(question__category=self.operations).update(score=10)
+        self.regrade()
+
+        self.assertEqual(CategoryScore.objects.filter(assessment=self.assessment).count(), 2)
+        self.assertEqual(
+            CategoryScore.objects.get(assessment=self.assessment, category=self.operations).percentage,
+            100,
+        )
+
+    def test_inactive_categories_are_skipped(self):
+        AssessmentCategory.objects.filter(pk=self.operations.pk).update(is_active=False)
+        self.regrade()
+
+        self.assertFalse(
+            CategoryScore.objects.filter(assessment=self.assessment, category=self.operations).exists()
+        )
+        self.assessment.refresh_from_db()
+        self.assertEqual(self.assessment.percentage_score, 100)
+
+    def test_query_count_does_not_grow_with_responses(self):
+        # lookup, grouped aggregate, category upsert, assessment save
+        with self.assertNumQueries(4):
+            self.regrade()
+
+
+class AssessmentSubmitTests(AssessmentFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_assessment(questions_per_category=5)
+        cls.service = Service.objects.create(name='Bookkeeping clinic')
+        for question in cls.questions:
+            AssessmentResponse.objects.create(
+                assessment=cls.assessment,
+                question=question,
+                score=10 if question.category == cls.finance else 5,
+            )
+            rec = QuestionRecommendation.objects.create(
+                question=question, min_score=0, max_score=5, recommendation_text='Tighten this up',
+            )
+            rec.recommended_services.add(cls.service)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.enterprise.user)
+
+    def submit(self):
+        return self.client.post(f'/api/assessments/api/assessments/{self.assessment.pk}/submit/')
+
+    def test_submit_scores_and_recommends(self):
+        self.assertEqual(self.submit().status_code, 200)
+
+        self.assessment.refresh_from_db()
+        self.assertEqual(self.assessment.status, 'completed')
+        # Only the five operations answers fall inside the 0-5 recommendation band;
+        # finance scored 100% and gets a category-level "maintain" recommendation
+        recommendations = Recommendation.objects.filter(assessment=self.assessment)
+        self.assertEqual(recommendations.filter(category=self.operations).count(), 5)
+        self.assertEqual(recommendations.filter(category=self.finance, priority='low').count(), 1)
+        for rec in recommendations.filter(category=self.operations):
+            self.assertEqual(list(rec.recommended_services.all()), [self.service])
+
+    def test_submit_query_count_is_constant(self):
+        # 13, plus 10 moving the assessment between the daily and monthly status rollups
+        with self.assertNumQueries(23):
+            self.submit()
+
+
+class SaveResponsesTests(AssessmentFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_assessment()
+        cls.choice, cls.multi = cls.questions[0], cls.questions[1]
+        Question.objects.filter(pk=cls.multi.pk).update(question_type='multiple_choice')
+        cls.number, cls.scale, cls.text = cls.questions[2], cls.questions[3], cls.questions[4]
+        Question.objects.filter(pk=cls.number.pk).update(question_type='number')
+        Question.objects.filter(pk=cls.scale.pk).update(question_type='scale')
+        Question.objects.filter(pk=cls.text.pk).update(question_type='text')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.enterprise.user)
+
+    def option(self, question, score):
+        return question.options.get(score=score).pk
+
+    def save(self, responses):
+        return self.client.post(
+            f'/api/assessments/api/assessments/{self.assessment.pk}/save_responses/',
+            {'responses': responses},
+            format='json',
+        )
+
+    def page(self):
+        return [
+            {'question': self.choice.pk, 'value': self.option(self.choice, 5)},
+            {'question': self.multi.pk, 'value': [self.option(self.multi, 5), self.option(self.multi, 10)]},
+            {'question': self.number.pk, 'value': '7'},
+            {'question': self.scale.pk, 'value': 5},
+            {'question': self.text.pk, 'value': 'We keep monthly accounts'},
+        ]
+
+    def response(self, question):
+        return AssessmentResponse.objects.get(assessment=self.assessment, question=question)
+
+    def test_scores_each_question_type(self):
+        result = self.save(self.page())
+
+        self.assertEqual(result.json()['count'], 5)
+        self.assertEqual(self.response(self.choice).score, 5)
+        self.assertEqual(self.response(self.multi).score, 15)
+        self.assertEqual(
+            set(self.response(self.multi).selected_options.values_list('score', flat=True)), {5, 10},
+        )
+        self.assertEqual(self.response(self.number).score, 7)
+        self.assertEqual(self.response(self.scale).score, 5)  # 5/10 of max_score 10
+        self.assertEqual(self.response(self.text).text_response, 'We keep monthly accounts')
+        self.assessment.refresh_from_db()
+        self.assertEqual(self.assessment.status, 'in_progress')
+
+    def test_resave_replaces_selections_and_keeps_other_columns(self):
+        self.save(self.page())
+        AssessmentResponse.objects.filter(pk=self.response(self.choice).pk).update(text_response='note')
+
+        self.save([
+            {'question': self.choice.pk, 'value': self.option(self.choice, 10)},
+            {'question': self.multi.pk, 'value': []},
+        ])
+
+        choice = self.response(self.choice)
+        self.assertEqual(choice.score, 10)
+        self.assertEqual(list(choice.selected_options.values_list('score', flat=True)), [10])
+        self.assertEqual(choice.text_response, 'note')
+        self.assertEqual(self.response(self.multi).score, 0)
+        self.assertFalse(self.response(self.multi).selected_options.exists())
+        self.assertEqual(AssessmentResponse.objects.filter(assessment=self.assessment).count(), 5)
+
+    def test_ignores_unknown_questions_and_foreign_options(self):
+        result = self.save([
+            {'question': 999999, 'value': 'x'},
+            {'question': self.choice.pk, 'value': self.option(self.multi, 10)},
+        ])
+
+        self.assertEqual(result.json()['count'], 1)
+        self.assertEqual(self.response(self.choice).score, 0)
+        self.assertFalse(self.response(self.choice).selected_options.exists())
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        page = self.page()
+        self.save(page)
+        # lookup, questions, options, savepoint, three upserts, response ids,
+        # through delete, through insert, release
+        with self.assertNumQueries(11):
+            self.save(page)
+
+
+class QuestionnaireEligibilityTests(AssessmentFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_assessment(questions_per_category=1)
+        # Enterprise: technology, owner_managed, Gasabo, 5 employees
+        targeting = {
+            'open': {},
+            'sector_hit': {'target_sectors': ['technology', 'retail']},
+            'sector_miss': {'target_sectors': ['agriculture']},
+            'district_hit': {'target_districts': ['Gasabo']},
+            'combined_miss': {'target_sectors': ['technology'], 'target_districts': ['Huye']},
+            'structure_hit': {'target_management_structures': ['owner_managed']},
+            'too_small': {'target_sectors': ['technology'], 'min_employees': 10},
+            'size_fits': {'target_sectors': ['technology'], 'min_employees': 1, 'max_employees': 5},
+            'too_big': {'target_sectors': ['technology'], 'max_employees': 4},
+            # No target lists: employee bounds are ignored, as matches_enterprise does
+            'bounds_only': {'min_employees': 100},
+        }
+        cls.questionnaires = {
+            name: Questionnaire.objects.create(
+                title=name, description='', created_by=cls.admin, **fields,
+            )
+            for name, fields in targeting.items()
+        }
+
+    def eligible(self):
+        return set(
+            Questionnaire.objects.filter(pk__in=[q.pk for q in self.questionnaires.values()])
+            .for_enterprise(self.enterprise)
+            .values_list('title', flat=True)
+        )
+
+    def test_matches_python_rules(self):
+        expected = {
+            name for name, questionnaire in self.questionnaires.items()
+            if questionnaire.matches_enterprise(self.enterprise)
+        }
+        self.assertEqual(self.eligible(), expected)
+        self.assertEqual(
+            expected,
+            {'open', 'sector_hit', 'district_hit', 'structure_hit', 'size_fits', 'bounds_only'},
+        )
+
+    def test_index_follows_edits(self):
+        questionnaire = self.questionnaires['sector_miss']
+        questionnaire.target_sectors = ['technology']
+        questionnaire.save()
+        self.assertIn('sector_miss', self.eligible())
+
+        questionnaire.target_sectors = []
+        questionnaire.target_districts = ['Huye']
+        questionnaire.save(update_fields=['target_sectors', 'target_districts'])
+        self.assertNotIn('sector_miss', self.eligible())
+        self.assertEqual(
+            list(questionnaire.targets.values_list('dimension', 'value')), [('district', 'Huye')],
+        )
+
+    def test_unrelated_saves_skip_the_index(self):
+        questionnaire = self.questionnaires['sector_hit']
+        with self.assertNumQueries(1):
+            questionnaire.save(update_fields=['title'])
+        self.assertEqual(QuestionnaireTarget.objects.filter(questionnaire=questionnaire).count(), 2)
+
+    def test_enterprise_listing_uses_the_index(self):
+        client = APIClient()
+        client.force_authenticate(self.enterprise.user)
+        titles = {
+            row['title'] for row in
+            client.get('/api/assessments/api/questionnaires/').json()['results']
+        }
+        # The fixture questionnaire has no targeting either
+        self.assertEqual(titles, self.eligible() | {'Readiness'})
+
+
+@override_settings(AI_INSIGHTS_CLIENT='assessments.tests.FakeLLMClient', JOB_RETRY_BACKOFF_SECONDS=0)
+class GenerateInsightsJobTests(AssessmentFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_assessment()
+        cls.assessment.status = 'completed'
+        cls.assessment.save()
+
+    def setUp(self):
+        FakeLLMClient.prompts = []
+        FakeLLMClient.failures = 0
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def generate(self):
+        return self.client.post(
+            f'/api/assessments/api/assessments/{self.assessment.pk}/generate_insights/'
+        )
+
+    def test_endpoint_queues_job_without_calling_llm(self):
+        response = self.generate()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(FakeLLMClient.prompts, [])
+        job = Job.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(job.payload, {'assessment_id': self.assessment.pk, 'refresh': False})
+        # Asking again while the job is pending does not queue a second one
+        self.assertEqual(self.generate().data['job_id'], response.data['job_id'])
+
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(status_response.data['status'], 'queued')
+
+    def test_worker_stores_insights(self):
+        job_id = self.generate().data['job_id']
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+
+        job = Job.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result['recommendations'], 2)
+        self.assertEqual(len(FakeLLMClient.prompts), 1)
+        self.assertIn('Scoring Ltd', FakeLLMClient.prompts[0])
+
+        self.assessment.refresh_from_db()
+        self.assertEqual(self.assessment.ai_strengths, ['Finance is well managed'])
+        self.assertIsNotNone(self.assessment.ai_generated_at)
+        recommendations = Recommendation.objects.filter(assessment=self.assessment)
+        self.assertEqual(recommendations.get(title='Document processes').category, self.operations)
+
+    def test_llm_errors_are_retried(self):
+        FakeLLMClient.failures = 1
+        job_id = self.generate().data['job_id']
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+
+        job = Job.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(len(FakeLLMClient.prompts), 2)
+
+    def test_requires_completed_assessment(self):
+        Assessment.objects.filter(pk=self.assessment.pk).update(status='in_progress')
+
+        self.assertEqual(self.generate().status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(
+    AI_INSIGHTS_CLIENT='assessments.tests.FakeLLMClient',
+    AI_INSIGHTS_CACHE_TTL=3600,
+    AI_INSIGHTS_CACHE_MAX_ENTRIES=2,
+)
+class InsightCacheTests(AssessmentFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_assessment()
+        for question in cls.questions:
+            AssessmentResponse.objects.create(assessment=cls.assessment, question=question, score=5)
+        CategoryScore.objects.create(
+            assessment=cls.assessment, category=cls.finance,
+            score=15, max_score=30, percentage=50,
+        )
+
+    def setUp(self):
+        FakeLLMClient.prompts = []
+        FakeLLMClient.failures = 0
+
+    def generate(self, **kwargs):
+        return generate_assessment_insights(self.assessment, self.enterprise, **kwargs)
+
+    def test_unchanged_inputs_are_served_from_cache(self):
+        first = self.generate()
+        second = self.generate()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(FakeLLMClient.prompts), 1)
+        stats = cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        self.assertEqual(InsightCacheEntry.objects.get().hit_count, 1)
+
+    def test_changed_responses_miss(self):
+        self.generate()
+        AssessmentResponse.objects.filter(assessment=self.assessment, question=self.questions[0]).update(score=10)
+
+        self.generate()
+
+        self.assertEqual(len(FakeLLMClient.prompts), 2)
+        self.assertEqual(cache_stats()['misses'], 2)
+
+    def test_refresh_bypasses_cache(self):
+        self.generate()
+        self.generate(use_cache=False)
+
+        self.assertEqual(len(FakeLLMClient.prompts), 2)
+        self.assertEqual(InsightCacheEntry.objects.count(), 1)
+
+    def test_expired_entries_miss(self):
+        self.generate()
+        InsightCacheEntry.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.generate()
+
+        self.assertEqual(len(FakeLLMClient.prompts), 2)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for score in (1, 2, 3):
+            CategoryScore.objects.filter(assessment=self.assessment).update(score=score)
+            self.generate()
+            InsightCacheEntry.objects.update(last_used_at=F('last_used_at') - timedelta(minutes=1))
+
+        self.assertEqual(InsightCacheEntry.objects.count(), 2)
+        self.assertEqual(cache_stats()['evictions'], 1)
+        # The first (least recently used) entry is gone
+        CategoryScore.objects.filter(assessment=self.assessment).update(score=1)
+        self.generate()
+        self.assertEqual(len(FakeLLMClient.prompts), 4)
+
+
+class InsightContextTests(AssessmentFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_assessment(questions_per_category=12)
+        # Finance answers are all middling except the last two; operations
+        # answers alternate between full marks and zero
+        for n, question in enumerate(cls.questions):
+            if question.category == cls.finance:
+                score = 0 if n >= 10 else 5
+            else:
+                score = 10 if n % 2 else 0
+            response = AssessmentResponse.objects.create(
+                assessment=cls.assessment, question=question, score=score,
+            )
+            response.selected_options.add(question.options.get(score=score))
+        for category in (cls.finance, cls.operations):
+            CategoryScore.objects.create(
+                assessment=cls.assessment, category=category,
+                score=60, max_score=120, percentage=50,
+            )
+
+    def test_context_is_built_in_three_queries(self):
+        with self.assertNumQueries(3):
+            context = build_insights_context(self.assessment, self.enterprise)
+
+        self.assertEqual([item['category'] for item in context['category_scores']], ['Finance', 'Operations'])
+        self.assertEqual(len(context['responses']), 15)
+        self.assertEqual(context['responses'][0]['answer'], ['5'])
+
+    def test_most_informative_responses_are_selected(self):
+        context = build_insights_context(self.assessment, self.enterprise)
+        questions = [item['question'] for item in context['responses']]
+
+        # Both clear finance gaps make the cut despite coming last
+        self.assertIn('Question 11', questions)
+        self.assertIn('Question 12', questions)
+        # Categories take turns: every operations answer is extreme, but
+        # finance still gets seven of the fifteen slots
+        finance = [item for item in context['responses'] if item['category'] == 'Finance']
+        self.assertEqual(len(finance), 7)
+        # Presented in questionnaire order
+        self.assertEqual(questions, sorted(questions, key=lambda text: int(text.split()[-1])))
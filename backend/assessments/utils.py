@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.db.models import Avg, Q
 
 
@@ -20,3 +21,98 @@ def get_enterprise_readiness_score(enterprise):
 
     result = qs.aggregate(avg=Avg('percentage_score'))['avg']
     return float(result or 0)
+
+
+CHOICE_QUESTION_TYPES = ('single_choice', 'multiple_choice')
+NUMERIC_QUESTION_TYPES = ('number', 'scale')
+
+
+def save_assessment_responses(assessment, responses_data):
+    """
+    Upsert a page of answers ([{question, value}, ...]) for `assessment`.
+
+    Questions and options are loaded once and scores computed in memory.
+    Responses are written with one upsert per question kind, so an answer only
+    overwrites the column its question type uses, and selected options are
+    rewritten through the M2M table in bulk. Entries naming an unknown
+    question are skipped; when a question appears twice the last entry wins.
+    Returns the number of responses written.
+    """
+    from .models import Question, QuestionOption, AssessmentResponse
+
+    answers = {}
+    saved = 0
+    for response_data in responses_data:
+        question_id = response_data.get('question')
+        if question_id:
+            answers[str(question_id)] = response_data.get('value')
+
+    questions = Question.objects.in_bulk(
+        [question_id for question_id in answers if question_id.isdigit()]
+    )
+    # option id -> (question id, score) for every option of every answered question
+    option_scores = {
+        option_id: (question_id, score)
+        for option_id, question_id, score in QuestionOption.objects.filter(
+            question_id__in=questions
+        ).values_list('id', 'question_id', 'score')
+    }
+
+    # One upsert per set of columns so other columns keep their stored values
+    rows = {'score': [], 'number_response': [], 'text_response': []}
+    selected = {}
+    for question_id, value in answers.items():
+        question = questions.get(int(question_id)) if question_id.isdigit() else None
+        if question is None:
+            continue
+        response = AssessmentResponse(assessment=assessment, question=question)
+
+        if question.question_type in CHOICE_QUESTION_TYPES:
+            values = value if isinstance(value, list) else [value] if value else []
+            option_ids = [
+                int(option_id) for option_id in values
+                if str(option_id).isdigit()
+                and option_scores.get(int(option_id), (None,))[0] == question.pk
+            ]
+            selected[question.pk] = option_ids
+            response.score = sum(option_scores[option_id][1] for option_id in option_ids)
+            rows['score'].append(response)
+        elif question.question_type in NUMERIC_QUESTION_TYPES:
+            response.number_response = value
+            if question.question_type == 'number':
+                response.score = float(value) if value else 0
+            else:
+                # Scale score is proportional (value/10 * max_score)
+                response.score = (float(value) / 10) * question.max_score if value else 0
+            rows['number_response'].append(response)
+        else:  # text, file_upload
+            response.text_response = value
+            response.score = 0  # Manual scoring needed
+            rows['text_response'].append(response)
+
+    with transaction.atomic():
+        for column, responses in rows.items():
+            update_fields = ['score'] if column == 'score' else [column, 'score']
+            AssessmentResponse.objects.bulk_create(
+                responses,
+                update_conflicts=True,
+                unique_fields=['assessment', 'question'],
+                update_fields=update_fields,
+            )
+            saved += len(responses)
+
+        if selected:
+            response_ids = dict(
+                AssessmentResponse.objects.filter(
+                    assessment=assessment, question_id__in=selected,
+                ).values_list('question_id', 'id')
+            )
+            through = AssessmentResponse.selected_options.through
+            through.objects.filter(assessmentresponse_id__in=response_ids.values()).delete()
+            through.objects.bulk_create([
+                through(assessmentresponse_id=response_ids[question_id], questionoption_id=option_id)
+                for question_id, option_ids in selected.items()
+                for option_id in set(option_ids)
+            ])
+
+    return saved
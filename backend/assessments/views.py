@@ -1,12 +1,16 @@
 from rest_framework import viewsets, permissions, status, serializers as drf_serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.db.models import Sum, Prefetch
 from .models import *
 from .serializers import *
 from enterprises.models import Enterprise
-from .ai_utils import generate_assessment_insights
+from core.jobs import enqueue
+from .jobs import GENERATE_INSIGHTS
+from .utils import save_assessment_responses
 
 class AssessmentCategoryViewSet(viewsets.ModelViewSet):
     queryset = AssessmentCategory.objects.all()
@@ -131,11 +135,8 @@ class QuestionnaireViewSet(viewsets.ModelViewSet):
         if user.user_type == 'enterprise':
             try:
                 enterprise = user.enterprise
-                # Filter questionnaires that match this enterprise
-                matching_questionnaires = [
-                    q.id for q in queryset if q.matches_enterprise(enterprise)
-                ]
-                queryset = queryset.filter(id__in=matching_questionnaires)
+                # Filter questionnaires that match this enterprise (QuestionnaireTarget index)
+                queryset = queryset.for_enterprise(enterprise)
             except Enterprise.DoesNotExist:
                 pass
         
@@ -236,51 +237,11 @@ class AssessmentViewSet(viewsets.ModelViewSet):
             assessment.started_at = timezone.now()
             assessment.save()
         
-        saved_responses = []
-        for response_data in responses_data:
-            question_id = response_data.get('question')
-            value = response_data.get('value')
-            
-            if not question_id:
-                continue
-            
-            # Get or create response
-            response, created = AssessmentResponse.objects.get_or_create(
-                assessment=assessment,
-                question_id=question_id,
-                defaults={'score': 0}
-            )
-            
-            # Handle different question types
-            question = response.question
-            
-            if question.question_type in ['single_choice', 'multiple_choice']:
-                # Clear existing selections
-                response.selected_options.clear()
-                # Add new selections
-                if isinstance(value, list):
-                    response.selected_options.set(value)
-                elif value:
-                    response.selected_options.add(value)
-                # Calculate score from selected options
-                response.score = sum(opt.score for opt in response.selected_options.all())
-            elif question.question_type == 'number':
-                response.number_response = value
-                response.score = float(value) if value else 0
-            elif question.question_type == 'scale':
-                response.number_response = value
-                # Scale score is proportional (value/10 * max_score)
-                response.score = (float(value) / 10) * question.max_score if value else 0
-            else:  # text, file_upload
-                response.text_response = value
-                response.score = 0  # Manual scoring needed
-            
-            response.save()
-            saved_responses.append(response)
+        saved_count = save_assessment_responses(assessment, responses_data)
         
         return Response({
-            'message': f'Saved {len(saved_responses)} responses successfully',
-            'count': len(saved_responses)
+            'message': f'Saved {saved_count} responses successfully',
+            'count': saved_count
         })
     
     @action(detail=True, methods=['post'])
@@ -336,7 +297,7 @@ class AssessmentViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def generate_insights(self, request, pk=None):
-        """Generate or regenerate AI insights for an assessment"""
+        """Generate or regenerate AI insights for an assessment. Pass refresh=true to bypass the insight cache."""
         if request.user.user_type not in ['admin', 'superadmin']:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
@@ -348,14 +309,25 @@ class AssessmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            self._generate_ai_insights(assessment)
-            return Response({'message': 'AI insights generated successfully'})
-        except Exception as e:
-            return Response(
-                {'error': f'Failed to generate insights: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Gemini can take many seconds; a run_jobs worker does the call
+        job = enqueue(
+            GENERATE_INSIGHTS,
+            {
+                'assessment_id': assessment.pk,
+                'refresh': str(request.data.get('refresh', '')).lower() in ['true', '1'],
+            },
+            user=request.user,
+            dedupe_key=f'{GENERATE_INSIGHTS}:{assessment.pk}',
+        )
+        return Response(
+            {
+                'message': 'AI insight generation queued',
+                'job_id': str(job.pk),
+                'status': job.status,
+                'status_url': reverse('job-detail', args=[job.pk], request=request),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
     
     @action(detail=True, methods=['patch'])
     def update_insights(self, request, pk=None):
@@ -382,36 +354,41 @@ class AssessmentViewSet(viewsets.ModelViewSet):
         total_score = 0
         max_possible_score = 0
         
-        # Calculate category scores
-        categories = AssessmentCategory.objects.filter(is_active=True)
-        for category in categories:
-            category_score = 0
-            category_max_score = 0
+        # One grouped query: response score and question max score per active category
+        category_totals = (
+            assessment.responses
+            .filter(question__category__is_active=True)
+            .values('question__category', 'question__category__weight')
+            .annotate(score=Sum('score'), max_score=Sum('question__max_score'))
+            .order_by()
+        )
+        
+        category_scores = []
+        for row in category_totals:
+            category_score = row['score'] or 0
+            category_max_score = row['max_score'] or 0
+            if category_max_score <= 0:
+                continue
             
-            responses = assessment.responses.filter(question__category=category)
-            for response in responses:
-                category_score += response.score
-                category_max_score += response.question.max_score
+            category_scores.append(CategoryScore(
+                assessment=assessment,
+                category_id=row['question__category'],
+                score=category_score,
+                max_score=category_max_score,
+                percentage=(category_score / category_max_score) * 100,
+            ))
             
-            if category_max_score > 0:
-                category_percentage = (category_score / category_max_score) * 100
-                
-                CategoryScore.objects.update_or_create(
-                    assessment=assessment,
-                    category=category,
-                    defaults={
-                        'score': category_score,
-                        'max_score': category_max_score,
-                        'percentage': category_percentage
-                    }
-                )
-                
-                # Weight the scores
-                weighted_score = category_score * category.weight
-                weighted_max_score = category_max_score * category.weight
-                
-                total_score += weighted_score
-                max_possible_score += weighted_max_score
+            # Weight the scores
+            weight = row['question__category__weight']
+            total_score += category_score * weight
+            max_possible_score += category_max_score * weight
+        
+        CategoryScore.objects.bulk_create(
+            category_scores,
+            update_conflicts=True,
+            unique_fields=['assessment', 'category'],
+            update_fields=['score', 'max_score', 'percentage'],
+        )
         
         if max_possible_score > 0:
             percentage_score = (total_score / max_possible_score) * 100
@@ -423,60 +400,32 @@ class AssessmentViewSet(viewsets.ModelViewSet):
         assessment.percentage_score = percentage_score
         assessment.save()
     
-    def _generate_ai_insights(self, assessment):
-        """Generate AI-powered insights using Gemini"""
-        try:
-            # Generate insights using Gemini AI
-            insights = generate_assessment_insights(assessment, assessment.enterprise)
-            
-            # Store strengths and weaknesses
-            assessment.ai_strengths = insights.get('strengths', [])
-            assessment.ai_weaknesses = insights.get('weaknesses', [])
-            assessment.ai_generated_at = timezone.now()
-            assessment.save()
-            
-            # Clear existing recommendations
-            assessment.recommendations.all().delete()
-            
-            # Create recommendations from AI insights
-            for rec_data in insights.get('recommendations', []):
-                # Find the category by name, or use a default
-                category = None
-                if 'category' in rec_data:
-                    category = AssessmentCategory.objects.filter(
-                        name__icontains=rec_data['category']
-                    ).first()
-                
-                # If no category found, try to match from category scores
-                if not category:
-                    category_scores = assessment.category_scores.all()
-                    if category_scores:
-                        category = category_scores[0].category
-                
-                Recommendation.objects.create(
-                    assessment=assessment,
-                    category=category,
-                    title=rec_data.get('title', 'Recommendation'),
-                    description=rec_data.get('description', ''),
-                    priority=rec_data.get('priority', 'medium'),
-                    suggested_actions=rec_data.get('suggested_actions', '')
-                )
-        except Exception as e:
-            print(f"Error generating AI insights: {str(e)}")
-            raise
-    
     def _generate_recommendations(self, assessment):
         """Generate basic recommendations based on assessment scores (fallback)"""
-        # First, collect question-level conditional recommendations
-        responses = assessment.responses.select_related('question').all()
+        # First, collect question-level conditional recommendations; every
+        # question's recommendations and active services arrive in two prefetches
+        responses = assessment.responses.select_related('question__category').prefetch_related(
+            Prefetch(
+                'question__conditional_recommendations',
+                queryset=QuestionRecommendation.objects.prefetch_related(
+                    Prefetch(
+                        'recommended_services',
+                        queryset=Service.objects.filter(is_active=True),
+                        to_attr='active_services',
+                    )
+                ),
+            )
+        )
+        enterprise_user = assessment.enterprise.user
+        language = enterprise_user.language if hasattr(enterprise_user, 'language') else 'en'
         question_recommendations = []
         
         for response in responses:
             # Check if this question has conditional recommendations
-            conditional_recs = response.question.conditional_recommendations.filter(
-                min_score__lte=response.score,
-                max_score__gte=response.score
-            ).prefetch_related('recommended_services')
+            conditional_recs = [
+                rec for rec in response.question.conditional_recommendations.all()
+                if rec.min_score <= response.score <= rec.max_score
+            ]
             
             for rec in conditional_recs:
                 # Get the question's category for proper categorization
@@ -485,15 +434,15 @@ class AssessmentViewSet(viewsets.ModelViewSet):
                     question_recommendations.append({
                         'category': category,
                         'title': f"Improve: {response.question.text[:50]}...",
-                        'description': rec.get_text(assessment.enterprise.user.language if hasattr(assessment.enterprise.user, 'language') else 'en'),
+                        'description': rec.get_text(language),
                         'priority': 'high' if response.score < 50 else 'medium',
                         'suggested_actions': rec.recommendation_text,
                         'source': 'question',
-                        'services': list(rec.recommended_services.filter(is_active=True)),
+                        'services': rec.active_services,
                     })
         
         # Then add category-level recommendations
-        category_scores = assessment.category_scores.all()
+        category_scores = assessment.category_scores.select_related('category')
         
         for category_score in category_scores:
             # Skip if we already have question-level recommendations for this category
@@ -536,8 +485,8 @@ class AssessmentViewSet(viewsets.ModelViewSet):
             })
         
         # Create Recommendation objects from collected data
-        for rec_data in question_recommendations:
-            rec_obj = Recommendation.objects.create(
+        rec_objs = Recommendation.objects.bulk_create([
+            Recommendation(
                 assessment=assessment,
                 category=rec_data['category'],
                 title=rec_data['title'],
@@ -545,9 +494,14 @@ class AssessmentViewSet(viewsets.ModelViewSet):
                 priority=rec_data['priority'],
                 suggested_actions=rec_data['suggested_actions']
             )
-            # Link recommended services
-            if rec_data.get('services'):
-                rec_obj.recommended_services.set(rec_data['services'])
+            for rec_data in question_recommendations
+        ])
+        # Link recommended services
+        Recommendation.recommended_services.through.objects.bulk_create([
+            Recommendation.recommended_services.through(recommendation_id=rec_obj.pk, service_id=service.pk)
+            for rec_obj, rec_data in zip(rec_objs, question_recommendations)
+            for service in rec_data.get('services') or []
+        ])
 
 class AssessmentResponseViewSet(viewsets.ModelViewSet):
     queryset = AssessmentResponse.objects.all()
@@ -17,7 +17,13 @@ class CampaignAdmin(admin.ModelAdmin):
     target_partners_count.short_description = 'Targeted Partners'
     
     def approve_campaigns(self, request, queryset):
-        queryset.update(status='active')
+        from admin_dashboard.metrics import update_with_metrics
+        from investors.matching import refresh_match_scores
+        # A queryset update sends no post_save, so move the dashboard rollups
+        # and rescore here (see admin_dashboard.signals, investors.signals)
+        campaign_ids = list(queryset.values_list('pk', flat=True))
+        update_with_metrics(queryset, status='active')
+        refresh_match_scores(campaign_ids=campaign_ids)
     approve_campaigns.short_description = "Approve selected campaigns"
     
     def vet_campaigns(self, request, queryset):
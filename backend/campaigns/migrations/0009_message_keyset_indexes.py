@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0008_campaigninterest_enterprise_decision_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='campaignmessage',
+            index=models.Index(fields=['sender', 'created_at'], name='campaigns_c_sender__c904ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaignmessage',
+            index=models.Index(fields=['receiver', 'created_at'], name='campaigns_c_receive_c864e3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaignmessage',
+            index=models.Index(fields=['campaign', 'created_at'], name='campaigns_c_campaig_e4ff0e_idx'),
+        ),
+    ]
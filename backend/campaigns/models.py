@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from enterprises.models import Enterprise
 import uuid
@@ -6,6 +7,38 @@ import uuid
 User = get_user_model()
 
 
+def _related_count(model, field='campaign'):
+    """Correlated COUNT(*) of `model` rows pointing at the outer campaign."""
+    rows = (
+        model.objects.filter(**{field: models.OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=models.Count('pk'))
+        .values('total')
+    )
+    return Coalesce(models.Subquery(rows, output_field=models.IntegerField()), 0)
+
+
+class CampaignQuerySet(models.QuerySet):
+    def with_list_stats(self):
+        """
+        Everything CampaignSerializer reads beyond the campaign row itself:
+        the enterprise join, document/interest/target partner counts as
+        annotations and the targeted partners in one batched prefetch.
+        """
+        from investors.models import Investor
+        return self.select_related('enterprise').annotate(
+            documents_total=_related_count(CampaignDocument),
+            interests_total=_related_count(CampaignInterest),
+            target_partners_total=_related_count(self.model.target_partners.through),
+        ).prefetch_related(
+            models.Prefetch(
+                'target_partners',
+                queryset=Investor.objects.only('id', 'organization_name'),
+            )
+        )
+
+
 class Campaign(models.Model):
     """Funding Applications by SMEs"""
     STATUS_CHOICES = (
@@ -80,6 +113,8 @@ class Campaign(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CampaignQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} - {self.enterprise.business_name}"
 
@@ -188,6 +223,12 @@ class CampaignMessage(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of a user's threads
+            models.Index(fields=['sender', 'created_at']),
+            models.Index(fields=['receiver', 'created_at']),
+            models.Index(fields=['campaign', 'created_at']),
+        ]
 
 
 class CampaignPartnerApplication(models.Model):
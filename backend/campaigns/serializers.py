@@ -51,16 +51,25 @@ class CampaignSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at', 'vetted_by', 'vetted_at']
     
+    # Campaign.objects.with_list_stats() supplies the counts and partners below;
+    # the fallbacks only query when a campaign is serialized on its own.
+
     def get_target_partners_count(self, obj):
+        if hasattr(obj, 'target_partners_total'):
+            return obj.target_partners_total
         return obj.target_partners.count()
     
     def get_targeted_partner_names(self, obj):
-        return list(obj.target_partners.values_list('organization_name', flat=True))
+        return [partner.organization_name for partner in obj.target_partners.all()]
     
     def get_documents_count(self, obj):
+        if hasattr(obj, 'documents_total'):
+            return obj.documents_total
         return obj.documents.count()
     
     def get_interests_count(self, obj):
+        if hasattr(obj, 'interests_total'):
+            return obj.interests_total
         return obj.interests.count()
     
     def get_progress_percentage(self, obj):
@@ -109,12 +118,12 @@ class CampaignCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
     
     def create(self, validated_data):
-        user = self.context['request'].user
-        if not hasattr(user, 'enterprise'):
+        enterprise = self.context['request'].principal.enterprise
+        if enterprise is None:
             raise serializers.ValidationError("User must have an enterprise to create a campaign")
         
         target_partners = validated_data.pop('target_partners', [])
-        validated_data['enterprise'] = user.enterprise
+        validated_data['enterprise'] = enterprise
         campaign = super().create(validated_data)
         
         if target_partners:
@@ -176,8 +185,8 @@ class CampaignPartnerApplicationDetailSerializer(serializers.ModelSerializer):
 
     def get_funding_form_data(self, obj):
         if obj.funding_form:
-            from investors.serializers import PartnerFundingFormSerializer
-            return PartnerFundingFormSerializer(obj.funding_form).data
+            from investors.serializers import CompiledFundingFormSerializer
+            return CompiledFundingFormSerializer(obj.funding_form).data
         return None
 
     def get_structured_responses(self, obj):
@@ -188,10 +197,11 @@ class CampaignPartnerApplicationDetailSerializer(serializers.ModelSerializer):
         """
         if not obj.funding_form or not obj.form_responses:
             return []
+        from investors.form_schema import get_form_schema
         result = []
-        for section in obj.funding_form.sections.prefetch_related('fields').order_by('order'):
+        for section in get_form_schema(obj.funding_form).sections:
             section_data = {'section_title': section.title, 'fields': []}
-            for field in section.fields.order_by('order'):
+            for field in section.fields:
                 value = obj.form_responses.get(str(field.id))
                 section_data['fields'].append({
                     'field_id': field.id,
@@ -217,6 +227,22 @@ class PartnerApplicationDocumentSerializer(serializers.ModelSerializer):
         fields = ['id', 'application', 'document_key', 'document_name', 'file', 'file_url', 'uploaded_at']
         read_only_fields = ['uploaded_at']
 
+    def validate(self, data):
+        # Form-field documents must match the field's accepted types and size
+        application, upload = data.get('application'), data.get('file')
+        key = str(data.get('document_key', ''))
+        if application and application.funding_form_id and upload and key.isdigit():
+            from investors.form_schema import get_form_schema
+            from investors.form_validation import file_type_error, normalize_file_types
+            field = get_form_schema(application.funding_form).fields_by_id.get(int(key))
+            if field is not None and field.field_type == 'file':
+                error = file_type_error(upload.name, normalize_file_types(field.accepted_file_types))
+                if not error and field.max_file_size_mb and upload.size > field.max_file_size_mb * 1024 * 1024:
+                    error = f'File is larger than {field.max_file_size_mb} MB.'
+                if error:
+                    raise serializers.ValidationError({'file': error})
+        return data
+
     def get_file_url(self, obj):
         if obj.file:
             request = self.context.get('request')
@@ -251,6 +277,20 @@ class CampaignPartnerApplicationCreateSerializer(serializers.ModelSerializer):
                 "An application to this partner already exists for this campaign."
             )
         
+        # Answers given up front must be valid; completeness is checked on submit
+        funding_form = data.get('funding_form')
+        if funding_form:
+            from enterprises.auto_fill import fill_missing
+            from investors.form_schema import get_form_schema
+            data['form_responses'] = fill_missing(
+                campaign.enterprise_id, get_form_schema(funding_form).fields, data.get('form_responses'),
+            )
+        if funding_form and data.get('form_responses'):
+            from investors.form_validation import validate_form_responses
+            field_errors = validate_form_responses(funding_form, data['form_responses'], partial=True)
+            if field_errors:
+                raise serializers.ValidationError({'form_responses': field_errors})
+        
         return data
     
     def create(self, validated_data):
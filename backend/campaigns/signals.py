@@ -3,17 +3,18 @@ from django.dispatch import receiver
 from .models import Campaign, CampaignInterest, CampaignMessage
 
 
-def _notify(user, notification_type, title, message, action_url=None, metadata=None):
-    """Create an in-app notification for a user."""
+def _notify(user, notification_type, title, message, action_url=None, metadata=None, coalesce_key=None):
+    """Queue an in-app notification; written in bulk when the transaction commits."""
     try:
-        from core.models import Notification
-        Notification.objects.create(
-            user=user,
-            notification_type=notification_type,
-            title=title,
-            message=message,
-            action_url=action_url or '',
-            metadata=metadata or {},
+        from core.notifications import notify
+        notify(
+            user,
+            notification_type,
+            title,
+            message,
+            action_url=action_url,
+            metadata=metadata,
+            coalesce_key=coalesce_key,
         )
     except Exception as e:
         # Never let a notification failure break the main flow
@@ -26,8 +27,6 @@ def on_campaign_status_change(sender, instance, created, **kwargs):
     if created:
         return
 
-    enterprise_user = instance.enterprise.user
-
     status_map = {
         'submitted': (
             'Application Submitted',
@@ -58,7 +57,7 @@ def on_campaign_status_change(sender, instance, created, **kwargs):
     if instance.status in status_map:
         title, msg = status_map[instance.status]
         _notify(
-            enterprise_user,
+            instance.enterprise.user_id,
             'campaign_status',
             title,
             msg,
@@ -66,28 +65,38 @@ def on_campaign_status_change(sender, instance, created, **kwargs):
         )
 
 
+def notify_interest_created(campaign, investor):
+    """
+    Tell the enterprise a partner is now interested in its campaign. Also
+    called for interests bulk-created by CampaignViewSet.activate, which
+    bypass post_save.
+    """
+    org_name = getattr(investor, 'organization_name', 'An investor')
+    _notify(
+        campaign.enterprise.user_id,
+        'investor_interest',
+        'New Investor Interest',
+        f'{org_name} expressed interest in "{campaign.title}".',
+        action_url=f'/campaigns/{campaign.id}',
+        metadata={'investor_id': investor.id},
+    )
+
+
 @receiver(post_save, sender=CampaignInterest)
 def on_interest_status_change(sender, instance, created, **kwargs):
     """
     Notify the relevant party when a CampaignInterest is created or changes status.
     """
     try:
-        enterprise_user = instance.campaign.enterprise.user
-        investor_user = instance.investor.user
+        campaign = instance.campaign
+        enterprise_user_id = campaign.enterprise.user_id
+        investor = instance.investor
     except Exception:
         return
 
     if created:
         # New interest — notify the enterprise
-        org_name = getattr(instance.investor, 'organization_name', 'An investor')
-        _notify(
-            enterprise_user,
-            'investor_interest',
-            'New Investor Interest',
-            f'{org_name} expressed interest in "{instance.campaign.title}".',
-            action_url=f'/campaigns/{instance.campaign.id}',
-            metadata={'investor_id': instance.investor.id},
-        )
+        notify_interest_created(campaign, investor)
         return
 
     status = instance.status
@@ -95,38 +104,38 @@ def on_interest_status_change(sender, instance, created, **kwargs):
     if status in ('pledged', 'committed'):
         amount = instance.committed_amount
         amount_str = f'{float(amount):,.0f} RWF' if amount else 'an amount'
-        org_name = getattr(instance.investor, 'organization_name', 'An investor')
+        org_name = getattr(investor, 'organization_name', 'An investor')
         _notify(
-            enterprise_user,
+            enterprise_user_id,
             'pledge_received',
             'Pledge Received',
-            f'{org_name} pledged {amount_str} for "{instance.campaign.title}". Accept or decline in your application.',
-            action_url=f'/campaigns/{instance.campaign.id}',
+            f'{org_name} pledged {amount_str} for "{campaign.title}". Accept or decline in your application.',
+            action_url=f'/campaigns/{campaign.id}',
             metadata={
                 'interest_id': instance.id,
                 'amount': str(amount),
-                'investor_id': instance.investor.id,
+                'investor_id': investor.id,
             },
         )
 
     elif status == 'accepted':
         _notify(
-            investor_user,
+            investor.user_id,
             'pledge_accepted',
             'Pledge Accepted!',
-            f'Your pledge for "{instance.campaign.title}" was accepted by the enterprise.',
+            f'Your pledge for "{campaign.title}" was accepted by the enterprise.',
             action_url='/investor/matches',
-            metadata={'campaign_id': str(instance.campaign.id)},
+            metadata={'campaign_id': str(campaign.id)},
         )
 
     elif status == 'declined':
         _notify(
-            investor_user,
+            investor.user_id,
             'pledge_declined',
             'Pledge Declined',
-            f'Your pledge for "{instance.campaign.title}" was declined by the enterprise.',
+            f'Your pledge for "{campaign.title}" was declined by the enterprise.',
             action_url='/investor/matches',
-            metadata={'campaign_id': str(instance.campaign.id)},
+            metadata={'campaign_id': str(campaign.id)},
         )
 
 
@@ -141,13 +150,33 @@ def on_new_message(sender, instance, created, **kwargs):
             or instance.sender.email
             or 'Someone'
         )
+        # Unread alerts for one thread are merged rather than stacked
         _notify(
-            instance.receiver,
+            instance.receiver_id,
             'new_message',
             'New Message',
             f'{sender_name} sent you a message about "{instance.campaign.title}".',
-            action_url=f'/campaigns/{instance.campaign.id}',
-            metadata={'campaign_id': str(instance.campaign.id)},
+            action_url=f'/campaigns/{instance.campaign_id}',
+            metadata={'campaign_id': str(instance.campaign_id), 'sender_id': instance.sender_id},
+            coalesce_key=f'campaign-thread:{instance.campaign_id}:{instance.sender_id}',
         )
     except Exception as e:
         print(f"[signals] Message notification failed: {e}")
+
+
+@receiver(post_save, sender=CampaignMessage)
+def publish_new_message(sender, instance, created, **kwargs):
+    """Push a new campaign message to both participants' open event streams."""
+    if not created:
+        return
+    from core.events import publish_to_users
+    data = {
+        'id': instance.id,
+        'campaign': str(instance.campaign_id),
+        'interest': instance.interest_id,
+        'sender': instance.sender_id,
+        'receiver': instance.receiver_id,
+        'content': instance.content,
+        'created_at': instance.created_at,
+    }
+    publish_to_users([(user_id, 'message', data) for user_id in {instance.sender_id, instance.receiver_id}])
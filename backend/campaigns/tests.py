@@ -0,0 +1,339 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core import audit
+from core.models import AuditLog, Notification, NotificationCounter
+from enterprises.models import Enterprise
+from investors.models import FormField, FormSection, Investor, PartnerFundingForm
+from investors.form_validation import validate_form_responses
+from investors.serializers import FormSectionSerializer
+from .models import Campaign, CampaignInterest, CampaignPartnerApplication
+
+User = get_user_model()
+
+
+class CampaignActivateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('+250733000001', 'owner@example.com', 'pass')
+        cls.enterprise = Enterprise.objects.create(
+            user=owner,
+            business_name='Activate Ltd',
+            tin_number='ACT001',
+            enterprise_type='limited_company',
+            sector='technology',
+            district='Gasabo',
+            phone='+250733000001',
+            year_established=2020,
+            number_of_employees=5,
+        )
+        cls.partners = []
+        for n in range(30):
+            user = User.objects.create_user(
+                f'+25073310{n:04d}', f'partner{n}@example.com', None, user_type='investor',
+            )
+            cls.partners.append(Investor.objects.create(
+                user=user,
+                investor_type='bank',
+                organization_name=f'Partner {n}',
+                contact_email=user.email,
+                min_investment=Decimal('100000'),
+                max_investment=Decimal('50000000'),
+            ))
+        # An active campaign from today and an unread counter, so activating
+        # only updates existing rollup and counter rows
+        NotificationCounter.objects.create(user=owner)
+        Campaign.objects.create(
+            enterprise=cls.enterprise,
+            title='Live round',
+            description='Growth round',
+            campaign_type='equity',
+            target_amount=Decimal('10000000'),
+            min_investment=Decimal('100000'),
+            status='active',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.enterprise.user)
+
+    def create_campaign(self, partners):
+        campaign = Campaign.objects.create(
+            enterprise=self.enterprise,
+            title=f'Round {len(partners)}',
+            description='Growth round',
+            campaign_type='equity',
+            target_amount=Decimal('10000000'),
+            min_investment=Decimal('100000'),
+            status='approved',
+        )
+        campaign.target_partners.set(partners)
+        return campaign
+
+    def activate(self, campaign):
+        # Audit entries recorded so far wait on the test's transaction, which never commits
+        audit._local.buffer = None
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/campaigns/api/campaigns/{campaign.pk}/activate/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_activate_creates_missing_interests(self):
+        campaign = self.create_campaign(self.partners[:5])
+        with self.captureOnCommitCallbacks(execute=True):
+            CampaignInterest.objects.create(campaign=campaign, investor=self.partners[0], status='pledged')
+        Notification.objects.all().delete()
+
+        self.activate(campaign)
+
+        interests = CampaignInterest.objects.filter(campaign=campaign)
+        self.assertEqual(interests.count(), 5)
+        # The existing interest is left alone
+        self.assertEqual(interests.get(investor=self.partners[0]).status, 'pledged')
+        self.assertEqual(
+            Notification.objects.filter(
+                user=self.enterprise.user, notification_type='investor_interest'
+            ).count(),
+            4,
+        )
+        # bulk_create skips post_save; the new interests are audited anyway
+        audited = AuditLog.objects.filter(action='create', model_name='CampaignInterest')
+        self.assertEqual(
+            set(audited.values_list('object_id', flat=True)),
+            {str(pk) for pk in interests.exclude(investor=self.partners[0]).values_list('pk', flat=True)},
+        )
+        self.assertIn('Partner 1 (', audited.get(object_id=str(interests.get(investor=self.partners[1]).pk)).object_repr)
+
+    def test_activate_query_count_does_not_grow_with_partners(self):
+        # Warm up the content type cache and today's audit rollup rows
+        self.activate(self.create_campaign(self.partners[:1]))
+        for partners in (self.partners[:3], self.partners):
+            campaign = self.create_campaign(partners)
+            # Fresh user instance so the per-request investor_profile lookup is counted each time
+            self.client.force_authenticate(User.objects.get(pk=self.enterprise.user_id))
+            with self.subTest(partners=len(partners)), self.assertNumQueries(33):
+                self.activate(campaign)
+            self.assertEqual(CampaignInterest.objects.filter(campaign=campaign).count(), len(partners))
+
+
+class ApplicationFormFixtureMixin:
+    """An enterprise's active campaign applying to a partner that has a funding form."""
+
+    @classmethod
+    def create_application(cls):
+        owner = User.objects.create_user('+250734000001', 'sme@example.com', None, user_type='enterprise')
+        cls.enterprise = Enterprise.objects.create(
+            user=owner,
+            business_name='Schema Ltd',
+            tin_number='SCH001',
+            enterprise_type='limited_company',
+            sector='technology',
+            district='Gasabo',
+            phone='+250734000001',
+            year_established=2020,
+            number_of_employees=5,
+        )
+        partner_user = User.objects.create_user('+250734100001', 'bank@example.com', None, user_type='investor')
+        cls.partner = Investor.objects.create(
+            user=partner_user,
+            investor_type='bank',
+            organization_name='Schema Bank',
+            contact_email=partner_user.email,
+            min_investment=Decimal('100000'),
+            max_investment=Decimal('50000000'),
+        )
+        cls.form = PartnerFundingForm.objects.create(partner=cls.partner, name='SME Loan', funding_type='loan')
+        campaign = Campaign.objects.create(
+            enterprise=cls.enterprise,
+            title='Schema round',
+            description='Growth round',
+            campaign_type='loan',
+            target_amount=Decimal('10000000'),
+            min_investment=Decimal('100000'),
+            status='active',
+        )
+        cls.application = CampaignPartnerApplication.objects.create(
+            campaign=campaign, partner=cls.partner, funding_form=cls.form, form_responses={},
+        )
+
+
+class PartnerApplicationFormSchemaTests(ApplicationFormFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_application()
+        cls.fields = []
+        for s in range(3):
+            section = FormSection.objects.create(form=cls.form, title=f'Section {s}', order=2 - s)
+            cls.fields.append(FormField.objects.create(
+                section=section, field_type='number', label=f'Amount {s}', order=1, min_value=Decimal('10'),
+            ))
+            cls.fields.append(FormField.objects.create(
+                section=section, field_type='file', label=f'Statement {s}', order=0,
+                accepted_file_types=['.pdf'], conditional_rules={'show_if': {'field': 'x', 'operator': '>', 'value': 1}},
+            ))
+        cls.application.form_responses = {str(cls.fields[0].id): 250}
+        cls.application.save()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.partner.user)
+
+    def get(self, suffix=''):
+        return self.client.get(f'/api/campaigns/api/partner-applications/{self.application.pk}/{suffix}')
+
+    def assertNoFormQueries(self, suffix=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(suffix)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            self.assertNotIn('investors_formsection', query['sql'])
+            self.assertNotIn('investors_formfield', query['sql'])
+        return response
+
+    def test_detail_renders_from_compiled_schema(self):
+        self.get()
+        response = self.assertNoFormQueries()
+
+        sections = response.data['structured_responses']
+        self.assertEqual([section['section_title'] for section in sections], ['Section 2', 'Section 1', 'Section 0'])
+        section_0 = sections[-1]['fields']
+        self.assertEqual([field['label'] for field in section_0], ['Statement 0', 'Amount 0'])
+        self.assertEqual(section_0[1]['value'], 250)
+
+        expected = FormSectionSerializer(self.form.sections.all(), many=True).data
+        self.assertEqual(response.data['funding_form_data']['sections'], expected)
+
+        docs = self.assertNoFormQueries('required-docs/').data['required_docs']
+        self.assertEqual([doc['name'] for doc in docs], ['Statement 2', 'Statement 1', 'Statement 0'])
+
+    def test_field_edits_recompile_the_schema(self):
+        self.get()
+        field = FormField.objects.get(pk=self.fields[0].pk)
+        field.label = 'Loan amount'
+        field.save()
+
+        sections = self.get().data['structured_responses']
+        self.assertEqual(sections[-1]['fields'][1]['label'], 'Loan amount')
+
+        FormSection.objects.filter(title='Section 2').get().delete()
+        sections = self.get().data['structured_responses']
+        self.assertEqual(len(sections), 2)
+
+
+class FormResponseValidationTests(ApplicationFormFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_application()
+        section = FormSection.objects.create(form=cls.form, title='Loan')
+        cls.amount = FormField.objects.create(
+            section=section, field_type='number', label='Amount', order=0,
+            min_value=Decimal('1000'), max_value=Decimal('1000000'),
+        )
+        cls.purpose = FormField.objects.create(
+            section=section, field_type='choice', label='Purpose', order=1,
+            choices=[{'value': 'stock', 'label': 'Stock'}, {'value': 'equipment', 'label': 'Equipment'}],
+        )
+        cls.collateral = FormField.objects.create(
+            section=section, field_type='file', label='Collateral', order=2, accepted_file_types=['.pdf'],
+            conditional_rules={'show_if': {'field': str(cls.amount.id), 'operator': '>', 'value': 500000}},
+        )
+        cls.notes = FormField.objects.create(section=section, field_type='long_text', label='Notes', order=3, is_required=False)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.enterprise.user)
+
+    def responses(self, **answers):
+        fields = {'amount': self.amount, 'purpose': self.purpose, 'collateral': self.collateral, 'notes': self.notes}
+        return {str(fields[name].id): value for name, value in answers.items()}
+
+    def errors(self, responses, **kwargs):
+        return validate_form_responses(self.form, responses, **kwargs)
+
+    def test_required_min_max_and_choices(self):
+        self.assertEqual(self.errors(self.responses(amount='20000', purpose='stock')), {})
+        self.assertEqual(self.errors(self.responses(notes='later')), {
+            str(self.amount.id): ['This field is required.'],
+            str(self.purpose.id): ['This field is required.'],
+        })
+        self.assertEqual(self.errors(self.responses(notes='later'), partial=True), {})
+
+        errors = self.errors(self.responses(amount=500, purpose='land'))
+        self.assertEqual(errors[str(self.amount.id)], ['Must be at least 1000.00.'])
+        self.assertIn('not a valid choice', errors[str(self.purpose.id)][0])
+        errors = self.errors(self.responses(amount='lots', purpose='stock'))
+        self.assertEqual(errors[str(self.amount.id)], ['Enter a number.'])
+        self.assertIn(str(self.amount.id), self.errors(self.responses(amount=2000000, purpose='stock')))
+
+    def test_show_if_and_file_types(self):
+        # Collateral is only asked for above 500,000
+        self.assertEqual(self.errors(self.responses(amount=800000, purpose='stock')), {
+            str(self.collateral.id): ['This field is required.'],
+        })
+        self.assertEqual(self.errors(self.responses(amount=800000, purpose='stock'), uploaded_keys={str(self.collateral.id)}), {})
+        self.assertEqual(self.errors(self.responses(amount=800000, purpose='stock', collateral='deed.pdf')), {})
+        errors = self.errors(self.responses(amount=800000, purpose='stock', collateral={'name': 'deed.exe'}))
+        self.assertIn('File type not accepted', errors[str(self.collateral.id)][0])
+        # Hidden fields are not checked
+        self.assertEqual(self.errors(self.responses(amount=1000, purpose='stock', collateral='deed.exe')), {})
+
+    def test_update_form_responses_rejects_invalid_answers(self):
+        url = f'/api/campaigns/api/partner-applications/{self.application.pk}/update_form_responses/'
+        response = self.client.post(url, {'form_responses': self.responses(amount=10)}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['field_errors']), [str(self.amount.id)])
+
+        response = self.client.post(url, {'form_responses': self.responses(amount=10000)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.form_responses, self.responses(amount=10000))
+
+    def test_submit_requires_complete_answers(self):
+        self.application.form_responses = self.responses(amount=10000)
+        self.application.save()
+        url = f'/api/campaigns/api/partner-applications/{self.application.pk}/submit/'
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['field_errors'], {str(self.purpose.id): ['This field is required.']})
+
+        self.application.form_responses = self.responses(amount=10000, purpose='equipment')
+        self.application.save()
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'submitted')
+
+    def test_auto_fill_fields_are_answered_by_the_resolver(self):
+        sector = FormField.objects.create(
+            section=self.amount.section, field_type='auto_fill', label='Sector', order=4,
+            auto_fill_source='profile.sector',
+        )
+        # Not the applicant's to answer, even when marked required
+        self.assertEqual(self.errors(self.responses(amount=10000, purpose='stock')), {})
+
+        self.application.form_responses = self.responses(amount=10000, purpose='stock')
+        self.application.save()
+        url = f'/api/campaigns/api/partner-applications/{self.application.pk}/submit/'
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.form_responses[str(sector.id)], 'technology')
+
+    def test_invalid_auto_fill_value_blocks_submit(self):
+        sector = FormField.objects.create(
+            section=self.amount.section, field_type='auto_fill', label='Sector', order=4,
+            auto_fill_source='profile.sector', choices=['agriculture', 'manufacturing'],
+        )
+        self.application.form_responses = self.responses(amount=10000, purpose='stock')
+        self.application.save()
+
+        response = self.client.post(f'/api/campaigns/api/partner-applications/{self.application.pk}/submit/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['field_errors']), [str(sector.id)])
@@ -3,7 +3,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q, Avg
+from core.audit import record as record_audit
+from core.pagination import ThreadCursorPagination
+from investors.form_schema import get_form_schema
+from investors.form_validation import validate_form_responses
 from .models import Campaign, CampaignDocument, CampaignInterest, CampaignUpdate, CampaignMessage, CampaignPartnerApplication, PartnerApplicationDocument
 from .serializers import (
     CampaignSerializer, CampaignDetailSerializer, CampaignCreateSerializer,
@@ -12,18 +17,19 @@ from .serializers import (
     CampaignPartnerApplicationDetailSerializer, CampaignPartnerApplicationCreateSerializer,
     PartnerApplicationDocumentSerializer,
 )
+from .signals import notify_interest_created
 
 
 class IsEnterpriseOwner(permissions.BasePermission):
     """Check if user owns the enterprise"""
     def has_object_permission(self, request, view, obj):
         # Admins can do anything
-        if request.user.user_type in ['admin', 'superadmin']:
+        if request.principal.is_admin:
             return True
         
         if request.method in permissions.SAFE_METHODS:
             return True
-        return hasattr(request.user, 'enterprise') and obj.enterprise == request.user.enterprise
+        return request.principal.enterprise is not None and obj.enterprise == request.principal.enterprise
 
 
 class CampaignViewSet(viewsets.ModelViewSet):
@@ -38,15 +44,21 @@ class CampaignViewSet(viewsets.ModelViewSet):
         return CampaignSerializer
     
     def get_queryset(self):
-        user = self.request.user
+        queryset = self._get_visible_campaigns()
+        if self.action == 'list':
+            queryset = queryset.with_list_stats()
+        return queryset
+    
+    def _get_visible_campaigns(self):
+        principal = self.request.principal
         
         # Admins see all
-        if user.user_type in ['admin', 'superadmin']:
+        if principal.is_admin:
             return Campaign.objects.all()
         
         # Investors/Partners see only campaigns targeted to them
-        if hasattr(user, 'investor_profile'):
-            investor = user.investor_profile
+        if principal.investor:
+            investor = principal.investor
             
             # Get investor's criteria
             criteria = investor.criteria.filter(is_active=True).first()
@@ -79,20 +91,20 @@ class CampaignViewSet(viewsets.ModelViewSet):
             return (targeted_campaigns | open_campaigns).distinct()
         
         # Enterprise users see their own campaigns
-        if hasattr(user, 'enterprise'):
-            return Campaign.objects.filter(enterprise=user.enterprise)
+        if principal.enterprise:
+            return Campaign.objects.filter(enterprise=principal.enterprise)
         
         return Campaign.objects.none()
     
     def perform_update(self, serializer):
         """Override update to reset vetted status when enterprise edits campaign"""
         campaign = self.get_object()
-        user = self.request.user
+        principal = self.request.principal
         
         # If enterprise (not admin) is editing a vetted or active campaign,
         # reset it to draft to require re-approval
-        if (hasattr(user, 'enterprise') and 
-            user.user_type not in ['admin', 'superadmin'] and
+        if (principal.enterprise and 
+            not principal.is_admin and
             (campaign.is_vetted or campaign.status in ['vetted', 'active'])):
             serializer.save(
                 status='draft',
@@ -106,10 +118,10 @@ class CampaignViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_campaigns(self, request):
         """Get current user's enterprise campaigns"""
-        if not hasattr(request.user, 'enterprise'):
+        if not request.principal.enterprise:
             return Response([])
         
-        campaigns = Campaign.objects.filter(enterprise=request.user.enterprise)
+        campaigns = Campaign.objects.filter(enterprise=request.principal.enterprise).with_list_stats()
         serializer = CampaignSerializer(campaigns, many=True)
         return Response(serializer.data)
     
@@ -131,7 +143,7 @@ class CampaignViewSet(viewsets.ModelViewSet):
         if campaign_type:
             campaigns = campaigns.filter(campaign_type=campaign_type)
         
-        serializer = CampaignSerializer(campaigns, many=True)
+        serializer = CampaignSerializer(campaigns.with_list_stats(), many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
@@ -165,7 +177,7 @@ class CampaignViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Admin approves a funding application - makes it visible to partners"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         campaign = self.get_object()
@@ -187,7 +199,7 @@ class CampaignViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def require_revision(self, request, pk=None):
         """Admin requests revision on a funding application"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         campaign = self.get_object()
@@ -210,7 +222,7 @@ class CampaignViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         """Admin rejects a funding application"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         campaign = self.get_object()
@@ -231,25 +243,43 @@ class CampaignViewSet(viewsets.ModelViewSet):
         campaign = self.get_object()
         
         # Can be activated by admin or by enterprise owner
-        if request.user.user_type not in ['admin', 'superadmin']:
-            if not hasattr(request.user, 'enterprise') or campaign.enterprise != request.user.enterprise:
+        if not request.principal.is_admin:
+            if not request.principal.enterprise or campaign.enterprise != request.principal.enterprise:
                 return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if campaign.status != 'approved':
             return Response({'error': 'Only approved applications can be activated'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        campaign.status = 'active'
-        campaign.save()
-
-        # Auto-create CampaignInterest records for all targeted partners
-        # so messaging is available immediately
-        for investor in campaign.target_partners.all():
-            CampaignInterest.objects.get_or_create(
-                campaign=campaign,
-                investor=investor,
-                defaults={'status': 'interested'},
+        with transaction.atomic():
+            campaign.status = 'active'
+            campaign.save()
+
+            # Auto-create CampaignInterest records for all targeted partners
+            # so messaging is available immediately. One query finds the
+            # partners without an interest yet; bulk_create skips post_save,
+            # so their audit entries and notifications are queued here and
+            # written in one batch.
+            new_partners = list(
+                campaign.target_partners
+                .exclude(campaign_interests__campaign=campaign)
+                .only('id', 'organization_name', 'investor_type')
+            )
+            CampaignInterest.objects.bulk_create(
+                [
+                    CampaignInterest(campaign=campaign, investor=investor, status='interested')
+                    for investor in new_partners
+                ],
+                ignore_conflicts=True,
             )
+            # ignore_conflicts leaves the pks unset, so the audit reads them back
+            partners = {investor.pk: investor for investor in new_partners}
+            for interest in CampaignInterest.objects.filter(campaign=campaign, investor_id__in=partners):
+                interest.campaign = campaign
+                interest.investor = partners[interest.investor_id]
+                record_audit('create', interest)
+            for investor in new_partners:
+                notify_interest_created(campaign, investor)
 
         return Response({'message': 'Funding application is now visible to partners'})
     
@@ -298,18 +328,18 @@ class CampaignViewSet(viewsets.ModelViewSet):
     def partner_application(self, request, pk=None):
         """Get partner-specific application details for the logged-in partner"""
         campaign = self.get_object()
-        user = request.user
+        principal = request.principal
         
         # Only partners can access this endpoint
-        if not hasattr(user, 'investor_profile'):
+        if not principal.investor:
             return Response({'error': 'Only partners can access partner applications'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        partner = user.investor_profile
+        partner = principal.investor
         
         # Get or create the partner application
         try:
-            application = CampaignPartnerApplication.objects.get(
+            application = CampaignPartnerApplication.objects.select_related('funding_form__partner').get(
                 campaign=campaign,
                 partner=partner
             )
@@ -378,7 +408,7 @@ class CampaignInterestViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
+        principal = self.request.principal
         
         # Filter by campaign
         campaign_id = self.request.query_params.get('campaign_id')
@@ -386,27 +416,27 @@ class CampaignInterestViewSet(viewsets.ModelViewSet):
             queryset = CampaignInterest.objects.filter(campaign_id=campaign_id)
             
             # Only owner or admin can see all interests
-            if user.user_type in ['admin', 'superadmin']:
+            if principal.is_admin:
                 return queryset
-            if hasattr(user, 'enterprise'):
-                return queryset.filter(campaign__enterprise=user.enterprise)
-            if hasattr(user, 'investor_profile'):
-                return queryset.filter(investor=user.investor_profile)
+            if principal.enterprise:
+                return queryset.filter(campaign__enterprise=principal.enterprise)
+            if principal.investor:
+                return queryset.filter(investor=principal.investor)
         
         # Investors see their own interests
-        if hasattr(user, 'investor_profile'):
-            return CampaignInterest.objects.filter(investor=user.investor_profile)
+        if principal.investor:
+            return CampaignInterest.objects.filter(investor=principal.investor)
         
         # Enterprise sees interests in their campaigns
-        if hasattr(user, 'enterprise'):
-            return CampaignInterest.objects.filter(campaign__enterprise=user.enterprise)
+        if principal.enterprise:
+            return CampaignInterest.objects.filter(campaign__enterprise=principal.enterprise)
         
         return CampaignInterest.objects.none()
     
     def perform_create(self, serializer):
         # Auto-set investor from current user
-        if hasattr(self.request.user, 'investor_profile'):
-            serializer.save(investor=self.request.user.investor_profile)
+        if self.request.principal.investor:
+            serializer.save(investor=self.request.principal.investor)
         else:
             serializer.save()
     
@@ -420,7 +450,7 @@ class CampaignInterestViewSet(viewsets.ModelViewSet):
         """Investor submits a pledge amount. Enterprise will then accept or decline."""
         interest = self.get_object()
 
-        if not hasattr(request.user, 'investor_profile') or interest.investor != request.user.investor_profile:
+        if not request.principal.investor or interest.investor != request.principal.investor:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
         amount = request.data.get('amount') or request.data.get('committed_amount')
@@ -440,7 +470,7 @@ class CampaignInterestViewSet(viewsets.ModelViewSet):
         interest = self.get_object()
 
         # Only the enterprise that owns this campaign may accept
-        if not hasattr(request.user, 'enterprise') or interest.campaign.enterprise != request.user.enterprise:
+        if not request.principal.enterprise or interest.campaign.enterprise != request.principal.enterprise:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
         if interest.status not in ('pledged', 'committed'):
@@ -489,7 +519,7 @@ class CampaignInterestViewSet(viewsets.ModelViewSet):
         """Enterprise declines an investor's pledge."""
         interest = self.get_object()
 
-        if not hasattr(request.user, 'enterprise') or interest.campaign.enterprise != request.user.enterprise:
+        if not request.principal.enterprise or interest.campaign.enterprise != request.principal.enterprise:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
         if interest.status not in ('pledged', 'committed'):
@@ -507,7 +537,7 @@ class CampaignInterestViewSet(viewsets.ModelViewSet):
         """Investor withdraws interest"""
         interest = self.get_object()
 
-        if not hasattr(request.user, 'investor_profile') or interest.investor != request.user.investor_profile:
+        if not request.principal.investor or interest.investor != request.principal.investor:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
         interest.status = 'withdrawn'
@@ -520,6 +550,7 @@ class CampaignMessageViewSet(viewsets.ModelViewSet):
     queryset = CampaignMessage.objects.all()
     serializer_class = CampaignMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ThreadCursorPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -528,7 +559,7 @@ class CampaignMessageViewSet(viewsets.ModelViewSet):
         
         queryset = CampaignMessage.objects.filter(
             Q(sender=user) | Q(receiver=user)
-        )
+        ).select_related('campaign', 'sender__enterprise', 'sender__investor_profile')
         
         if campaign_id:
             queryset = queryset.filter(campaign_id=campaign_id)
@@ -568,38 +599,45 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
         return CampaignPartnerApplicationSerializer
     
     def get_queryset(self):
-        user = self.request.user
+        queryset = self._get_visible_applications()
+        if self.action in ('retrieve', 'required_docs'):
+            # The funding form's version keys its compiled schema
+            queryset = queryset.select_related('funding_form__partner')
+        return queryset
+    
+    def _get_visible_applications(self):
+        principal = self.request.principal
         
         # Admins see all applications
-        if user.user_type in ['admin', 'superadmin']:
+        if principal.is_admin:
             return CampaignPartnerApplication.objects.all()
         
         # Partners see applications to them
-        if hasattr(user, 'investor_profile'):
+        if principal.investor:
             return CampaignPartnerApplication.objects.filter(
-                partner=user.investor_profile
+                partner=principal.investor
             )
         
         # Enterprises see applications from their campaigns
-        if hasattr(user, 'enterprise'):
+        if principal.enterprise:
             return CampaignPartnerApplication.objects.filter(
-                campaign__enterprise=user.enterprise
+                campaign__enterprise=principal.enterprise
             )
         
         return CampaignPartnerApplication.objects.none()
     
     def perform_create(self, serializer):
         """Create application - enterprise initiates application to partner"""
-        user = self.request.user
+        principal = self.request.principal
         
         # Only enterprises can create applications
-        if not hasattr(user, 'enterprise'):
+        if not principal.enterprise:
             raise PermissionError("Only enterprises can create partner applications")
         
         campaign = serializer.validated_data.get('campaign')
         
         # Verify enterprise owns the campaign
-        if campaign.enterprise != user.enterprise:
+        if campaign.enterprise != principal.enterprise:
             raise PermissionError("You can only create applications for your own campaigns")
         
         serializer.save()
@@ -610,8 +648,8 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
         application = self.get_object()
         
         # Only the enterprise that owns the campaign can submit
-        if not (hasattr(request.user, 'enterprise') and 
-                application.campaign.enterprise == request.user.enterprise):
+        if not (request.principal.enterprise and 
+                application.campaign.enterprise == request.principal.enterprise):
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if application.status not in ['draft', 'submitted']:
@@ -627,10 +665,26 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
                 'auto_screen_reason': application.auto_screen_reason
             })
         
+        if application.funding_form:
+            # Auto-fill answers come from the resolver, not the applicant
+            from enterprises.auto_fill import fill_missing
+            application.form_responses = fill_missing(
+                application.campaign.enterprise_id,
+                get_form_schema(application.funding_form).fields,
+                application.form_responses,
+            )
         # Validate form responses if partner has required form
         if application.funding_form and not application.form_responses:
             return Response({'error': 'Form responses required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
+        if application.funding_form:
+            uploaded_keys = set(application.uploaded_documents.values_list('document_key', flat=True))
+            field_errors = validate_form_responses(
+                application.funding_form, application.form_responses, uploaded_keys
+            )
+            if field_errors:
+                return Response({'error': 'Some form responses are invalid', 'field_errors': field_errors},
+                              status=status.HTTP_400_BAD_REQUEST)
         
         application.status = 'submitted'
         application.submitted_at = timezone.now()
@@ -649,8 +703,8 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
         application = self.get_object()
         
         # Only the partner can start review
-        if not (hasattr(request.user, 'investor_profile') and 
-                application.partner == request.user.investor_profile):
+        if not (request.principal.investor and 
+                application.partner == request.principal.investor):
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if application.status != 'submitted':
@@ -670,8 +724,8 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
         application = self.get_object()
         
         # Only the partner can approve
-        if not (hasattr(request.user, 'investor_profile') and 
-                application.partner == request.user.investor_profile):
+        if not (request.principal.investor and 
+                application.partner == request.principal.investor):
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if application.status not in ['submitted', 'under_review']:
@@ -694,8 +748,8 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
         application = self.get_object()
         
         # Only the partner can conditionally approve
-        if not (hasattr(request.user, 'investor_profile') and 
-                application.partner == request.user.investor_profile):
+        if not (request.principal.investor and 
+                application.partner == request.principal.investor):
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if application.status not in ['submitted', 'under_review']:
@@ -725,8 +779,8 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
         application = self.get_object()
         
         # Only the partner can decline
-        if not (hasattr(request.user, 'investor_profile') and 
-                application.partner == request.user.investor_profile):
+        if not (request.principal.investor and 
+                application.partner == request.principal.investor):
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if application.status not in ['submitted', 'under_review']:
@@ -752,8 +806,8 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
         application = self.get_object()
         
         # Only the enterprise can withdraw
-        if not (hasattr(request.user, 'enterprise') and 
-                application.campaign.enterprise == request.user.enterprise):
+        if not (request.principal.enterprise and 
+                application.campaign.enterprise == request.principal.enterprise):
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if application.status in ['approved', 'declined']:
@@ -771,8 +825,8 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
         application = self.get_object()
         
         # Only the enterprise can update form responses
-        if not (hasattr(request.user, 'enterprise') and 
-                application.campaign.enterprise == request.user.enterprise):
+        if not (request.principal.enterprise and 
+                application.campaign.enterprise == request.principal.enterprise):
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if application.status not in ['draft', 'conditional']:
@@ -780,6 +834,12 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_400_BAD_REQUEST)
         
         form_responses = request.data.get('form_responses', {})
+        if application.funding_form:
+            # Drafts may be incomplete, but the answers given must be valid
+            field_errors = validate_form_responses(application.funding_form, form_responses, partial=True)
+            if field_errors:
+                return Response({'error': 'Some form responses are invalid', 'field_errors': field_errors},
+                              status=status.HTTP_400_BAD_REQUEST)
         application.form_responses = form_responses
         
         # If conditional, mark conditions_met based on update
@@ -793,17 +853,17 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_applications(self, request):
         """Get applications for current user's context (enterprise or partner)"""
-        user = request.user
+        principal = request.principal
         
-        if hasattr(user, 'enterprise'):
+        if principal.enterprise:
             # Enterprise sees their campaign applications
             applications = CampaignPartnerApplication.objects.filter(
-                campaign__enterprise=user.enterprise
+                campaign__enterprise=principal.enterprise
             )
-        elif hasattr(user, 'investor_profile'):
+        elif principal.investor:
             # Partner sees applications to them
             applications = CampaignPartnerApplication.objects.filter(
-                partner=user.investor_profile
+                partner=principal.investor
             )
         else:
             applications = CampaignPartnerApplication.objects.none()
@@ -825,8 +885,8 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Campaign not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Only enterprise owner or admin can see all applications for a campaign
-        if not (hasattr(request.user, 'enterprise') and campaign.enterprise == request.user.enterprise) and \
-           request.user.user_type not in ['admin', 'superadmin']:
+        if not (request.principal.enterprise and campaign.enterprise == request.principal.enterprise) and \
+           not request.principal.is_admin:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         applications = CampaignPartnerApplication.objects.filter(campaign=campaign)
@@ -859,18 +919,17 @@ class CampaignPartnerApplicationViewSet(viewsets.ModelViewSet):
                     'field_id': None,
                 })
 
-        # 2. Form-level file fields
+        # 2. Form-level file fields, from the compiled form schema
         if application.funding_form:
-            for section in application.funding_form.sections.prefetch_related('fields').order_by('order'):
-                for field in section.fields.filter(field_type='file').order_by('order'):
-                    docs.append({
-                        'key': str(field.id),
-                        'name': field.label,
-                        'description': field.help_text,
-                        'required': field.is_required,
-                        'source': 'form',
-                        'field_id': field.id,
-                    })
+            for field in get_form_schema(application.funding_form).file_fields:
+                docs.append({
+                    'key': str(field.id),
+                    'name': field.label,
+                    'description': field.help_text,
+                    'required': field.is_required,
+                    'source': 'form',
+                    'field_id': field.id,
+                })
 
         # Attach already-uploaded docs
         uploaded = {d.document_key: d.file.url if d.file else None
@@ -888,7 +947,7 @@ class PartnerApplicationDocumentViewSet(viewsets.ModelViewSet):
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
-        user = self.request.user
+        principal = self.request.principal
         application_id = self.request.query_params.get('application_id')
 
         qs = PartnerApplicationDocument.objects.select_related(
@@ -897,20 +956,20 @@ class PartnerApplicationDocumentViewSet(viewsets.ModelViewSet):
         if application_id:
             qs = qs.filter(application_id=application_id)
 
-        if user.user_type in ['admin', 'superadmin']:
+        if principal.is_admin:
             return qs
-        if hasattr(user, 'enterprise'):
-            return qs.filter(application__campaign__enterprise=user.enterprise)
-        if hasattr(user, 'investor_profile'):
-            return qs.filter(application__partner=user.investor_profile)
+        if principal.enterprise:
+            return qs.filter(application__campaign__enterprise=principal.enterprise)
+        if principal.investor:
+            return qs.filter(application__partner=principal.investor)
         return qs.none()
 
     def perform_create(self, serializer):
         # Verify the user has access to the application
         application = serializer.validated_data.get('application')
-        user = self.request.user
-        if (user.user_type not in ['admin', 'superadmin'] and
-                not (hasattr(user, 'enterprise') and application.campaign.enterprise == user.enterprise)):
+        principal = self.request.principal
+        if (not principal.is_admin and
+                not (principal.enterprise and application.campaign.enterprise == principal.enterprise)):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You don't have permission to upload documents for this application.")
         serializer.save()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AuditLog, Notification, UserPreferences, DeletionRequest
+from .models import AuditArchive, AuditLog, Notification, NotificationCounter, UserPreferences, DeletionRequest, Job
 
 
 @admin.register(AuditLog)
@@ -11,6 +11,12 @@ class AuditLogAdmin(admin.ModelAdmin):
     date_hierarchy = 'timestamp'
 
 
+@admin.register(AuditArchive)
+class AuditArchiveAdmin(admin.ModelAdmin):
+    list_display = ['month', 'row_count', 'first_timestamp', 'last_timestamp', 'updated_at']
+    readonly_fields = ['month', 'path', 'row_count', 'first_timestamp', 'last_timestamp', 'created_at', 'updated_at']
+
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ['user', 'notification_type', 'title', 'is_read', 'created_at']
@@ -19,8 +25,18 @@ class NotificationAdmin(admin.ModelAdmin):
     actions = ['mark_as_read']
     
     def mark_as_read(self, request, queryset):
+        from collections import defaultdict
         from django.utils import timezone
-        queryset.update(is_read=True, read_at=timezone.now())
+        from .counters import adjust_unread
+        unread = defaultdict(list)
+        for pk, user_id in queryset.filter(is_read=False).values_list('pk', 'user_id'):
+            unread[user_id].append(pk)
+        # Conditional update per user, so notifications read meanwhile are not counted twice
+        now = timezone.now()
+        adjust_unread({
+            user_id: -Notification.objects.filter(pk__in=pks, is_read=False).update(is_read=True, read_at=now)
+            for user_id, pks in unread.items()
+        })
     mark_as_read.short_description = "Mark selected notifications as read"
 
 
@@ -48,3 +64,18 @@ class DeletionRequestAdmin(admin.ModelAdmin):
         from django.utils import timezone
         queryset.update(status='rejected', reviewed_by=request.user, reviewed_at=timezone.now())
     reject_requests.short_description = "Reject selected deletion requests"
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['job_type', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'created_at']
+    list_filter = ['job_type', 'status', 'created_at']
+    search_fields = ['id', 'job_type', 'dedupe_key', 'last_error']
+    readonly_fields = ['created_at', 'updated_at', 'finished_at']
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'unread', 'updated_at']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['updated_at']
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Register every app's background job handlers (<app>/jobs.py)
+        autodiscover_modules('jobs')
+        import core.notifications  # noqa: F401
+        import core.signals  # noqa: F401
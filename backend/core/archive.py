@@ -0,0 +1,252 @@
+"""
+Audit log archival.
+
+AuditLog keeps a hot window of AUDIT_HOT_DAYS days. `archive_audit_logs()`
+(run by `python manage.py archive_audit_logs`, e.g. nightly) moves older
+rows, one calendar month at a time, into gzipped JSON-lines files under
+AUDIT_ARCHIVE_DIR and records each month in AuditArchive. A month's file
+is written to a temporary name and renamed into place before its rows are
+deleted, so an interrupted run leaves a complete file behind, and the next
+run merges rows by id instead of duplicating them.
+
+`search()` returns hot rows and archived rows matching the same filters,
+newest first (ties broken by id), which is how AuditLogViewSet pages across
+both with a (timestamp, id) cursor. Archived rows are older than hot ones,
+so the archive is only opened once the hot rows run out, and only the months
+whose time range can match are read. Rows found in both places (a run that
+stopped between writing a file and deleting its rows) are returned once.
+
+Archiving does not touch the admin_dashboard rollups: they keep counting the
+archived actions, and `rebuild_dashboard_metrics` reads them back with
+`archived_records()`.
+"""
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditArchive, AuditLog
+
+
+DEFAULT_HOT_DAYS = 180
+DELETE_CHUNK_SIZE = 1000
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'action', 'content_type_id', 'object_id', 'model_name',
+    'object_repr', 'changes', 'ip_address', 'user_agent', 'timestamp',
+)
+
+
+def hot_window_start():
+    """Rows older than this are due for archiving"""
+    return timezone.now() - timedelta(days=getattr(settings, 'AUDIT_HOT_DAYS', DEFAULT_HOT_DAYS))
+
+
+def archive_dir():
+    return Path(getattr(settings, 'AUDIT_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'audit_archive'))
+
+
+def month_bounds(month):
+    """[start, end) of the calendar month starting on `month`, as aware datetimes"""
+    next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return (
+        timezone.make_aware(datetime.combine(month, time.min)),
+        timezone.make_aware(datetime.combine(next_month, time.min)),
+    )
+
+
+def archive_audit_logs(before=None, dry_run=False):
+    """
+    Archive rows older than `before` (default: the hot window start).
+    Returns [(month, rows archived)], oldest month first.
+    """
+    old = AuditLog.objects.filter(timestamp__lt=before or hot_window_start())
+    archived = []
+    for month in old.dates('timestamp', 'month'):
+        start, end = month_bounds(month)
+        rows = old.filter(timestamp__gte=start, timestamp__lt=end)
+        archived.append((month, rows.count() if dry_run else archive_month(month, rows)))
+    return archived
+
+
+def archive_month(month, rows):
+    """Merge `rows` (all within `month`) into the month's archive file, then delete them."""
+    archive = AuditArchive.objects.filter(month=month).first()
+    records = {}
+    if archive is not None:
+        records = {record['id']: record for record in read_archive(archive.path)}
+
+    ids = []
+    for row in rows.values(*ARCHIVE_FIELDS).iterator():
+        record = _to_record(row)
+        records[record['id']] = record
+        ids.append(row['id'])
+    if not ids:
+        return 0
+
+    # Newest first, the order searches read them in
+    ordered = sorted(records.values(), key=lambda record: record['timestamp'], reverse=True)
+    path = archive_dir() / f'audit-{month:%Y-%m}.jsonl.gz'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    with gzip.open(temporary, 'wt', encoding='utf-8') as archive_file:
+        for record in ordered:
+            archive_file.write(json.dumps(record, separators=(',', ':')) + '\n')
+    os.replace(temporary, path)
+
+    with transaction.atomic():
+        AuditArchive.objects.update_or_create(
+            month=month,
+            defaults={
+                'path': str(path),
+                'row_count': len(ordered),
+                'first_timestamp': parse_datetime(ordered[-1]['timestamp']),
+                'last_timestamp': parse_datetime(ordered[0]['timestamp']),
+            },
+        )
+        # A plain DELETE: post_delete would load every row and take the
+        # archived actions back out of the dashboard rollups
+        pk = AuditLog._meta.pk
+        table = connection.ops.quote_name(AuditLog._meta.db_table)
+        column = connection.ops.quote_name(pk.column)
+        with connection.cursor() as cursor:
+            for index in range(0, len(ids), DELETE_CHUNK_SIZE):
+                chunk = [pk.get_db_prep_value(value, connection) for value in ids[index:index + DELETE_CHUNK_SIZE]]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', chunk)
+    return len(ids)
+
+
+def _to_record(row):
+    record = dict(row)
+    record['id'] = str(row['id'])
+    # isoformat keeps microseconds, so archived timestamps sort exactly like hot ones
+    record['timestamp'] = row['timestamp'].isoformat()
+    return record
+
+
+def archived_records():
+    """Records of every archived month; their ids are not in AuditLog any more"""
+    for path in AuditArchive.objects.order_by('month').values_list('path', flat=True):
+        yield from read_archive(path)
+
+
+def read_archive(path):
+    """Records of one archive file, newest first"""
+    with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+        for line in archive_file:
+            yield json.loads(line)
+
+
+def _from_record(record):
+    entry = AuditLog(**{**record, 'timestamp': parse_datetime(record['timestamp'])})
+    entry.archived = True
+    return entry
+
+
+def search(action=None, model_name=None, user_id=None, start=None, end=None, before=None, before_id=None,
+           limit=50):
+    """
+    Up to `limit` audit entries, hot and archived, newest first. `start` and
+    `end` bound the timestamp (inclusive). `before` and `before_id`, the
+    timestamp and id of the last entry of the previous page, fetch the next
+    page; without `before_id` every entry at `before` is skipped. Archived
+    entries are unsaved AuditLog instances with `archived` set.
+    """
+    hot = AuditLog.objects.select_related('user').order_by('-timestamp', '-id')
+    filters = {
+        'action': action,
+        'model_name': model_name,
+        'user_id': user_id,
+        'timestamp__gte': start,
+        'timestamp__lte': end,
+    }
+    hot = hot.filter(**{lookup: value for lookup, value in filters.items() if value is not None})
+    if before is not None:
+        after_cursor = Q(timestamp__lt=before)
+        if before_id is not None:
+            after_cursor |= Q(timestamp=before, id__lt=before_id)
+        hot = hot.filter(after_cursor)
+    entries = list(hot[:limit])
+    if len(entries) >= limit:
+        # Archived rows are older than every hot row, so none can make this page
+        return entries
+
+    months = AuditArchive.objects.order_by('-month')
+    if start is not None:
+        months = months.filter(last_timestamp__gte=start)
+    for bound in (end, before, entries[-1].timestamp if entries else None):
+        if bound is not None:
+            months = months.filter(first_timestamp__lte=bound)
+
+    # Every hot match is in `entries` now. A run interrupted after writing a
+    # month's file but before deleting its rows leaves them in both places.
+    seen = {str(entry.pk) for entry in entries}
+    archived = []
+    full_at = None
+    for archive in months:
+        # Newest month first: once the page is full, older months cannot make the cut
+        if full_at is not None:
+            break
+        for record in read_archive(archive.path):
+            if record['id'] in seen or not _matches(record, action, model_name, user_id):
+                continue
+            entry = _from_record(record)
+            # Files are ordered by timestamp only: rows tied with the last one
+            # that fills the page are read too, and the id order decides
+            if full_at is not None and entry.timestamp < full_at:
+                break
+            if _in_range(entry, start, end, before, before_id):
+                archived.append(entry)
+                if full_at is None and len(entries) + len(archived) >= limit:
+                    full_at = entry.timestamp
+
+    _attach_users(archived)
+    entries.extend(archived)
+    entries.sort(key=_sort_key, reverse=True)
+    return entries[:limit]
+
+
+def _matches(record, action, model_name, user_id):
+    return (
+        (action is None or record['action'] == action)
+        and (model_name is None or record['model_name'] == model_name)
+        and (user_id is None or str(record['user_id']) == str(user_id))
+    )
+
+
+def _sort_key(entry):
+    # Archived entries carry their id as a string
+    return (entry.timestamp, uuid.UUID(str(entry.pk)))
+
+
+def _in_range(entry, start, end, before, before_id):
+    timestamp = entry.timestamp
+    if before is not None and before_id is not None:
+        after_cursor = _sort_key(entry) < (before, before_id)
+    else:
+        after_cursor = before is None or timestamp < before
+    return (
+        (start is None or timestamp >= start)
+        and (end is None or timestamp <= end)
+        and after_cursor
+    )
+
+
+def _attach_users(entries):
+    users = get_user_model().objects.in_bulk({entry.user_id for entry in entries if entry.user_id})
+    for entry in entries:
+        if entry.user_id in users:
+            entry.user = users[entry.user_id]
+        else:
+            # The user was deleted after the row was archived
+            entry.user_id = None
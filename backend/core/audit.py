@@ -0,0 +1,242 @@
+"""
+Audit log capture.
+
+`record()` (called by the model hooks in core.signals and by the login views)
+builds an unsaved AuditLog and queues it once the surrounding transaction
+commits, so rolled-back changes are never audited. Nothing is written on the
+request path:
+
+- During a request (AuditMiddleware) entries collect on the request and are
+  handed to the AuditWriter when the request finishes, after the response
+  has been sent. The writer's background thread saves them with bulk_create.
+- Outside requests (jobs, management commands, the shell) entries are
+  written straight away.
+
+The audited object is described (object_repr, content type) when the
+transaction commits, on the thread that recorded it: __str__ may follow
+foreign keys, and model instances are not handed to the writer thread.
+
+The writer's queue holds at most AUDIT_BUFFER_SIZE entries. When it is full,
+or AUDIT_ASYNC_WRITES is False, the submitting thread writes the batch
+itself - slower for that request, but nothing is lost.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+from django.dispatch import Signal
+
+from .models import AuditLog
+from .transactions import transaction_buffer
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+
+# Sent after each batch is saved: bulk_create skips post_save, and
+# admin_dashboard keeps its audit rollups current from this instead.
+audit_logs_written = Signal()
+
+_local = Local()
+
+
+def _client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def jsonable(value):
+    """`value` as it would be stored in the JSON `changes` column"""
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+def record(action, instance=None, user=None, changes=None):
+    """Audit `action` on `instance` by `user` (default: the current request's user)."""
+    if not getattr(settings, 'AUDIT_LOG_ENABLED', True):
+        return
+
+    request = getattr(_local, 'request', None)
+    if user is None and request is not None:
+        request_user = getattr(request, 'user', None)
+        if request_user is not None and request_user.is_authenticated:
+            user = request_user
+
+    entry = AuditLog(
+        user_id=getattr(user, 'pk', user),
+        action=action,
+        changes=changes or {},
+        ip_address=_client_ip(request) if request is not None else None,
+        user_agent=request.META.get('HTTP_USER_AGENT', '') if request is not None else '',
+    )
+    if instance is not None:
+        entry.model_name = instance._meta.object_name
+        entry.object_id = str(instance.pk)
+        # Described once the transaction commits (see _describe)
+        entry._audited_instance = instance
+
+    if not connection.in_atomic_block:
+        _committed([entry])
+        return
+    transaction_buffer(_local, TransactionEntries).entries.append(entry)
+
+
+class TransactionEntries:
+    """Entries recorded during one transaction, released when it commits"""
+
+    def __init__(self):
+        self.entries = []
+
+    def flush(self):
+        _committed(self.entries)
+
+
+def _describe(entries):
+    """
+    Fill in object_repr and the content type from the audited instances. Runs
+    on the thread that recorded the entries; only the plain entries reach the
+    writer thread.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    for entry in entries:
+        instance = entry.__dict__.pop('_audited_instance', None)
+        if instance is None:
+            continue
+        # Cached per process after the first lookup of each model
+        entry.content_type_id = ContentType.objects.get_for_model(instance).pk
+        try:
+            entry.object_repr = str(instance)[:255]
+        except Exception:
+            entry.object_repr = f'{entry.model_name} {entry.object_id}'
+
+
+def _committed(entries):
+    _describe(entries)
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        # Not in a request: nothing to defer to, write now
+        get_writer().write(entries)
+        return
+    pending.extend(entries)
+    if len(pending) >= _batch_size():
+        _local.pending = []
+        get_writer().submit(pending)
+
+
+def _batch_size():
+    return getattr(settings, 'AUDIT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+class AuditMiddleware:
+    """Attributes audited changes to the request and defers writing them until it ends"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.request = request
+        _local.pending = []
+        return self.get_response(request)
+
+
+def _request_finished(sender, **kwargs):
+    pending = getattr(_local, 'pending', None)
+    _local.request = None
+    _local.pending = None
+    if pending:
+        get_writer().submit(pending)
+
+
+request_finished.connect(_request_finished, dispatch_uid='core.audit.request_finished')
+
+
+class AuditWriter:
+    """Saves AuditLog entries in batches from a background thread"""
+
+    def __init__(self, max_size=DEFAULT_BUFFER_SIZE, batch_size=DEFAULT_BATCH_SIZE, use_thread=True):
+        self.queue = queue.Queue(max_size)
+        self.batch_size = batch_size
+        self.use_thread = use_thread
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, entries):
+        """Queue entries for the writer thread, writing them here if the queue is full"""
+        if not self.use_thread:
+            self.write(entries)
+            return
+        self._ensure_thread()
+        for index, entry in enumerate(entries):
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                # Backpressure: the caller pays for the write instead of dropping entries
+                self.write(entries[index:])
+                return
+
+    def write(self, entries):
+        """Save entries now, in this thread. Failures are logged, never raised."""
+        if not entries:
+            return
+        try:
+            AuditLog.objects.bulk_create(entries, batch_size=self.batch_size)
+            audit_logs_written.send(sender=AuditLog, instances=entries)
+        except Exception:
+            logger.exception('Failed to write %d audit log(s)', len(entries))
+
+    def drain(self):
+        """Entries waiting in the queue, up to one batch"""
+        entries = []
+        while len(entries) < self.batch_size:
+            try:
+                entries.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return entries
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        entries = self.drain()
+        while entries:
+            self.write(entries)
+            entries = self.drain()
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            entries = [self.queue.get()]
+            entries.extend(self.drain())
+            self.write(entries)
+            close_old_connections()
+
+
+_writers = {}
+
+
+def get_writer():
+    options = (
+        getattr(settings, 'AUDIT_BUFFER_SIZE', DEFAULT_BUFFER_SIZE),
+        _batch_size(),
+        getattr(settings, 'AUDIT_ASYNC_WRITES', True),
+    )
+    if options not in _writers:
+        _writers[options] = AuditWriter(*options)
+    return _writers[options]
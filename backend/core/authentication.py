@@ -0,0 +1,26 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .principal import PROFILE_RELATIONS
+
+
+class ProfileUserModel:
+    """
+    Stand-in for the user model in JWTAuthentication.get_user, which looks the
+    user up through `user_model.objects`: here that is a queryset joining the
+    profiles.
+    """
+
+    def __init__(self, model):
+        self.objects = model.objects.select_related(*PROFILE_RELATIONS)
+        self.DoesNotExist = model.DoesNotExist
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the user's enterprise and partner profile in
+    the same query, so request.principal never has to fetch them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_model = ProfileUserModel(self.user_model)
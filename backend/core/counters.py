@@ -0,0 +1,110 @@
+"""
+Per-user unread notification counters.
+
+NotificationCounter keeps each user's unread count so the unread badge,
+which the frontend polls, is answered from the cache (one hit) or a single
+primary-key read instead of a COUNT(*) over the user's notifications. Code
+that creates, reads or deletes notifications reports the change with
+`adjust_unread`; the row is updated in the caller's transaction and the
+cached value dropped once it commits. The reconcile_notification_counters
+command repairs any drift, e.g. after queryset updates made elsewhere.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter
+
+
+DEFAULT_CACHE_TTL = 300
+
+
+def _cache_key(user_id):
+    return f'core:unread-notifications:{user_id}'
+
+
+def _count_unread(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def _create_counter(user_id):
+    counter, _ = NotificationCounter.objects.get_or_create(
+        user_id=user_id, defaults={'unread': _count_unread(user_id)},
+    )
+    return counter.unread
+
+
+def unread_count(user_id):
+    """The user's unread notification count, from the cache when possible"""
+    key = _cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = (
+            NotificationCounter.objects.filter(user_id=user_id)
+            .values_list('unread', flat=True)
+            .first()
+        )
+        if count is None:
+            count = _create_counter(user_id)
+        cache.set(key, count, getattr(settings, 'NOTIFICATION_COUNTER_CACHE_TTL', DEFAULT_CACHE_TTL))
+    return max(count, 0)
+
+
+def adjust_unread(deltas):
+    """
+    Apply {user_id: change in unread notifications}. Call after the change has
+    been written: a user without a counter row gets one counted from the table.
+    """
+    changed = [user_id for user_id, delta in deltas.items() if delta]
+    for user_id in changed:
+        updated = NotificationCounter.objects.filter(user_id=user_id).update(
+            unread=F('unread') + deltas[user_id], updated_at=timezone.now(),
+        )
+        if not updated:
+            _create_counter(user_id)
+    if changed:
+        keys = [_cache_key(user_id) for user_id in changed]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def reconcile_unread_counters(dry_run=False):
+    """
+    Compare every counter with the notifications table and fix the ones that
+    drifted. Returns {user_id: (stored, actual)} for the counters fixed.
+    """
+    actual = dict(
+        Notification.objects.filter(is_read=False)
+        .values_list('user_id')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    stored = dict(NotificationCounter.objects.values_list('user_id', 'unread'))
+
+    drifted = {}
+    for user_id in set(actual) | set(stored):
+        if stored.get(user_id, 0) != actual.get(user_id, 0):
+            drifted[user_id] = (stored.get(user_id), actual.get(user_id, 0))
+    if dry_run or not drifted:
+        return drifted
+
+    now = timezone.now()
+    with transaction.atomic():
+        NotificationCounter.objects.bulk_update(
+            [
+                NotificationCounter(user_id=user_id, unread=count, updated_at=now)
+                for user_id, (previous, count) in drifted.items() if previous is not None
+            ],
+            ['unread', 'updated_at'],
+            batch_size=500,
+        )
+        NotificationCounter.objects.bulk_create(
+            [
+                NotificationCounter(user_id=user_id, unread=count)
+                for user_id, (previous, count) in drifted.items() if previous is None
+            ],
+            batch_size=500,
+        )
+    cache.delete_many([_cache_key(user_id) for user_id in drifted])
+    return drifted
@@ -0,0 +1,142 @@
+"""
+Publish/subscribe for server-push events.
+
+Sync code (signals, the notification dispatcher) calls `publish_to_user`,
+which hands the event to the configured broker once the transaction commits.
+The SSE endpoint (core.streams) subscribes to the user's channel from the
+ASGI event loop and writes each event to the open connection.
+
+EVENT_BROKER names the broker class. The default InProcessBroker only
+reaches streams served by the same process, which is enough for a single
+ASGI worker or local development; with several workers point it at a broker
+backed by Redis pub/sub (or similar) implementing BaseBroker.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROKER = 'core.events.InProcessBroker'
+DEFAULT_QUEUE_SIZE = 100
+
+_brokers = {}
+
+
+class Subscription:
+    """One open stream's queue of events, owned by the event loop that created it"""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        # Set when events were dropped because the client fell behind
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """The next event, or None if none arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """Routes published events to the subscriptions of a channel"""
+
+    def publish(self, channel, event):
+        """Deliver `event` (a JSON-serializable dict) to every subscriber of `channel`."""
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Return a Subscription for `channel`; called from the event loop."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """Delivers events to subscriptions in this process only"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                # Publishers run in worker threads; queues belong to the event loop
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The loop has shut down
+                self.unsubscribe(subscription)
+        return len(subscriptions)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, getattr(settings, 'EVENT_QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+def get_broker():
+    path = getattr(settings, 'EVENT_BROKER', DEFAULT_BROKER)
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def publish_to_user(user_id, event_type, data):
+    """Push an event to the user's open streams once the current transaction commits."""
+    publish_to_users([(user_id, event_type, data)])
+
+
+def publish_to_users(events):
+    """publish_to_user for a batch of (user_id, event_type, data), with one on_commit hook"""
+    messages = [
+        (user_channel(user_id), {'type': event_type, 'data': data})
+        for user_id, event_type, data in events
+    ]
+    if messages:
+        transaction.on_commit(lambda: _publish(messages))
+
+
+def _publish(messages):
+    broker = get_broker()
+    for channel, event in messages:
+        try:
+            broker.publish(channel, event)
+        except Exception:
+            # Streaming is best effort; clients fall back to polling
+            logger.exception('Failed to publish %s to %s', event['type'], channel)
@@ -0,0 +1,127 @@
+"""
+Incremental save for form builders.
+
+Partner funding forms (investors) and business profile forms (enterprises)
+are both a form with `sections`, each with `fields`, saved by their admin
+builders as one nested payload. `save_form_tree()` diffs that payload
+against the stored tree and writes only the difference:
+
+- a section or field posted with the id of one of the form's rows updates
+  that row, and only if one of its values changed (a field may move to
+  another section);
+- one without a known id is created, with bulk_create per level;
+- stored rows that are not posted are deleted.
+
+Field ids are what form answers are keyed by (application form_responses,
+EnterpriseProfileFormResponse.responses), so they survive edits. Bulk
+writes send no model signals; callers that depend on them (e.g. the
+funding-form schema cache) handle that themselves. Callers also own the
+transaction: the serializers save the form row and its tree in one
+transaction.atomic() block, so no savepoint is added here.
+"""
+from django.db import connection
+from django.db.models import prefetch_related_objects
+
+
+def _id(data):
+    try:
+        return int(data.get('id'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _delete(model, pks):
+    """DELETE rows by primary key in one statement, without collecting or signals"""
+    pk = model._meta.pk
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(pk.column)
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE {column} IN ({placeholders})',
+            [pk.get_db_prep_value(value, connection) for value in pks],
+        )
+
+
+def _apply(obj, data, attrs, defaults, index, is_new):
+    """Set posted values (and, on new rows, defaults) on `obj`; return the attrs that changed"""
+    values = dict(defaults, order=index) if is_new else {}
+    values.update({name: data[name] for name in attrs if name in data})
+
+    changed = []
+    for name, value in values.items():
+        model_field = obj._meta.get_field(name)
+        if value is None and not model_field.null:
+            value = model_field.get_default()
+        value = model_field.to_python(value)
+        if is_new or getattr(obj, name) != value:
+            setattr(obj, name, value)
+            changed.append(name)
+    return changed
+
+
+def save_form_tree(form, sections_data, section_model, field_model, section_attrs, field_attrs,
+                   section_defaults=None, field_defaults=None):
+    """
+    Make the form's sections and fields match `sections_data`, a list of
+    section dicts with a `fields` list, as posted. `*_attrs` name the model
+    attributes a payload may set; `*_defaults` apply to new rows when the
+    payload leaves them out (a missing `order` defaults to the position).
+    Returns {'created': n, 'updated': n, 'deleted': n} counted in rows.
+    """
+    prefetch_related_objects([form], 'sections__fields')
+    existing_sections = {section.pk: section for section in form.sections.all()}
+    existing_fields = {field.pk: field for section in form.sections.all() for field in section.fields.all()}
+
+    sections, new_sections, changed_sections, section_columns = [], [], [], set()
+    for index, section_data in enumerate(sections_data):
+        section = existing_sections.pop(_id(section_data), None)
+        is_new = section is None
+        if is_new:
+            section = section_model(form=form)
+            new_sections.append(section)
+        changed = _apply(section, section_data, section_attrs, section_defaults or {}, index, is_new)
+        if changed and not is_new:
+            changed_sections.append(section)
+            section_columns.update(changed)
+        sections.append((section, section_data.get('fields') or []))
+
+    section_model.objects.bulk_create(new_sections)
+    if changed_sections:
+        section_model.objects.bulk_update(changed_sections, sorted(section_columns))
+
+    new_fields, changed_fields, field_columns = [], [], set()
+    for section, fields_data in sections:
+        for index, field_data in enumerate(fields_data):
+            field = existing_fields.pop(_id(field_data), None)
+            is_new = field is None
+            if is_new:
+                field = field_model(section=section)
+                new_fields.append(field)
+            changed = _apply(field, field_data, field_attrs, field_defaults or {}, index, is_new)
+            if not is_new and field.section_id != section.pk:
+                field.section = section
+                changed.append('section')
+            if changed and not is_new:
+                changed_fields.append(field)
+                field_columns.update(changed)
+
+    field_model.objects.bulk_create(new_fields)
+    if changed_fields:
+        field_model.objects.bulk_update(changed_fields, sorted(field_columns))
+
+    # Plain DELETEs: nothing else references sections or fields, and
+    # post_delete handlers would run once per row. Fields of a removed
+    # section were either moved above or are removed with it here.
+    if existing_fields:
+        _delete(field_model, list(existing_fields))
+    if existing_sections:
+        _delete(section_model, list(existing_sections))
+
+    # The prefetched tree is stale now
+    form._prefetched_objects_cache.pop('sections', None)
+    return {
+        'created': len(new_sections) + len(new_fields),
+        'updated': len(changed_sections) + len(changed_fields),
+        'deleted': len(existing_sections) + len(existing_fields),
+    }
@@ -0,0 +1,203 @@
+"""
+Database-backed background jobs.
+
+Apps register handlers in their own `jobs.py` (autodiscovered by CoreConfig)
+and queue work with `enqueue`; `python manage.py run_jobs` workers claim
+queued rows, run the handler and record the outcome on the Job. Failed
+attempts are retried with exponential backoff until `max_attempts`, and
+JOB_CONCURRENCY caps how many jobs of one type run at once across workers.
+
+    @register('assessments.generate_insights')
+    def generate_insights(payload):
+        ...
+        return {'recommendations': 5}   # stored on Job.result
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_BACKOFF_SECONDS = 30
+DEFAULT_MAX_BACKOFF_SECONDS = 3600
+DEFAULT_LOCK_TIMEOUT_SECONDS = 900
+
+PENDING_STATUSES = ('queued', 'running')
+
+_handlers = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job fails immediately."""
+
+
+def register(job_type):
+    """Decorator registering `func(payload)` as the handler for `job_type`."""
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+def get_handler(job_type):
+    return _handlers.get(job_type)
+
+
+def concurrency_limit(job_type):
+    """Running jobs allowed per type; the 'default' entry covers unlisted types."""
+    limits = getattr(settings, 'JOB_CONCURRENCY', {})
+    return limits.get(job_type, limits.get('default', DEFAULT_CONCURRENCY))
+
+
+def retry_delay(attempts):
+    """Exponential backoff before retry number `attempts` + 1."""
+    base = getattr(settings, 'JOB_RETRY_BACKOFF_SECONDS', DEFAULT_BACKOFF_SECONDS)
+    cap = getattr(settings, 'JOB_RETRY_MAX_BACKOFF_SECONDS', DEFAULT_MAX_BACKOFF_SECONDS)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def enqueue(job_type, payload=None, user=None, dedupe_key=None, max_attempts=3):
+    """
+    Queue a job and return it. When `dedupe_key` matches a job that is still
+    queued or running, that job is returned instead of queueing a duplicate.
+    """
+    if job_type not in _handlers:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    if dedupe_key:
+        existing = Job.objects.filter(
+            dedupe_key=dedupe_key, status__in=PENDING_STATUSES
+        ).order_by('created_at').first()
+        if existing:
+            return existing
+
+    return Job.objects.create(
+        job_type=job_type,
+        payload=payload or {},
+        dedupe_key=dedupe_key,
+        max_attempts=max_attempts,
+        created_by=user,
+    )
+
+
+def release_stale_jobs():
+    """
+    Return jobs whose worker lease expired (the worker died mid-job) to the
+    queue, or fail them if they have no attempts left. Returns the number of
+    jobs released.
+    """
+    timeout = getattr(settings, 'JOB_LOCK_TIMEOUT_SECONDS', DEFAULT_LOCK_TIMEOUT_SECONDS)
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=timeout))
+
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed',
+        last_error='Worker lease expired',
+        locked_by=None,
+        locked_at=None,
+        finished_at=now,
+        updated_at=now,
+    )
+    return stale.update(
+        status='queued',
+        last_error='Worker lease expired',
+        locked_by=None,
+        locked_at=None,
+        run_after=now,
+        updated_at=now,
+    )
+
+
+def claim_next(worker_id):
+    """
+    Lease the oldest runnable job whose type is below its concurrency limit.
+
+    Claiming is a conditional UPDATE on status, so two workers can never run
+    the same job. The limit is re-checked after claiming and the lease given
+    back if another worker claimed the last slot at the same moment.
+    """
+    now = timezone.now()
+    running = dict(
+        Job.objects.filter(status='running')
+        .values_list('job_type')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    saturated = [job_type for job_type, count in running.items() if count >= concurrency_limit(job_type)]
+
+    candidates = (
+        Job.objects.filter(status='queued', run_after__lte=now)
+        .exclude(job_type__in=saturated)
+        .order_by('run_after', 'created_at')
+        .values_list('id', 'job_type')[:20]
+    )
+    for job_id, job_type in candidates:
+        if running.get(job_type, 0) >= concurrency_limit(job_type):
+            continue
+
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running',
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if not claimed:
+            continue
+
+        if Job.objects.filter(job_type=job_type, status='running').count() > concurrency_limit(job_type):
+            Job.objects.filter(pk=job_id, locked_by=worker_id).update(
+                status='queued',
+                locked_by=None,
+                locked_at=None,
+                attempts=F('attempts') - 1,
+            )
+            running[job_type] = concurrency_limit(job_type)
+            continue
+
+        return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """Execute a claimed job and record success, a scheduled retry, or failure."""
+    leased = Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by)
+    now = timezone.now
+
+    handler = get_handler(job.job_type)
+    try:
+        if handler is None:
+            raise PermanentJobError(f"No handler registered for {job.job_type}")
+        result = handler(job.payload)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+            leased.update(
+                status='failed', last_error=error, locked_by=None, locked_at=None,
+                finished_at=now(), updated_at=now(),
+            )
+        else:
+            leased.update(
+                status='queued', last_error=error, locked_by=None, locked_at=None,
+                run_after=now() + retry_delay(job.attempts), updated_at=now(),
+            )
+    else:
+        leased.update(
+            status='succeeded', result=result or {}, last_error=None,
+            locked_by=None, locked_at=None, finished_at=now(), updated_at=now(),
+        )
+
+    job.refresh_from_db()
+    return job
+
+
+def run_next(worker_id):
+    """Claim and run one job. Returns the finished Job, or None if nothing was runnable."""
+    job = claim_next(worker_id)
+    if job is None:
+        return None
+    return run_job(job)
@@ -0,0 +1,50 @@
+"""
+Management command: archive_audit_logs
+
+Moves audit log rows older than the hot window (AUDIT_HOT_DAYS) into gzipped
+monthly files under AUDIT_ARCHIVE_DIR (see core.archive). Archived rows stay
+searchable through the audit log API with ?include_archived=true. Safe to
+re-run; run it nightly to keep the AuditLog table small.
+
+Usage:
+    python manage.py archive_audit_logs
+    python manage.py archive_audit_logs --days 90      # keep 90 days hot
+    python manage.py archive_audit_logs --dry-run
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.archive import archive_audit_logs
+
+
+class Command(BaseCommand):
+    help = 'Archive audit log rows older than the hot window into monthly files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Keep this many days in the table (default: AUDIT_HOT_DAYS)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report how many rows each month would archive without moving them',
+        )
+
+    def handle(self, *args, **options):
+        before = None
+        if options['days'] is not None:
+            before = timezone.now() - timedelta(days=options['days'])
+
+        archived = archive_audit_logs(before=before, dry_run=options['dry_run'])
+        for month, count in archived:
+            self.stdout.write(f'{month:%Y-%m}: {count} row(s)')
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        total = sum(count for _, count in archived)
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} audit log row(s) from {len(archived)} month(s).'))
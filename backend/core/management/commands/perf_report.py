@@ -0,0 +1,68 @@
+"""
+Management command: perf_report
+
+Benchmarks every budgeted endpoint in core.perf against the current database
+and prints status codes, query counts and latency next to their budgets. Run
+it on a database prepared with seed_perf_data; budgets assume the default
+seed size.
+
+Usage:
+    python manage.py perf_report
+    python manage.py perf_report --role partner
+    python manage.py perf_report --over-budget     # only print offenders
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.perf import ENDPOINTS, PERF_USERS, ROLES, auth_header, fixture_ids, measure
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API endpoints against their status, query-count and latency budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--role', choices=ROLES, help='Only benchmark this role')
+        parser.add_argument(
+            '--over-budget',
+            action='store_true',
+            help='Only print endpoints that exceed a budget or return an unexpected status',
+        )
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(phone_number=PERF_USERS['admin']).exists():
+            raise CommandError('No performance data found; run seed_perf_data first.')
+
+        roles = [options['role']] if options['role'] else list(ROLES)
+        users = {role: User.objects.get(phone_number=PERF_USERS[role]) for role in roles}
+        ids = fixture_ids()
+        client = Client()
+        failures = 0
+
+        for endpoint in ENDPOINTS:
+            path = endpoint.path.format(**ids)
+            for role in roles:
+                result = measure(client, path, auth_header(users[role]))
+                budget = endpoint.queries[role]
+                over = (
+                    result.status_code != endpoint.status[role]
+                    or result.queries > budget
+                    or result.latency_ms > endpoint.latency_ms
+                )
+                failures += over
+                if options['over_budget'] and not over:
+                    continue
+
+                line = (
+                    f'{role:<10} {result.status_code}/{endpoint.status[role]} '
+                    f'{result.queries:>4}/{budget:<4} queries '
+                    f'{result.latency_ms:>7.1f}/{endpoint.latency_ms}ms  {endpoint.path}'
+                )
+                self.stdout.write(self.style.ERROR(line) if over else line)
+
+        if failures:
+            raise CommandError(f'{failures} endpoint/role combinations are over budget.')
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget.'))
@@ -0,0 +1,33 @@
+"""
+Management command: reconcile_notification_counters
+
+Recounts every user's unread notifications and repairs NotificationCounter
+rows that drifted from the notifications table (see core.counters). Safe to
+run at any time, e.g. nightly.
+
+Usage:
+    python manage.py reconcile_notification_counters
+    python manage.py reconcile_notification_counters --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from core.counters import reconcile_unread_counters
+
+
+class Command(BaseCommand):
+    help = 'Repair unread notification counters that drifted from the notifications table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted counters without fixing them',
+        )
+
+    def handle(self, *args, **options):
+        drifted = reconcile_unread_counters(dry_run=options['dry_run'])
+        for user_id, (stored, actual) in sorted(drifted.items()):
+            self.stdout.write(f'User {user_id}: counter {stored}, actual {actual}')
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(drifted)} drifted counter(s).'))
@@ -0,0 +1,81 @@
+"""
+Management command: run_jobs
+
+Background job worker. Claims queued core.Job rows one at a time and runs
+their registered handlers (see core.jobs). Start as many workers as needed;
+JOB_CONCURRENCY still caps how many jobs of each type run at once.
+
+Usage:
+    python manage.py run_jobs
+    python manage.py run_jobs --once                # drain the queue, then exit
+    python manage.py run_jobs --poll-interval 5 --max-jobs 100
+"""
+
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.jobs import release_stale_jobs, run_next
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when no runnable job is left instead of polling',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when the queue is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='Exit after running this many jobs',
+        )
+        parser.add_argument(
+            '--worker-id',
+            default=f'{socket.gethostname()}:{os.getpid()}',
+            help='Name recorded on the jobs this worker claims',
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id']
+        processed = 0
+        self.stdout.write(f'Worker {worker_id} started')
+
+        try:
+            while options['max_jobs'] is None or processed < options['max_jobs']:
+                # Drop a connection the database closed while we slept or
+                # one past CONN_MAX_AGE, as a request would
+                close_old_connections()
+                released = release_stale_jobs()
+                if released:
+                    self.stdout.write(self.style.WARNING(f'Requeued {released} stale job(s)'))
+
+                job = run_next(worker_id)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                processed += 1
+                line = f'{job.status:<10} {job.job_type} {job.pk} (attempt {job.attempts}/{job.max_attempts})'
+                if job.status == 'succeeded':
+                    self.stdout.write(self.style.SUCCESS(line))
+                else:
+                    self.stdout.write(self.style.ERROR(f'{line}: {job.last_error}'))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f'Worker {worker_id} stopped after {processed} job(s)')
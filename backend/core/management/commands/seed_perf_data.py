@@ -0,0 +1,462 @@
+"""
+Management command: seed_perf_data
+
+Seeds a deterministic data set for the endpoint performance budgets in
+core.perf: one admin, enterprise and partner login (see core.perf.PERF_USERS)
+plus enough surrounding rows that every list endpoint returns several items
+and every nested serializer has related objects to walk.
+
+Unlike populate_data this only touches rows it creates itself; it refuses to
+run twice against the same database.
+
+Usage:
+    python manage.py seed_perf_data
+    python manage.py seed_perf_data --enterprises 50 --investors 20
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from assessments.models import (
+    AssessmentCategory, Questionnaire, Question, QuestionOption,
+    QuestionRecommendation, Assessment, AssessmentResponse, CategoryScore,
+    Recommendation, Service,
+)
+from campaigns.models import (
+    Campaign, CampaignDocument, CampaignInterest, CampaignUpdate,
+    CampaignMessage, CampaignPartnerApplication, PartnerApplicationDocument,
+)
+from core.models import AuditLog, Notification, UserPreferences, DeletionRequest, Job
+from core.perf import PERF_USERS, PERF_PASSWORD
+from enterprises.models import (
+    Enterprise, EnterpriseDocument, BusinessProfileForm, BusinessProfileSection,
+    BusinessProfileField, EnterpriseProfileFormResponse,
+)
+from investors.matching import refresh_match_scores
+from investors.models import (
+    Investor, InvestorCriteria, Match, MatchInteraction,
+    PartnerFundingForm, FormSection, FormField,
+)
+from payments.models import SubscriptionPlan, Subscription, Payment
+
+User = get_user_model()
+
+SECTORS = ['technology', 'agriculture', 'manufacturing', 'services', 'retail']
+QUESTIONS_PER_CATEGORY = 3
+CAMPAIGNS_PER_ENTERPRISE = 3
+
+
+class Command(BaseCommand):
+    help = 'Seed a deterministic data set for the endpoint performance budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--enterprises',
+            type=int,
+            default=8,
+            help='Number of enterprises to create (default: 8)',
+        )
+        parser.add_argument(
+            '--investors',
+            type=int,
+            default=4,
+            help='Number of funding partners to create (default: 4)',
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(phone_number=PERF_USERS['admin']).exists():
+            raise CommandError('Performance data is already seeded in this database.')
+        if options['enterprises'] < 1 or options['investors'] < 1:
+            raise CommandError('Need at least one enterprise and one investor.')
+
+        # Hashing once keeps seeding fast; every perf user shares the password
+        self.password = make_password(PERF_PASSWORD)
+        self.now = timezone.now()
+
+        with transaction.atomic():
+            admin = self._user(PERF_USERS['admin'], 'admin', 'Perf', 'Admin', is_staff=True)
+            questionnaire = self._seed_questionnaire(admin)
+            profile_form = self._seed_profile_form(admin)
+            plan = self._seed_plans()
+            investors = [
+                self._seed_investor(i, admin) for i in range(options['investors'])
+            ]
+            for i in range(options['enterprises']):
+                self._seed_enterprise(i, admin, investors, questionnaire, profile_form, plan)
+            self._seed_core(admin)
+
+        written = refresh_match_scores()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['enterprises']} enterprises, {options['investors']} partners "
+            f"and {written} match scores."
+        ))
+
+    # ─── Users ────────────────────────────────────────────────────────────────
+
+    def _user(self, phone, user_type, first_name, last_name, **extra):
+        return User.objects.create(
+            phone_number=phone,
+            email=f'{phone.lstrip("+")}@perf.isonga.rw',
+            first_name=first_name,
+            last_name=last_name,
+            user_type=user_type,
+            password=self.password,
+            is_verified=True,
+            **extra,
+        )
+
+    # ─── Assessments ──────────────────────────────────────────────────────────
+
+    def _seed_questionnaire(self, admin):
+        services = [
+            Service.objects.create(name=f'Perf Service {i}', price='Free')
+            for i in range(3)
+        ]
+        questionnaire = Questionnaire.objects.create(
+            title='Perf Readiness Assessment',
+            description='Seeded for performance budgets',
+            created_by=admin,
+        )
+        order = 0
+        for c in range(2):
+            category = AssessmentCategory.objects.create(
+                name=f'Perf Category {c}',
+                description='Seeded for performance budgets',
+            )
+            for q in range(QUESTIONS_PER_CATEGORY):
+                order += 1
+                question = Question.objects.create(
+                    questionnaire=questionnaire,
+                    category=category,
+                    text=f'Perf question {order}',
+                    question_type='single_choice',
+                    order=order,
+                )
+                for score in (0, 5, 10):
+                    QuestionOption.objects.create(
+                        question=question, text=f'Score {score}', score=score, order=score,
+                    )
+                recommendation = QuestionRecommendation.objects.create(
+                    question=question,
+                    min_score=0,
+                    max_score=5,
+                    recommendation_text='Strengthen this area',
+                )
+                recommendation.recommended_services.set(services[:2])
+        questionnaire.calculate_estimated_time()
+        return questionnaire
+
+    def _seed_assessment(self, enterprise, questionnaire):
+        assessment = Assessment.objects.create(
+            enterprise=enterprise,
+            questionnaire=questionnaire,
+            fiscal_year=self.now.year,
+            status='completed',
+            started_at=self.now,
+            completed_at=self.now,
+        )
+        totals = {}
+        questions = questionnaire.questions.select_related('category').prefetch_related('options')
+        for n, question in enumerate(questions):
+            option = list(question.options.all())[n % 3]
+            response = AssessmentResponse.objects.create(
+                assessment=assessment, question=question, score=option.score,
+            )
+            response.selected_options.add(option)
+            score, max_score = totals.get(question.category, (0, 0))
+            totals[question.category] = (score + option.score, max_score + question.max_score)
+
+        total_score = sum(score for score, _ in totals.values())
+        max_possible = sum(max_score for _, max_score in totals.values())
+        for category, (score, max_score) in totals.items():
+            CategoryScore.objects.create(
+                assessment=assessment,
+                category=category,
+                score=score,
+                max_score=max_score,
+                percentage=Decimal(score * 100) / max_score,
+            )
+            recommendation = Recommendation.objects.create(
+                assessment=assessment,
+                category=category,
+                title=f'Improve {category.name}',
+                description='Seeded recommendation',
+                priority='medium',
+                suggested_actions='Review the category answers',
+            )
+            recommendation.recommended_services.set(Service.objects.all()[:1])
+        assessment.total_score = total_score
+        assessment.max_possible_score = max_possible
+        assessment.percentage_score = Decimal(total_score * 100) / max_possible
+        assessment.save()
+        return assessment
+
+    # ─── Enterprises ──────────────────────────────────────────────────────────
+
+    def _seed_profile_form(self, admin):
+        form = BusinessProfileForm.objects.create(
+            sector='_default',
+            name='Perf Default Profile Form',
+            is_default=True,
+            created_by=admin,
+        )
+        for s in range(2):
+            section = BusinessProfileSection.objects.create(form=form, title=f'Section {s}', order=s)
+            BusinessProfileField.objects.create(
+                section=section, field_type='text', label='Summary', order=0,
+            )
+            BusinessProfileField.objects.create(
+                section=section, field_type='number', label='Headcount', order=1,
+            )
+            BusinessProfileField.objects.create(
+                section=section, field_type='auto_fill', label='Business name',
+                auto_fill_source='business_name', order=2,
+            )
+        return form
+
+    def _seed_enterprise(self, i, admin, investors, questionnaire, profile_form, plan):
+        phone = PERF_USERS['enterprise'] if i == 0 else f'+2507001{i:05d}'
+        user = self._user(phone, 'enterprise', 'Perf', f'Owner {i}')
+        enterprise = Enterprise.objects.create(
+            user=user,
+            business_name=f'Perf Enterprise {i}',
+            tin_number=f'PERF{i:06d}',
+            enterprise_type='limited_company',
+            management_structure='owner_managed' if i % 2 else 'professional_management',
+            sector=SECTORS[i % len(SECTORS)],
+            district='Gasabo',
+            phone=phone,
+            year_established=2015,
+            number_of_employees=10 + i,
+            annual_revenue=Decimal('50000000'),
+            verification_status='approved',
+            is_vetted=True,
+            vetted_by=admin,
+            vetted_at=self.now,
+        )
+        for d, document_type in enumerate(['registration_certificate', 'financial_statement']):
+            EnterpriseDocument.objects.create(
+                enterprise=enterprise,
+                document_type=document_type,
+                title=f'Perf document {d}',
+                file=f'enterprise_documents/perf_{i}_{d}.pdf',
+                fiscal_year=self.now.year - 1,
+            )
+        EnterpriseProfileFormResponse.objects.create(
+            enterprise=enterprise,
+            form=profile_form,
+            responses={
+                str(field_id): 'Perf answer'
+                for field_id in BusinessProfileField.objects.filter(
+                    section__form=profile_form
+                ).values_list('id', flat=True)
+            },
+            submitted_at=self.now,
+        )
+        assessment = self._seed_assessment(enterprise, questionnaire)
+
+        subscription = Subscription.objects.create(
+            enterprise=enterprise,
+            plan=plan,
+            start_date=self.now,
+            end_date=self.now + timedelta(days=365),
+            status='active',
+        )
+        Payment.objects.create(
+            subscription=subscription,
+            enterprise=enterprise,
+            amount=plan.price,
+            payment_method='mobile_money',
+            status='completed',
+        )
+
+        for c in range(CAMPAIGNS_PER_ENTERPRISE):
+            self._seed_campaign(enterprise, c, admin, investors, assessment)
+
+    def _seed_campaign(self, enterprise, c, admin, investors, assessment):
+        active = c < CAMPAIGNS_PER_ENTERPRISE - 1
+        campaign = Campaign.objects.create(
+            enterprise=enterprise,
+            title=f'{enterprise.business_name} round {c}',
+            description='Seeded campaign',
+            campaign_type='equity' if c % 2 else 'debt',
+            target_amount=Decimal('10000000') * (c + 1),
+            min_investment=Decimal('100000'),
+            amount_raised=Decimal('1000000'),
+            status='active' if active else 'draft',
+            is_vetted=active,
+            vetted_by=admin if active else None,
+            vetted_at=self.now if active else None,
+            readiness_score_at_submission=assessment.percentage_score,
+            use_of_funds={'equipment': 60, 'working_capital': 40},
+        )
+        # The last partner only sees campaigns targeted at it; the rest are open
+        if c == 1:
+            campaign.target_partners.set(investors[-1:])
+        for d, is_public in enumerate([True, False]):
+            CampaignDocument.objects.create(
+                campaign=campaign,
+                document_type='pitch_deck' if is_public else 'business_plan',
+                title=f'Perf campaign document {d}',
+                file=f'campaign_documents/perf_{campaign.pk}_{d}.pdf',
+                is_public=is_public,
+            )
+        CampaignUpdate.objects.create(
+            campaign=campaign,
+            title='Progress update',
+            content='Seeded update',
+            posted_by=enterprise.user,
+        )
+        if not active:
+            return
+
+        for investor in investors:
+            interest = CampaignInterest.objects.create(
+                campaign=campaign,
+                investor=investor,
+                status='pledged',
+                interest_amount=Decimal('500000'),
+                committed_amount=Decimal('500000'),
+            )
+            CampaignMessage.objects.create(
+                campaign=campaign,
+                sender=investor.user,
+                receiver=enterprise.user,
+                interest=interest,
+                content='Seeded question',
+            )
+            CampaignMessage.objects.create(
+                campaign=campaign,
+                sender=enterprise.user,
+                receiver=investor.user,
+                interest=interest,
+                content='Seeded answer',
+            )
+            match = Match.objects.create(
+                investor=investor,
+                enterprise=enterprise,
+                campaign=campaign,
+                match_score=Decimal('50'),
+                status='engaged',
+            )
+            MatchInteraction.objects.create(
+                match=match,
+                initiated_by=investor.user,
+                interaction_type='message',
+                content='Seeded interaction',
+            )
+
+            funding_form = investor.funding_forms.first()
+            application = CampaignPartnerApplication.objects.create(
+                campaign=campaign,
+                partner=investor,
+                funding_form=funding_form,
+                status='submitted',
+                form_responses={},
+                submitted_at=self.now,
+            )
+            PartnerApplicationDocument.objects.create(
+                application=application,
+                document_key='financial_statement',
+                document_name='Financial Statements',
+                file=f'application_documents/perf_{application.pk}.pdf',
+            )
+
+    # ─── Partners ─────────────────────────────────────────────────────────────
+
+    def _seed_investor(self, i, admin):
+        phone = PERF_USERS['partner'] if i == 0 else f'+2507002{i:05d}'
+        user = self._user(phone, 'investor', 'Perf', f'Partner {i}')
+        investor = Investor.objects.create(
+            user=user,
+            investor_type='bank' if i % 2 else 'vc',
+            organization_name=f'Perf Partner {i}',
+            contact_email=user.email,
+            min_investment=Decimal('100000'),
+            max_investment=Decimal('50000000'),
+            created_by=admin,
+        )
+        InvestorCriteria.objects.create(
+            investor=investor,
+            sectors=SECTORS[:3] if i % 2 else SECTORS,
+            min_funding_amount=Decimal('1000000'),
+            max_funding_amount=Decimal('100000000'),
+            preferred_sizes=['owner_managed'],
+            required_documents=[{
+                'name': 'Financial Statements',
+                'type': 'financial_statement',
+                'required': True,
+            }],
+        )
+        form = PartnerFundingForm.objects.create(
+            partner=investor,
+            name=f'Perf Partner {i} Loan Application',
+            funding_type='loan',
+            status='active',
+            created_by=admin,
+        )
+        for s in range(2):
+            section = FormSection.objects.create(form=form, title=f'Section {s}', order=s)
+            FormField.objects.create(
+                section=section, field_type='number', label='Loan amount', order=0,
+            )
+            FormField.objects.create(
+                section=section, field_type='auto_fill', label='Business name',
+                auto_fill_source='profile.business_name', order=1,
+            )
+            FormField.objects.create(
+                section=section, field_type='file', label='Bank statement',
+                accepted_file_types=['.pdf'], order=2,
+            )
+        return investor
+
+    # ─── Payments and core ────────────────────────────────────────────────────
+
+    def _seed_plans(self):
+        SubscriptionPlan.objects.create(
+            name='Perf Basic', description='Seeded plan', price=Decimal('0'),
+        )
+        return SubscriptionPlan.objects.create(
+            name='Perf Premium',
+            description='Seeded plan',
+            price=Decimal('100'),
+            features=['assessments', 'matching'],
+        )
+
+    def _seed_core(self, admin):
+        for phone in PERF_USERS.values():
+            user = User.objects.get(phone_number=phone)
+            UserPreferences.objects.create(user=user)
+            for n in range(5):
+                Notification.objects.create(
+                    user=user,
+                    notification_type='system',
+                    title=f'Perf notification {n}',
+                    message='Seeded notification',
+                    is_read=n % 2 == 0,
+                )
+            for n in range(5):
+                AuditLog.objects.create(
+                    user=user,
+                    action='update' if n % 2 else 'create',
+                    model_name='Campaign',
+                    object_repr=f'Perf object {n}',
+                    changes={'status': ['draft', 'active']},
+                )
+        DeletionRequest.objects.create(
+            user=User.objects.get(phone_number=PERF_USERS['enterprise']),
+            reason='Seeded deletion request',
+        )
+        for status in ('queued', 'succeeded', 'failed'):
+            Job.objects.create(
+                job_type='assessments.generate_insights',
+                payload={'assessment_id': 0},
+                status=status,
+                created_by=admin,
+            )
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:00
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('assessment_completed', 'Assessment Completed'), ('payment_received', 'Payment Received'), ('document_requested', 'Document Requested'), ('document_uploaded', 'Document Uploaded'), ('match_found', 'Match Found'), ('investor_interest', 'Investor Interest'), ('campaign_update', 'Campaign Update'), ('campaign_status', 'Campaign Status Change'), ('pledge_received', 'Pledge Received'), ('pledge_accepted', 'Pledge Accepted'), ('pledge_declined', 'Pledge Declined'), ('new_message', 'New Message'), ('verification_update', 'Verification Update'), ('system', 'System Notification')], max_length=30),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('job_type', models.CharField(help_text='Name the handler was registered under in core.jobs', max_length=100)),
+                ('payload', models.JSONField(default=dict)),
+                ('dedupe_key', models.CharField(blank=True, max_length=255, null=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=100, null=True)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='core_job_status_df1a33_idx'), models.Index(fields=['job_type', 'status'], name='core_job_job_typ_61d35d_idx'), models.Index(fields=['dedupe_key', 'status'], name='core_job_dedupe__4ce420_idx')],
+            },
+        ),
+    ]
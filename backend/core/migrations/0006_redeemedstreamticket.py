@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_auditarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RedeemedStreamTicket',
+            fields=[
+                ('nonce', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('redeemed_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
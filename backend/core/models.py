@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 import uuid
 
 User = get_user_model()
@@ -49,9 +50,32 @@ class AuditLog(models.Model):
         indexes = [
             models.Index(fields=['user', 'action']),
             models.Index(fields=['model_name', 'timestamp']),
+            # Keyset pagination of the (optionally filtered) log
+            models.Index(fields=['-timestamp']),
+            models.Index(fields=['user', '-timestamp']),
+            models.Index(fields=['action', '-timestamp']),
         ]
 
 
+class AuditArchive(models.Model):
+    """
+    One month of audit log moved out of AuditLog into a gzipped JSON-lines
+    file by core.archive. Searches read only the months a query can match.
+    """
+    month = models.DateField(unique=True, help_text="First day of the archived month")
+    path = models.CharField(max_length=500)
+    row_count = models.IntegerField(default=0)
+    first_timestamp = models.DateTimeField()
+    last_timestamp = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Audit archive {self.month:%Y-%m} ({self.row_count} rows)"
+
+    class Meta:
+        ordering = ['-month']
+
 class Notification(models.Model):
     """Notifications for users"""
     NOTIFICATION_TYPES = (
@@ -104,6 +128,24 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # The notification feed and the unread list / badge
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'is_read', '-created_at']),
+        ]
+
+
+class NotificationCounter(models.Model):
+    """
+    Denormalized count of a user's unread notifications, maintained by
+    core.counters so the unread badge never has to COUNT(*) the table.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user}: {self.unread} unread"
 
 
 class UserPreferences(models.Model):
@@ -164,3 +206,61 @@ class DeletionRequest(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+
+class Job(models.Model):
+    """Background job queued in the database and executed by `run_jobs` workers"""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job_type = models.CharField(max_length=100, help_text="Name the handler was registered under in core.jobs")
+    payload = models.JSONField(default=dict)
+    # Jobs sharing a key are not queued twice while one is still pending
+    dedupe_key = models.CharField(max_length=255, blank=True, null=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    # Worker lease
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    result = models.JSONField(default=dict, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.job_type} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['job_type', 'status']),
+            models.Index(fields=['dedupe_key', 'status']),
+        ]
+
+
+class RedeemedStreamTicket(models.Model):
+    """
+    Event stream tickets that have been used (core.streams). Tickets are
+    signed, so any worker can check them; this table makes each one
+    single-use. Rows older than the ticket lifetime are pruned as new
+    tickets are redeemed.
+    """
+    nonce = models.CharField(max_length=64, primary_key=True)
+    redeemed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Stream ticket {self.nonce}"
@@ -0,0 +1,249 @@
+"""
+Notification dispatcher.
+
+`notify()` queues an in-app Notification. Inside a transaction the
+notifications are buffered and written with one bulk_create when the
+transaction commits (nothing is written if it rolls back); in autocommit
+mode they are written straight away.
+
+Notifications sharing a `coalesce_key` (e.g. messages in one campaign thread)
+are merged: within a buffer the latest one wins, and an existing unread row
+for the same user, type and key is updated instead of adding another row.
+metadata['count'] records how many notifications were merged. New rows are
+added to the users' unread counters (core.counters) and pushed to their
+open event streams (core.events).
+
+Email, WhatsApp and SMS delivery runs off the request path: after the rows
+are written a core.jobs job is queued per channel, and the worker hands the
+notifications to the backend configured in NOTIFICATION_DELIVERY_BACKENDS
+for that channel, honouring each user's UserPreferences.
+"""
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .counters import adjust_unread
+from .events import publish_to_users
+from .jobs import enqueue, register
+from .models import Notification, UserPreferences
+from .transactions import transaction_buffer
+
+
+logger = logging.getLogger(__name__)
+
+DELIVER_NOTIFICATIONS = 'core.deliver_notifications'
+
+_local = threading.local()
+
+
+class NotificationBuffer:
+    """Notifications queued during one transaction, flushed on commit"""
+
+    def __init__(self):
+        self.notifications = {}
+
+    def add(self, notification):
+        key = _coalesce_identity(notification) or id(notification)
+        previous = self.notifications.pop(key, None)
+        if previous is not None:
+            notification.metadata['count'] = previous.metadata['count'] + notification.metadata['count']
+        self.notifications[key] = notification
+
+    def flush(self):
+        dispatch(list(self.notifications.values()))
+
+
+def _coalesce_identity(notification):
+    key = notification.metadata.get('coalesce_key')
+    if key:
+        return (notification.user_id, notification.notification_type, key)
+    return None
+
+
+def notify(user, notification_type, title, message, action_url=None, metadata=None, coalesce_key=None):
+    """Queue an in-app notification for `user` (a User or user id)."""
+    metadata = dict(metadata or {})
+    metadata['count'] = 1
+    if coalesce_key:
+        metadata['coalesce_key'] = coalesce_key
+
+    notification = Notification(
+        user_id=getattr(user, 'pk', user),
+        notification_type=notification_type,
+        title=title,
+        message=message,
+        action_url=action_url or '',
+        metadata=metadata,
+    )
+
+    if not connection.in_atomic_block:
+        dispatch([notification])
+        return
+
+    transaction_buffer(_local, NotificationBuffer).add(notification)
+
+
+def dispatch(notifications):
+    """
+    Write notifications, merging coalescable ones into unread rows, then
+    queue external delivery. Failures are logged and never raised so a
+    notification problem cannot break the main flow.
+    """
+    if not notifications:
+        return
+    try:
+        with transaction.atomic():
+            created, updated = _merge_with_unread(notifications)
+            Notification.objects.bulk_create(created)
+            adjust_unread(Counter(notification.user_id for notification in created))
+            if updated:
+                Notification.objects.bulk_update(
+                    updated, ['title', 'message', 'action_url', 'metadata', 'created_at']
+                )
+        publish_notifications(created + updated)
+        queue_delivery(created + updated)
+    except Exception:
+        logger.exception('Failed to dispatch %d notification(s)', len(notifications))
+
+
+def _merge_with_unread(notifications):
+    keyed = {}
+    for notification in notifications:
+        identity = _coalesce_identity(notification)
+        if identity:
+            keyed[identity] = notification
+    if not keyed:
+        return notifications, []
+
+    existing = {}
+    unread = Notification.objects.filter(
+        is_read=False,
+        user_id__in={user_id for user_id, _, _ in keyed},
+        metadata__coalesce_key__in={key for _, _, key in keyed},
+    ).order_by('created_at')
+    for row in unread:
+        existing[_coalesce_identity(row)] = row
+
+    created, updated = [], []
+    now = timezone.now()
+    for notification in notifications:
+        row = existing.get(_coalesce_identity(notification))
+        if row is None:
+            created.append(notification)
+            continue
+        row.title = notification.title
+        row.message = notification.message
+        row.action_url = notification.action_url
+        row.metadata = {
+            **row.metadata,
+            **notification.metadata,
+            'count': row.metadata.get('count', 1) + notification.metadata['count'],
+        }
+        row.created_at = now
+        updated.append(row)
+    return created, updated
+
+
+def publish_notifications(notifications):
+    """Push written notifications to their users' open event streams"""
+    publish_to_users([
+        (notification.user_id, 'notification', {
+            'id': str(notification.pk),
+            'notification_type': notification.notification_type,
+            'title': notification.title,
+            'message': notification.message,
+            'action_url': notification.action_url,
+            'metadata': notification.metadata,
+            'created_at': notification.created_at,
+        })
+        for notification in notifications
+    ])
+
+
+# ---------------------------------------------------------------------------
+# External delivery
+# ---------------------------------------------------------------------------
+
+def delivery_backends():
+    """Channel -> backend class path, from NOTIFICATION_DELIVERY_BACKENDS"""
+    return getattr(settings, 'NOTIFICATION_DELIVERY_BACKENDS', {})
+
+
+def get_delivery_backend(channel):
+    path = delivery_backends().get(channel)
+    return import_string(path)() if path else None
+
+
+def queue_delivery(notifications):
+    """Queue one delivery job per channel for users who opted in to it."""
+    channels = [channel for channel in delivery_backends() if channel != 'in_app']
+    if not channels or not notifications:
+        return
+
+    preferences = {
+        prefs.user_id: prefs
+        for prefs in UserPreferences.objects.filter(user_id__in={n.user_id for n in notifications})
+    }
+    defaults = UserPreferences()
+
+    by_channel = defaultdict(list)
+    for notification in notifications:
+        prefs = preferences.get(notification.user_id, defaults)
+        for channel in channels:
+            if getattr(prefs, f'{channel}_notifications', False):
+                by_channel[channel].append(str(notification.pk))
+
+    for channel, notification_ids in by_channel.items():
+        enqueue(DELIVER_NOTIFICATIONS, {'channel': channel, 'notification_ids': notification_ids})
+
+
+@register(DELIVER_NOTIFICATIONS)
+def deliver_notifications(payload):
+    """Job handler: send the given notifications through one channel's backend"""
+    backend = get_delivery_backend(payload['channel'])
+    if backend is None:
+        return {'channel': payload['channel'], 'sent': 0}
+    notifications = list(
+        Notification.objects.filter(pk__in=payload['notification_ids']).select_related('user')
+    )
+    return {'channel': payload['channel'], 'sent': backend.send(notifications)}
+
+
+class BaseDeliveryBackend:
+    """Delivers notifications over one external channel. Subclasses implement send()."""
+
+    def send(self, notifications):
+        """Send each notification to its user; return how many were sent."""
+        raise NotImplementedError
+
+
+class EmailBackend(BaseDeliveryBackend):
+    """Sends notifications with Django's configured EMAIL_BACKEND"""
+
+    def send(self, notifications):
+        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5173')
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@isonga.rw')
+        messages = []
+        for notification in notifications:
+            if not notification.user.email:
+                continue
+            body = notification.message
+            if notification.action_url:
+                body += f"\n\n{frontend_url}{notification.action_url}"
+            messages.append((notification.title, body, from_email, [notification.user.email]))
+        return send_mass_mail(messages, fail_silently=True) if messages else 0
+
+
+class ConsoleBackend(BaseDeliveryBackend):
+    """Logs notifications; a stand-in for channels without a provider yet"""
+
+    def send(self, notifications):
+        for notification in notifications:
+            logger.info('%s: %s - %s', notification.user_id, notification.title, notification.message)
+        return len(notifications)
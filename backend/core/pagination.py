@@ -0,0 +1,26 @@
+"""
+Cursor (keyset) pagination for the append-only, high-volume feeds.
+
+Unlike the global PageNumberPagination these never run COUNT(*) or OFFSET:
+each page is a `WHERE created_at < <cursor>` range read off a composite index
+that starts with the filtering column(s), so page 500 costs the same as page
+1. Responses carry `next` / `previous` links but no total `count`.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class FeedCursorPagination(CursorPagination):
+    """Newest first by created_at; ?page_size= up to 100"""
+    ordering = '-created_at'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class AuditLogCursorPagination(FeedCursorPagination):
+    # id breaks ties, so the last row of the final page is a valid archive keyset cursor
+    ordering = ('-timestamp', '-id')
+
+
+class ThreadCursorPagination(FeedCursorPagination):
+    """Oldest first, for message threads read top to bottom"""
+    ordering = 'created_at'
@@ -0,0 +1,300 @@
+"""
+Query-count and latency budgets for the REST API.
+
+Every endpoint mounted through isonga/urls.py is listed in ENDPOINTS with the
+number of SQL queries it may issue for each role against the data set created
+by `manage.py seed_perf_data`, and the status code each role gets back. A
+serializer that starts querying per row pushes its endpoint over budget,
+which fails core.tests.EndpointBudgetTests and shows up in
+`manage.py perf_report`. So does an endpoint that starts refusing a role it
+used to serve (or the reverse), since a refused request costs fewer queries.
+
+Budgets are exact counts for the seeded data; when a change legitimately
+adds or removes a query, or changes who may call an endpoint, update the
+entry in the same commit.
+"""
+import time
+from collections import namedtuple
+
+from django.db import connection
+
+
+PERF_PASSWORD = 'perf-pass-123'
+
+PERF_USERS = {
+    'admin': '+250700000000',
+    'enterprise': '+250700100000',
+    'partner': '+250700200000',
+}
+
+ROLES = tuple(PERF_USERS)
+
+# Wall-clock ceiling per request on SQLite, for catching accidental O(n) work
+# in Python. perf_report always compares it; EndpointBudgetTests only with
+# PERF_CHECK_LATENCY, since timings on a shared CI box are noisy
+DEFAULT_LATENCY_MS = 300
+
+Endpoint = namedtuple('Endpoint', ['path', 'queries', 'latency_ms', 'status'])
+
+
+def endpoint(path, admin, enterprise, partner, latency_ms=DEFAULT_LATENCY_MS, status=None):
+    """`status` maps the roles that are refused (403/404) to their status code; the rest expect 200"""
+    return Endpoint(
+        path,
+        {'admin': admin, 'enterprise': enterprise, 'partner': partner},
+        latency_ms,
+        {role: (status or {}).get(role, 200) for role in ROLES},
+    )
+
+
+ENDPOINTS = [
+    # accounts
+    endpoint('/api/accounts/api/users/', admin=3, enterprise=1, partner=1, status={'enterprise': 403, 'partner': 403}),
+    endpoint('/api/accounts/api/users/{user}/', admin=2, enterprise=1, partner=1,
+             status={'enterprise': 403, 'partner': 403}),
+    endpoint('/api/accounts/api/users/profile/', admin=1, enterprise=1, partner=1),
+
+    # enterprises
+    endpoint('/api/enterprises/api/enterprises/', admin=14, enterprise=7, partner=1),
+    endpoint('/api/enterprises/api/enterprises/{enterprise}/', admin=7, enterprise=7, partner=1,
+             status={'partner': 404}),
+    endpoint('/api/enterprises/api/enterprises/my-enterprise/', admin=1, enterprise=7, partner=1,
+             status={'admin': 403, 'partner': 403}),
+    endpoint('/api/enterprises/api/enterprises/{enterprise}/documents/', admin=3, enterprise=4, partner=3),
+    endpoint('/api/enterprises/api/documents/', admin=3, enterprise=3, partner=1),
+    endpoint('/api/enterprises/api/documents/{enterprise_document}/', admin=2, enterprise=2, partner=1,
+             status={'partner': 404}),
+    endpoint('/api/enterprises/api/profile-forms/', admin=6, enterprise=6, partner=6),
+    endpoint('/api/enterprises/api/profile-forms/{profile_form}/', admin=5, enterprise=5, partner=5),
+    endpoint('/api/enterprises/api/profile-forms/{profile_form}/auto-fill/', admin=1, enterprise=3, partner=1,
+             status={'admin': 403, 'partner': 403}),
+    endpoint('/api/enterprises/api/profile-forms/by-sector/?sector=technology', admin=6, enterprise=6, partner=6),
+    endpoint('/api/enterprises/api/profile-responses/', admin=35, enterprise=8, partner=1),
+    endpoint('/api/enterprises/api/profile-responses/{profile_response}/', admin=6, enterprise=7, partner=1,
+             status={'partner': 404}),
+    endpoint('/api/enterprises/api/profile-responses/mine/', admin=1, enterprise=6, partner=1,
+             status={'admin': 403, 'partner': 403}),
+
+    # assessments
+    endpoint('/api/assessments/api/categories/', admin=3, enterprise=3, partner=3),
+    endpoint('/api/assessments/api/categories/{category}/', admin=2, enterprise=2, partner=2),
+    endpoint('/api/assessments/api/questionnaires/', admin=24, enterprise=24, partner=24),
+    endpoint('/api/assessments/api/questionnaires/{questionnaire}/', admin=23, enterprise=23, partner=23),
+    endpoint('/api/assessments/api/assessments/', admin=27, enterprise=6, partner=1),
+    endpoint('/api/assessments/api/assessments/{assessment}/', admin=40, enterprise=40, partner=1,
+             status={'partner': 404}),
+    endpoint('/api/assessments/api/assessments/readiness_score/', admin=1, enterprise=2, partner=1),
+    endpoint('/api/assessments/api/responses/', admin=23, enterprise=9, partner=1),
+    endpoint('/api/assessments/api/responses/{response}/', admin=3, enterprise=3, partner=1, status={'partner': 404}),
+    endpoint('/api/assessments/api/services/', admin=3, enterprise=3, partner=3),
+    endpoint('/api/assessments/api/services/{service}/', admin=2, enterprise=2, partner=2),
+
+    # payments
+    endpoint('/api/payments/api/plans/', admin=3, enterprise=3, partner=3),
+    endpoint('/api/payments/api/plans/{plan}/', admin=2, enterprise=2, partner=2),
+    endpoint('/api/payments/api/subscriptions/', admin=19, enterprise=5, partner=1),
+    endpoint('/api/payments/api/subscriptions/{subscription}/', admin=4, enterprise=4, partner=1,
+             status={'partner': 404}),
+    endpoint('/api/payments/api/payments/', admin=11, enterprise=4, partner=1),
+    endpoint('/api/payments/api/payments/{payment}/', admin=3, enterprise=3, partner=1, status={'partner': 404}),
+
+    # admin_dashboard
+    # Cached for ADMIN_DASHBOARD_CACHE_TTL; measure() counts the last of its
+    # runs, so these budgets are for a warm cache
+    endpoint('/api/admin_dashboard/api/dashboard-stats/', admin=1, enterprise=1, partner=1,
+             status={'enterprise': 403, 'partner': 403}),
+    endpoint('/api/admin_dashboard/api/recent-assessments/', admin=290, enterprise=1, partner=1, latency_ms=1400,
+             status={'enterprise': 403, 'partner': 403}),
+    endpoint('/api/admin_dashboard/api/recent-enterprises/', admin=58, enterprise=1, partner=1, latency_ms=400,
+             status={'enterprise': 403, 'partner': 403}),
+    endpoint('/api/admin_dashboard/api/system-metrics/', admin=1, enterprise=1, partner=1,
+             status={'enterprise': 403, 'partner': 403}),
+    endpoint('/api/admin_dashboard/api/timeseries/?metric=users&granularity=month&start=2025-01-15&by_dimension=true',
+             admin=4, enterprise=1, partner=1, status={'enterprise': 403, 'partner': 403}),
+
+    # investors
+    endpoint('/api/investors/profiles/', admin=11, enterprise=11, partner=5),
+    endpoint('/api/investors/profiles/{investor}/', admin=4, enterprise=4, partner=4),
+    endpoint('/api/investors/profiles/my_profile/', admin=1, enterprise=1, partner=2,
+             status={'admin': 404, 'enterprise': 404}),
+    endpoint('/api/investors/profiles/stats/', admin=1, enterprise=1, partner=5,
+             status={'admin': 403, 'enterprise': 403}),
+    endpoint('/api/investors/profiles/{investor}/criteria/', admin=3, enterprise=3, partner=3),
+    endpoint('/api/investors/criteria/', admin=3, enterprise=1, partner=3),
+    endpoint('/api/investors/criteria/{criteria}/', admin=2, enterprise=1, partner=2, status={'enterprise': 404}),
+    endpoint('/api/investors/matches/', admin=3, enterprise=3, partner=3),
+    endpoint('/api/investors/matches/{match}/', admin=4, enterprise=4, partner=4),
+    endpoint('/api/investors/matches/find_matches/', admin=1, enterprise=1, partner=3,
+             status={'admin': 403, 'enterprise': 403}),
+    endpoint('/api/investors/interactions/', admin=23, enterprise=11, partner=19),
+    endpoint('/api/investors/interactions/{interaction}/', admin=3, enterprise=3, partner=3),
+    endpoint('/api/investors/funding-forms/', admin=5, enterprise=5, partner=5),
+    endpoint('/api/investors/funding-forms/{funding_form}/', admin=4, enterprise=4, partner=4),
+    endpoint('/api/investors/funding-forms/{funding_form}/auto-fill/', admin=1, enterprise=2, partner=1,
+             status={'admin': 403, 'partner': 403}),
+    endpoint('/api/investors/form-sections/', admin=4, enterprise=1, partner=4, status={'enterprise': 403}),
+    endpoint('/api/investors/form-sections/{form_section}/', admin=3, enterprise=1, partner=3,
+             status={'enterprise': 403}),
+    endpoint('/api/investors/form-fields/', admin=3, enterprise=1, partner=3, status={'enterprise': 403}),
+    endpoint('/api/investors/form-fields/{form_field}/', admin=2, enterprise=1, partner=2, status={'enterprise': 403}),
+    endpoint('/api/investors/opportunities/', admin=1, enterprise=1, partner=5),
+    endpoint('/api/investors/interested-campaigns/', admin=1, enterprise=1, partner=3),
+
+    # campaigns
+    endpoint('/api/campaigns/api/campaigns/', admin=4, enterprise=4, partner=5),
+    endpoint('/api/campaigns/api/campaigns/{campaign}/', admin=23, enterprise=23, partner=24),
+    endpoint('/api/campaigns/api/campaigns/my_campaigns/', admin=1, enterprise=3, partner=1),
+    endpoint('/api/campaigns/api/campaigns/active/', admin=2, enterprise=2, partner=2),
+    endpoint('/api/campaigns/api/campaigns/{campaign}/check_eligibility/', admin=9, enterprise=9, partner=10),
+    endpoint('/api/campaigns/api/campaigns/{campaign}/partner-application/', admin=2, enterprise=2, partner=15,
+             status={'admin': 403, 'enterprise': 403}),
+    endpoint('/api/campaigns/api/documents/?campaign_id={campaign}', admin=3, enterprise=3, partner=3),
+    endpoint('/api/campaigns/api/documents/{campaign_document}/?campaign_id={campaign}', admin=2, enterprise=2, partner=2),
+    endpoint('/api/campaigns/api/interests/', admin=1, enterprise=11, partner=19),
+    endpoint('/api/campaigns/api/interests/{interest}/', admin=1, enterprise=3, partner=3, status={'admin': 404}),
+    endpoint('/api/campaigns/api/updates/?campaign_id={campaign}', admin=4, enterprise=4, partner=4),
+    endpoint('/api/campaigns/api/updates/{update}/?campaign_id={campaign}', admin=3, enterprise=3, partner=3),
+    endpoint('/api/campaigns/api/messages/', admin=2, enterprise=2, partner=2),
+    endpoint('/api/campaigns/api/messages/{message}/', admin=2, enterprise=2, partner=2, status={'admin': 404}),
+    endpoint('/api/campaigns/api/partner-applications/', admin=83, enterprise=35, partner=67, latency_ms=400),
+    endpoint('/api/campaigns/api/partner-applications/{application}/', admin=13, enterprise=13, partner=13),
+    endpoint('/api/campaigns/api/partner-applications/my_applications/', admin=1, enterprise=34, partner=66, latency_ms=300),
+    endpoint('/api/campaigns/api/partner-applications/by_campaign/?campaign_id={campaign}', admin=19, enterprise=20, partner=2,
+             status={'partner': 403}),
+    endpoint('/api/campaigns/api/partner-applications/{application}/required-docs/', admin=5, enterprise=5, partner=5),
+    endpoint('/api/campaigns/api/application-documents/', admin=3, enterprise=3, partner=3),
+    endpoint('/api/campaigns/api/application-documents/{application_document}/', admin=2, enterprise=2, partner=2),
+
+    # core
+    # The last hot page checks for archived months to continue into
+    endpoint('/api/core/api/audit-logs/', admin=3, enterprise=1, partner=1, status={'enterprise': 403, 'partner': 403}),
+    endpoint('/api/core/api/audit-logs/{audit_log}/', admin=2, enterprise=1, partner=1,
+             status={'enterprise': 403, 'partner': 403}),
+    endpoint('/api/core/api/audit-logs/summary/', admin=3, enterprise=1, partner=1,
+             status={'enterprise': 403, 'partner': 403}),
+    # /api/core/api/stream/ (core.streams) is a long-lived ASGI event stream and has no budget
+    endpoint('/api/core/api/notifications/', admin=2, enterprise=2, partner=2),
+    endpoint('/api/core/api/notifications/{notification}/', admin=2, enterprise=2, partner=2,
+             status={'admin': 404, 'partner': 404}),
+    endpoint('/api/core/api/notifications/unread/', admin=2, enterprise=2, partner=2),
+    # Served from the cached NotificationCounter after the first poll
+    endpoint('/api/core/api/notifications/unread_count/', admin=1, enterprise=1, partner=1),
+    endpoint('/api/core/api/preferences/', admin=2, enterprise=2, partner=2),
+    endpoint('/api/core/api/preferences/{preferences}/', admin=2, enterprise=2, partner=2),
+    endpoint('/api/core/api/deletion-requests/', admin=4, enterprise=4, partner=2),
+    endpoint('/api/core/api/deletion-requests/{deletion_request}/', admin=3, enterprise=3, partner=2,
+             status={'partner': 404}),
+    endpoint('/api/core/api/jobs/', admin=3, enterprise=2, partner=2),
+    endpoint('/api/core/api/jobs/{job}/', admin=2, enterprise=2, partner=2, status={'enterprise': 404, 'partner': 404}),
+]
+
+
+Measurement = namedtuple('Measurement', ['status_code', 'queries', 'latency_ms'])
+
+
+def fixture_ids():
+    """
+    Primary keys substituted into ENDPOINTS paths. Objects belong to the perf
+    enterprise and partner so detail routes resolve for their owners.
+    """
+    from django.contrib.auth import get_user_model
+    from assessments.models import (
+        AssessmentCategory, Questionnaire, Assessment, AssessmentResponse, Service,
+    )
+    from campaigns.models import (
+        Campaign, CampaignDocument, CampaignInterest, CampaignUpdate,
+        CampaignMessage, CampaignPartnerApplication, PartnerApplicationDocument,
+    )
+    from core.models import AuditLog, Notification, UserPreferences, DeletionRequest, Job
+    from enterprises.models import (
+        Enterprise, EnterpriseDocument, BusinessProfileForm, EnterpriseProfileFormResponse,
+    )
+    from investors.models import (
+        Investor, InvestorCriteria, Match, MatchInteraction,
+        PartnerFundingForm, FormSection, FormField,
+    )
+    from payments.models import SubscriptionPlan, Subscription, Payment
+
+    User = get_user_model()
+    enterprise_user = User.objects.get(phone_number=PERF_USERS['enterprise'])
+    enterprise = Enterprise.objects.get(user=enterprise_user)
+    investor = Investor.objects.get(user__phone_number=PERF_USERS['partner'])
+    campaign = Campaign.objects.filter(
+        enterprise=enterprise, status='active', target_partners__isnull=True,
+    ).order_by('created_at').first()
+    application = CampaignPartnerApplication.objects.get(campaign=campaign, partner=investor)
+    match = Match.objects.get(campaign=campaign, investor=investor)
+    funding_form = investor.funding_forms.first()
+    assessment = Assessment.objects.filter(enterprise=enterprise).first()
+
+    return {
+        'user': enterprise_user.pk,
+        'enterprise': enterprise.pk,
+        'enterprise_document': EnterpriseDocument.objects.filter(enterprise=enterprise).first().pk,
+        'profile_form': BusinessProfileForm.objects.first().pk,
+        'profile_response': EnterpriseProfileFormResponse.objects.get(enterprise=enterprise).pk,
+        'category': AssessmentCategory.objects.first().pk,
+        'questionnaire': Questionnaire.objects.first().pk,
+        'assessment': assessment.pk,
+        'response': AssessmentResponse.objects.filter(assessment=assessment).first().pk,
+        'service': Service.objects.first().pk,
+        'plan': SubscriptionPlan.objects.first().pk,
+        'subscription': Subscription.objects.filter(enterprise=enterprise).first().pk,
+        'payment': Payment.objects.filter(enterprise=enterprise).first().pk,
+        'investor': investor.pk,
+        'criteria': InvestorCriteria.objects.filter(investor=investor).first().pk,
+        'match': match.pk,
+        'interaction': MatchInteraction.objects.filter(match=match).first().pk,
+        'funding_form': funding_form.pk,
+        'form_section': FormSection.objects.filter(form=funding_form).first().pk,
+        'form_field': FormField.objects.filter(section__form=funding_form).first().pk,
+        'campaign': campaign.pk,
+        'campaign_document': CampaignDocument.objects.filter(campaign=campaign).first().pk,
+        'interest': CampaignInterest.objects.get(campaign=campaign, investor=investor).pk,
+        'update': CampaignUpdate.objects.filter(campaign=campaign).first().pk,
+        'message': CampaignMessage.objects.filter(campaign=campaign).first().pk,
+        'application': application.pk,
+        'application_document': PartnerApplicationDocument.objects.filter(
+            application=application
+        ).first().pk,
+        'audit_log': AuditLog.objects.first().pk,
+        'notification': Notification.objects.filter(user=enterprise_user).first().pk,
+        'preferences': UserPreferences.objects.get(user=enterprise_user).pk,
+        'deletion_request': DeletionRequest.objects.first().pk,
+        'job': Job.objects.first().pk,
+    }
+
+
+def auth_header(user):
+    """Authorization header carrying a fresh access token, as the frontend sends it."""
+    from rest_framework_simplejwt.tokens import AccessToken
+    return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+
+class QueryCounter:
+    """
+    connection.execute_wrapper hook counting statements. Unlike
+    CaptureQueriesContext it does not depend on the bounded
+    connection.queries log, so it stays accurate in long benchmark runs.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, path, headers, runs=3):
+    """
+    GET `path` `runs` times and return the query count of the last run and
+    the fastest latency, which is the least noisy estimate on a shared box.
+    """
+    latencies = []
+    for _ in range(runs):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = client.get(path, **headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return Measurement(response.status_code, counter.count, min(latencies))
@@ -0,0 +1,63 @@
+"""
+Request-scoped principal: who the current user is to the platform.
+
+Views used to ask `hasattr(request.user, 'enterprise')` and
+`user.user_type in ['admin', 'superadmin']` again and again; every reverse
+one-to-one lookup could issue a query, and a missing profile raised and
+swallowed DoesNotExist each time. PrincipalMiddleware attaches a lazy
+`request.principal` that resolves the role and profiles once per request,
+and PrincipalJWTAuthentication loads the enterprise and partner profile
+together with the user, so resolving them costs no extra query.
+
+    principal = request.principal
+    if principal.is_admin: ...
+    if principal.enterprise: ...    # Enterprise or None
+    if principal.investor: ...      # Investor (partner profile) or None
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import SimpleLazyObject, cached_property
+
+
+ADMIN_USER_TYPES = ('admin', 'superadmin')
+
+# Reverse one-to-one relations loaded with the user on every API request
+PROFILE_RELATIONS = ('enterprise', 'investor_profile')
+
+
+class Principal:
+    """The authenticated user with their role and profiles resolved once"""
+
+    def __init__(self, user):
+        self.user = user
+        self.is_authenticated = bool(user is not None and user.is_authenticated)
+        self.is_admin = self.is_authenticated and user.user_type in ADMIN_USER_TYPES
+
+    @cached_property
+    def enterprise(self):
+        return self._profile('enterprise')
+
+    @cached_property
+    def investor(self):
+        return self._profile('investor_profile')
+
+    def _profile(self, relation):
+        if not self.is_authenticated:
+            return None
+        try:
+            return getattr(self.user, relation)
+        except ObjectDoesNotExist:
+            return None
+
+
+class PrincipalMiddleware:
+    """
+    Sets `request.principal`. It is resolved on first use, after DRF has
+    authenticated the request, from whichever user that produced.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = SimpleLazyObject(lambda: Principal(getattr(request, 'user', None)))
+        return self.get_response(request)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import AuditLog, Notification, UserPreferences, DeletionRequest
+from .models import AuditLog, Notification, UserPreferences, DeletionRequest, Job
 
 
 class AuditLogSerializer(serializers.ModelSerializer):
@@ -34,3 +34,13 @@ class DeletionRequestSerializer(serializers.ModelSerializer):
         model = DeletionRequest
         fields = '__all__'
         read_only_fields = ['created_at', 'reviewed_at']
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'job_type', 'status', 'attempts', 'max_attempts', 'run_after',
+            'result', 'last_error', 'created_at', 'updated_at', 'finished_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,95 @@
+"""
+Model hooks feeding the audit log (core.audit).
+
+Every model in AUDIT_MODELS is audited on create, update and delete. An
+update records a before/after diff of the changed fields against the values
+the instance was loaded with, so auditing needs no extra query; saves that
+change nothing are not recorded.
+"""
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models.signals import post_init, post_save, post_delete
+
+from .audit import jsonable, record
+
+
+DEFAULT_AUDIT_MODELS = [
+    'accounts.User',
+    'enterprises.Enterprise',
+    'assessments.Assessment',
+    'campaigns.Campaign',
+    'campaigns.CampaignInterest',
+    'investors.Investor',
+    'payments.Payment',
+    'core.DeletionRequest',
+]
+
+# Bookkeeping that changes on every save or login
+IGNORED_FIELDS = {'updated_at', 'last_login'}
+REDACTED_FIELDS = {'password'}
+REDACTED = '[redacted]'
+
+
+@lru_cache(maxsize=None)
+def _audited_fields(model):
+    return tuple(
+        field.attname for field in model._meta.concrete_fields
+        if field.attname not in IGNORED_FIELDS
+    )
+
+
+def _snapshot(instance):
+    values = instance.__dict__
+    return {name: values[name] for name in _audited_fields(type(instance)) if name in values}
+
+
+def _diff(before, after):
+    changes = {}
+    for name, value in after.items():
+        if name not in before or before[name] == value:
+            continue
+        if name in REDACTED_FIELDS:
+            changes[name] = {'before': REDACTED, 'after': REDACTED}
+        else:
+            changes[name] = {'before': jsonable(before[name]), 'after': jsonable(value)}
+    return changes
+
+
+def _remember_loaded_values(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._audit_values = _snapshot(instance)
+
+
+def _record_save(sender, instance, created, **kwargs):
+    current = _snapshot(instance)
+    if created:
+        record('create', instance)
+    else:
+        previous = getattr(instance, '_audit_values', None)
+        if previous is None:
+            # Built by hand rather than loaded: the old values are unknown
+            record('update', instance)
+        else:
+            changes = _diff(previous, current)
+            if changes:
+                record('update', instance, changes=changes)
+    instance._audit_values = current
+
+
+def _record_delete(sender, instance, **kwargs):
+    record('delete', instance)
+
+
+def connect_audit_signals():
+    """Audit every model listed in AUDIT_MODELS."""
+    for label in getattr(settings, 'AUDIT_MODELS', DEFAULT_AUDIT_MODELS):
+        model = apps.get_model(label)
+        uid = f'core.audit.{model._meta.label}'
+        post_init.connect(_remember_loaded_values, sender=model, dispatch_uid=f'{uid}.post_init')
+        post_save.connect(_record_save, sender=model, dispatch_uid=f'{uid}.post_save')
+        post_delete.connect(_record_delete, sender=model, dispatch_uid=f'{uid}.post_delete')
+
+
+connect_audit_signals()
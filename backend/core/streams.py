@@ -0,0 +1,149 @@
+"""
+Server-Sent Events stream of a user's live activity (core.events).
+
+GET /api/core/api/stream/ keeps the connection open and writes one SSE
+message per event - `notification` for new or merged notifications and
+`message` for campaign messages - plus a comment line every
+EVENT_STREAM_HEARTBEAT_SECONDS so proxies keep the connection alive. A
+`resync` event means events were dropped and the client should refetch.
+
+The view is async and must be served through isonga.asgi (uvicorn, or
+gunicorn with uvicorn workers); under WSGI each open stream would hold a
+worker forever, so it answers 501 there instead. A user may keep at most
+EVENT_STREAM_MAX_PER_USER streams open per process.
+
+Browsers' EventSource cannot send an Authorization header, and a token in
+the URL ends up in access logs, so the client first POSTs (with its JWT) to
+/api/core/api/stream/ticket/ and opens the stream with ?ticket=. A ticket
+is signed with SECRET_KEY, so whichever worker serves the stream can check
+it without a shared cache; it expires after EVENT_STREAM_TICKET_TTL seconds
+and is single-use (RedeemedStreamTicket).
+"""
+import json
+import secrets
+from collections import Counter
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .events import get_broker, user_channel
+from .models import RedeemedStreamTicket
+
+
+DEFAULT_HEARTBEAT_SECONDS = 15
+DEFAULT_TICKET_TTL = 30
+DEFAULT_MAX_PER_USER = 5
+RECONNECT_MILLISECONDS = 5000
+
+# Open streams per user id in this process
+_open_streams = Counter()
+
+
+TICKET_SALT = 'core.streams.ticket'
+
+
+def _ticket_ttl():
+    return getattr(settings, 'EVENT_STREAM_TICKET_TTL', DEFAULT_TICKET_TTL)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def stream_ticket(request):
+    """Issue a single-use ticket that opens the event stream as the current user"""
+    ticket = signing.dumps({'user': request.user.pk, 'nonce': secrets.token_urlsafe(16)}, salt=TICKET_SALT)
+    return Response({'ticket': ticket, 'expires_in': _ticket_ttl()}, status=status.HTTP_201_CREATED)
+
+
+async def _redeem_ticket(ticket):
+    ttl = _ticket_ttl()
+    try:
+        payload = signing.loads(ticket, salt=TICKET_SALT, max_age=ttl)
+    except signing.BadSignature:
+        return None
+    # Expired tickets fail the signature check, so their rows are no longer needed
+    await RedeemedStreamTicket.objects.filter(redeemed_at__lt=timezone.now() - timedelta(seconds=ttl)).adelete()
+    _, created = await RedeemedStreamTicket.objects.aget_or_create(nonce=payload['nonce'])
+    if not created:
+        return None
+    return await get_user_model().objects.filter(pk=payload['user'], is_active=True).afirst()
+
+
+async def _authenticate(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+
+    ticket = request.GET.get('ticket')
+    if ticket:
+        return await _redeem_ticket(ticket)
+
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    authentication = JWTAuthentication()
+    try:
+        validated = authentication.get_validated_token(header[len('Bearer '):])
+        return await sync_to_async(authentication.get_user)(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _message(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def _events(subscription, user_id):
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT_SECONDS', DEFAULT_HEARTBEAT_SECONDS)
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        while True:
+            event = await subscription.get(heartbeat)
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield _message('resync', {})
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield _message(event['type'], event['data'])
+    finally:
+        # Runs when the client disconnects and the response is cancelled
+        subscription.close()
+        _open_streams[user_id] -= 1
+        if _open_streams[user_id] <= 0:
+            del _open_streams[user_id]
+
+
+@require_GET
+async def event_stream(request):
+    """Stream the authenticated user's notifications and messages as they happen"""
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'The event stream is only served over ASGI'}, status=501)
+
+    user = await _authenticate(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if _open_streams[user.pk] >= getattr(settings, 'EVENT_STREAM_MAX_PER_USER', DEFAULT_MAX_PER_USER):
+        return JsonResponse({'error': 'Too many open streams'}, status=429)
+
+    # Subscribe before responding so nothing published meanwhile is missed
+    subscription = get_broker().subscribe(user_channel(user.pk))
+    _open_streams[user.pk] += 1
+    response = StreamingHttpResponse(_events(subscription, user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
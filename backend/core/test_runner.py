@@ -0,0 +1,21 @@
+"""
+Test runner for the project (settings.TEST_RUNNER).
+
+Audit entries are written synchronously under test: the audit writer
+thread has its own database connection and cannot see rows inside a test
+case's transaction.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(AUDIT_ASYNC_WRITES=False)
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,831 @@
+import asyncio
+import re
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from admin_dashboard.metrics import metric_totals
+from enterprises.models import Enterprise
+
+from . import archive, audit
+from .authentication import PrincipalJWTAuthentication
+from .jobs import PermanentJobError, claim_next, enqueue, register, release_stale_jobs, run_next
+from .counters import reconcile_unread_counters, unread_count
+from .events import BaseBroker, get_broker, user_channel
+from .models import AuditArchive, AuditLog, Job, Notification, NotificationCounter, UserPreferences
+from .notifications import DELIVER_NOTIFICATIONS, ConsoleBackend, notify
+from .principal import Principal
+from .perf import ENDPOINTS, PERF_USERS, auth_header, fixture_ids, measure
+
+User = get_user_model()
+
+ROUTER_MODULES = [
+    'accounts.urls', 'enterprises.urls', 'assessments.urls', 'payments.urls',
+    'investors.urls', 'campaigns.urls', 'core.urls',
+]
+
+# GET routes mounted outside a router
+NAMED_ROUTES = [
+    ('dashboard-stats', {}),
+    ('recent-assessments', {}),
+    ('recent-enterprises', {}),
+    ('system-metrics', {}),
+    ('metric-timeseries', {}),
+    ('investor-opportunities', {}),
+    ('investor-interested-campaigns', {}),
+]
+
+
+class EndpointBudgetTests(TestCase):
+    """
+    Calls every API endpoint as admin, enterprise and partner against the
+    seed_perf_data data set and holds it to the status codes and query
+    budgets in core.perf (and the latency ceilings with PERF_CHECK_LATENCY).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_perf_data', stdout=StringIO())
+        cls.ids = fixture_ids()
+        cls.users = {
+            role: User.objects.get(phone_number=phone)
+            for role, phone in PERF_USERS.items()
+        }
+
+    def test_endpoints_stay_within_budget(self):
+        for endpoint in ENDPOINTS:
+            path = endpoint.path.format(**self.ids)
+            for role, user in self.users.items():
+                with self.subTest(path=endpoint.path, role=role):
+                    result = measure(self.client, path, auth_header(user))
+                    self.assertEqual(
+                        result.status_code, endpoint.status[role],
+                        f'{endpoint.path} as {role} returned {result.status_code}',
+                    )
+                    self.assertLessEqual(
+                        result.queries, endpoint.queries[role],
+                        f'{endpoint.path} as {role} ran {result.queries} queries '
+                        f'(budget {endpoint.queries[role]})',
+                    )
+                    if settings.PERF_CHECK_LATENCY:
+                        self.assertLessEqual(
+                            result.latency_ms, endpoint.latency_ms,
+                            f'{endpoint.path} as {role} took {result.latency_ms:.0f}ms '
+                            f'(budget {endpoint.latency_ms}ms)',
+                        )
+
+    def test_every_api_route_has_a_budget(self):
+        """A viewset registered without a budget entry fails here."""
+        budgeted = {
+            re.sub(r'\{\w+\}', '0', endpoint.path.split('?')[0]) for endpoint in ENDPOINTS
+        }
+        route_names = list(NAMED_ROUTES)
+        for module in ROUTER_MODULES:
+            for prefix, viewset, basename in import_module(module).router.registry:
+                route_names.append((f'{basename}-list', {}))
+                if hasattr(viewset, 'retrieve'):
+                    route_names.append((f'{basename}-detail', {'pk': 0}))
+
+        for name, kwargs in route_names:
+            with self.subTest(route=name):
+                self.assertIn(reverse(name, kwargs=kwargs), budgeted)
+
+
+@register('tests.echo')
+def echo_job(payload):
+    return {'echo': payload}
+
+
+@register('tests.flaky')
+def flaky_job(payload):
+    raise RuntimeError('upstream timed out')
+
+
+@register('tests.broken')
+def broken_job(payload):
+    raise PermanentJobError('bad payload')
+
+
+@override_settings(
+    JOB_CONCURRENCY={'default': 4, 'tests.echo': 1},
+    JOB_RETRY_BACKOFF_SECONDS=10,
+    JOB_LOCK_TIMEOUT_SECONDS=60,
+)
+class JobQueueTests(TestCase):
+
+    def test_run_next_records_result(self):
+        job = enqueue('tests.echo', {'n': 1})
+
+        finished = run_next('worker-1')
+
+        self.assertEqual(finished.pk, job.pk)
+        self.assertEqual(finished.status, 'succeeded')
+        self.assertEqual(finished.result, {'echo': {'n': 1}})
+        self.assertEqual(finished.attempts, 1)
+        self.assertIsNone(finished.locked_by)
+        self.assertIsNone(run_next('worker-1'))
+
+    def test_failures_retry_with_exponential_backoff(self):
+        job = enqueue('tests.flaky', max_attempts=3)
+
+        job = run_next('worker-1')
+        self.assertEqual(job.status, 'queued')
+        self.assertIn('upstream timed out', job.last_error)
+        first_delay = job.run_after - timezone.now()
+        self.assertAlmostEqual(first_delay.total_seconds(), 10, delta=2)
+        # Not runnable until the backoff has elapsed
+        self.assertIsNone(run_next('worker-1'))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = run_next('worker-1')
+        self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), 20, delta=2)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = run_next('worker-1')
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 3)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_permanent_errors_are_not_retried(self):
+        enqueue('tests.broken', max_attempts=5)
+
+        job = run_next('worker-1')
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 1)
+
+    def test_concurrency_limit_per_job_type(self):
+        first = enqueue('tests.echo')
+        enqueue('tests.echo')
+        flaky = enqueue('tests.flaky')
+
+        self.assertEqual(claim_next('worker-1').pk, first.pk)
+        # tests.echo is at its limit of one, so the next worker skips to another type
+        self.assertEqual(claim_next('worker-2').pk, flaky.pk)
+        self.assertIsNone(claim_next('worker-3'))
+
+    def test_dedupe_key_returns_pending_job(self):
+        job = enqueue('tests.echo', dedupe_key='echo:1')
+        self.assertEqual(enqueue('tests.echo', dedupe_key='echo:1').pk, job.pk)
+
+        run_next('worker-1')
+        self.assertNotEqual(enqueue('tests.echo', dedupe_key='echo:1').pk, job.pk)
+
+    def test_unknown_job_type_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('tests.missing')
+
+    def test_stale_leases_are_released(self):
+        job = enqueue('tests.echo')
+        claim_next('worker-1')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(release_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertIsNone(job.locked_by)
+
+    def test_run_jobs_command_drains_queue(self):
+        for n in range(3):
+            enqueue('tests.flaky' if n == 0 else 'tests.echo', {'n': n}, max_attempts=1)
+
+        out = StringIO()
+        with mock.patch('core.management.commands.run_jobs.close_old_connections') as close_old:
+            call_command('run_jobs', '--once', stdout=out)
+
+        # Before each of the three jobs and the final empty poll
+        self.assertEqual(close_old.call_count, 4)
+        self.assertEqual(Job.objects.filter(status='succeeded').count(), 2)
+        self.assertEqual(Job.objects.filter(status='failed').count(), 1)
+        self.assertIn('stopped after 3 job(s)', out.getvalue())
+
+
+class AuditLogSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('+250723000001', 'admin@example.com', None, user_type='admin')
+        for action, model_name in [('create', 'Enterprise'), ('update', 'Enterprise'), ('update', 'Campaign')]:
+            AuditLog.objects.create(user=cls.admin, action=action, model_name=model_name)
+        old = AuditLog.objects.create(user=cls.admin, action='delete', model_name='Campaign')
+        AuditLog.objects.filter(pk=old.pk).update(timestamp=timezone.now() - timedelta(days=45))
+        call_command('rebuild_dashboard_metrics', '--metric', 'audit_actions', '--metric', 'audit_models',
+                     stdout=StringIO())
+
+    def test_summary_counts_last_30_days_from_rollups(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.assertNumQueries(2):
+            response = client.get('/api/core/api/audit-logs/summary/')
+
+        self.assertEqual(response.data['total_actions'], 3)
+        self.assertCountEqual(
+            response.data['by_action'], [{'action': 'create', 'count': 1}, {'action': 'update', 'count': 2}],
+        )
+        self.assertCountEqual(
+            response.data['by_model'],
+            [{'model_name': 'Enterprise', 'count': 2}, {'model_name': 'Campaign', 'count': 1}],
+        )
+        self.assertEqual(len(response.data['recent']), 3)
+
+
+class AuditCaptureTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('+250726000001', 'audit@example.com', 'secret-pass')
+
+    def setUp(self):
+        # Entries from setUpTestData wait on the class transaction, which never commits
+        audit._local.buffer = None
+
+    def test_model_changes_are_audited_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                other = User.objects.create_user('+250726000002', 'owner@example.com', None)
+        created = AuditLog.objects.get(action='create', object_id=str(other.pk))
+        self.assertEqual(created.model_name, 'User')
+        self.assertEqual(created.object_repr, str(other))
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = 'Aline'
+            user.set_password('another-pass')
+            user.save()
+            user.save()
+        update = AuditLog.objects.get(action='update', object_id=str(user.pk))
+        self.assertEqual(update.changes['first_name'], {'before': '', 'after': 'Aline'})
+        self.assertEqual(update.changes['password'], {'before': '[redacted]', 'after': '[redacted]'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                user.delete()
+                transaction.set_rollback(True)
+        self.assertFalse(AuditLog.objects.filter(action='delete').exists())
+
+        other_id = other.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertTrue(AuditLog.objects.filter(action='delete', object_id=str(other_id)).exists())
+        self.assertEqual(metric_totals(['audit_actions'])['audit_actions'], {'create': 1, 'update': 1, 'delete': 1})
+
+    def test_login_is_audited_with_request_details(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/accounts/api/token/',
+                {'phone_number': '+250726000001', 'password': 'secret-pass'},
+                HTTP_USER_AGENT='test-browser',
+            )
+        self.assertEqual(response.status_code, 200)
+        login = AuditLog.objects.get(action='login')
+        self.assertEqual(login.user, self.user)
+        self.assertEqual(login.ip_address, '127.0.0.1')
+        self.assertEqual(login.user_agent, 'test-browser')
+
+    def test_full_queue_writes_in_the_calling_thread(self):
+        writer = audit.AuditWriter(max_size=2, batch_size=10)
+        entries = [audit.AuditLog(action='view', model_name='Report', object_id=str(n)) for n in range(5)]
+        with mock.patch.object(audit.AuditWriter, '_ensure_thread'):
+            writer.submit(entries)
+        # Two entries fit the queue; the other three were written straight away
+        self.assertEqual(writer.queue.qsize(), 2)
+        self.assertEqual(AuditLog.objects.filter(action='view').count(), 3)
+
+        writer.flush()
+        self.assertEqual(AuditLog.objects.filter(action='view').count(), 5)
+
+
+    def test_entries_are_described_before_reaching_the_writer(self):
+        with mock.patch.object(audit.AuditWriter, 'submit') as submit:
+            # As in a request: entries wait for the end of it
+            audit._local.pending = []
+            with self.captureOnCommitCallbacks(execute=True):
+                other = User.objects.create_user('+250726000003', 'described@example.com', None)
+            audit._request_finished(None)
+        [[entries], _] = submit.call_args
+        self.assertEqual(entries[0].object_repr, str(other))
+        self.assertNotIn('_audited_instance', entries[0].__dict__)
+
+    def test_write_failures_are_logged(self):
+        writer = audit.AuditWriter(use_thread=False)
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=RuntimeError('database is down')):
+            with self.assertLogs('core.audit', 'ERROR') as logs:
+                writer.write([audit.AuditLog(action='view')])
+        self.assertIn('Failed to write 1 audit log(s)', logs.output[0])
+
+
+class AuditArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('+250727000001', 'archive@example.com', None, user_type='admin')
+        now = timezone.now()
+        for days_ago, action in [(400, 'create'), (390, 'update'), (300, 'delete'), (5, 'update')]:
+            entry = AuditLog.objects.create(user=cls.admin, action=action, model_name='Campaign')
+            AuditLog.objects.filter(pk=entry.pk).update(timestamp=now - timedelta(days=days_ago))
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = override_settings(AUDIT_ARCHIVE_DIR=directory.name, AUDIT_HOT_DAYS=180)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_old_rows_move_to_monthly_files(self):
+        out = StringIO()
+        call_command('archive_audit_logs', '--dry-run', stdout=out)
+        self.assertIn('Would archive 3 audit log row(s)', out.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 4)
+
+        call_command('archive_audit_logs', stdout=StringIO())
+        self.assertEqual(list(AuditLog.objects.values_list('action', flat=True)), ['update'])
+        self.assertEqual(sum(AuditArchive.objects.values_list('row_count', flat=True)), 3)
+
+        # Re-running, or archiving more rows into a month, merges by id
+        call_command('archive_audit_logs', '--days', '1', stdout=StringIO())
+        self.assertFalse(AuditLog.objects.exists())
+        self.assertEqual(sum(AuditArchive.objects.values_list('row_count', flat=True)), 4)
+
+    def test_api_searches_hot_and_archived_rows(self):
+        call_command('archive_audit_logs', stdout=StringIO())
+
+        hot = self.client.get('/api/core/api/audit-logs/')
+        self.assertEqual([row['action'] for row in hot.data['results']], ['update'])
+
+        actions = []
+        url = '/api/core/api/audit-logs/?include_archived=true&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            actions.extend(row['action'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(actions, ['update', 'delete', 'update', 'create'])
+
+        start = (timezone.now() - timedelta(days=395)).date().isoformat()
+        response = self.client.get(f'/api/core/api/audit-logs/?start_date={start}&action=update')
+        self.assertEqual([row['action'] for row in response.data['results']], ['update', 'update'])
+        self.assertEqual(response.data['results'][1]['user_name'], self.admin.get_full_name())
+
+        response = self.client.get('/api/core/api/audit-logs/?start_date=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_default_listing_continues_into_the_archive(self):
+        call_command('archive_audit_logs', stdout=StringIO())
+
+        actions = []
+        url = '/api/core/api/audit-logs/?page_size=1'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            actions.extend(row['action'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(actions, ['update', 'delete', 'update', 'create'])
+
+    def test_archive_is_only_read_once_hot_rows_run_out(self):
+        call_command('archive_audit_logs', stdout=StringIO())
+
+        with mock.patch('core.archive.read_archive') as read_archive:
+            entries = archive.search(limit=1)
+        self.assertEqual([entry.action for entry in entries], ['update'])
+        read_archive.assert_not_called()
+
+        # Rows left behind by a run that stopped before deleting them are returned once
+        record = next(archive.archived_records())
+        AuditLog.objects.create(**{**record, 'timestamp': parse_datetime(record['timestamp'])})
+        entries = archive.search(limit=10)
+        self.assertEqual(len(entries), 4)
+        self.assertEqual(len({str(entry.pk) for entry in entries}), 4)
+
+    def test_rebuilt_rollups_keep_archived_rows(self):
+        call_command('archive_audit_logs', stdout=StringIO())
+        call_command('rebuild_dashboard_metrics', '--metric', 'audit_actions', stdout=StringIO())
+        self.assertEqual(metric_totals(['audit_actions'])['audit_actions'], {'create': 1, 'update': 2, 'delete': 1})
+
+    def test_pages_keep_entries_sharing_a_timestamp(self):
+        now = timezone.now()
+        for days_ago in (300, 5):
+            entries = [AuditLog.objects.create(user=self.admin, action='view', model_name='Report') for _ in range(3)]
+            AuditLog.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+                timestamp=now - timedelta(days=days_ago)
+            )
+        call_command('archive_audit_logs', stdout=StringIO())
+
+        seen = []
+        url = '/api/core/api/audit-logs/?include_archived=true&action=view&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+        response = self.client.get('/api/core/api/audit-logs/?include_archived=true&before_id=nope')
+        self.assertEqual(response.status_code, 400)
+
+
+class PrincipalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('+250728000001', 'principal@example.com', None, user_type='enterprise')
+        cls.enterprise = Enterprise.objects.create(
+            user=cls.owner,
+            business_name='Principal Ltd',
+            tin_number='PRN001',
+            enterprise_type='limited_company',
+            sector='technology',
+            district='Gasabo',
+            phone='+250728000001',
+            year_established=2020,
+            number_of_employees=5,
+        )
+
+    def test_jwt_user_is_loaded_with_profiles(self):
+        authentication = PrincipalJWTAuthentication()
+        token = authentication.get_validated_token(str(AccessToken.for_user(self.owner)))
+        with self.assertNumQueries(1):
+            principal = Principal(authentication.get_user(token))
+            self.assertEqual(principal.enterprise, self.enterprise)
+            self.assertIsNone(principal.investor)
+            self.assertFalse(principal.is_admin)
+
+    def test_jwt_user_checks_still_apply(self):
+        authentication = PrincipalJWTAuthentication()
+        token = authentication.get_validated_token(str(AccessToken.for_user(self.owner)))
+        User.objects.filter(pk=self.owner.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            authentication.get_user(token)
+        User.objects.filter(pk=self.owner.pk).delete()
+        with self.assertRaises(AuthenticationFailed):
+            authentication.get_user(token)
+
+    def test_views_read_the_request_principal(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.owner)}')
+        # The user with both profiles, then the campaigns
+        with self.assertNumQueries(2):
+            response = client.get('/api/campaigns/api/campaigns/my_campaigns/')
+        self.assertEqual(response.status_code, 200)
+
+        anonymous = Principal(AnonymousUser())
+        self.assertFalse(anonymous.is_authenticated)
+        self.assertIsNone(anonymous.enterprise)
+
+
+class NotificationFeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('+250724000001', 'feed@example.com', None)
+        Notification.objects.bulk_create([
+            Notification(user=cls.user, notification_type='system', title=f'Note {n}', message='Body')
+            for n in range(45)
+        ])
+
+    def test_feed_pages_by_cursor_without_counting(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        seen = []
+        url = '/api/core/api/notifications/?page_size=20'
+        while url:
+            with self.assertNumQueries(1):
+                response = client.get(url)
+            self.assertNotIn('count', response.data)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(len(seen), 45)
+        self.assertEqual(len(set(seen)), 45)
+
+
+@override_settings(NOTIFICATION_DELIVERY_BACKENDS={'email': 'core.notifications.EmailBackend'})
+class NotificationDispatcherTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('+250722000001', 'one@example.com', 'pass')
+        cls.other = User.objects.create_user('+250722000002', 'two@example.com', 'pass')
+        UserPreferences.objects.create(user=cls.other, email_notifications=False)
+
+    def test_notifications_are_written_in_bulk_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for n in range(5):
+                    notify(self.user, 'system', f'Title {n}', 'Body')
+                notify(self.other.pk, 'system', 'Other', 'Body')
+                self.assertFalse(Notification.objects.exists())
+
+        # The buffer flush, then the unread counter eviction and stream publish it schedules
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(Notification.objects.filter(user=self.other).count(), 1)
+
+    def test_rolled_back_notifications_are_dropped(self):
+        try:
+            with transaction.atomic():
+                notify(self.user, 'system', 'Rolled back', 'Body')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                notify(self.user, 'system', 'Kept', 'Body')
+
+        self.assertEqual(list(Notification.objects.values_list('title', flat=True)), ['Kept'])
+
+    def test_buffer_of_a_rolled_back_savepoint_is_replaced(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        notify(self.user, 'system', 'Rolled back', 'Body')
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                notify(self.user, 'system', 'Kept', 'Body')
+
+        self.assertEqual(list(Notification.objects.values_list('title', flat=True)), ['Kept'])
+
+    def test_console_backend_logs_notifications(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.user, 'system', 'Hello', 'Body')
+
+        with self.assertLogs('core.notifications', 'INFO') as logs:
+            ConsoleBackend().send(list(Notification.objects.all()))
+        self.assertEqual(logs.output, [f'INFO:core.notifications:{self.user.pk}: Hello - Body'])
+
+    def test_coalesced_notifications_merge(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for n in range(3):
+                    notify(self.user, 'new_message', 'New Message', f'Message {n}', coalesce_key='thread:1')
+                notify(self.user, 'new_message', 'New Message', 'Elsewhere', coalesce_key='thread:2')
+
+        thread = Notification.objects.get(metadata__coalesce_key='thread:1')
+        self.assertEqual(thread.message, 'Message 2')
+        self.assertEqual(thread.metadata['count'], 3)
+
+        # A later alert for the same thread updates the unread row
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.user, 'new_message', 'New Message', 'Message 3', coalesce_key='thread:1')
+
+        self.assertEqual(Notification.objects.count(), 2)
+        thread.refresh_from_db()
+        self.assertEqual(thread.metadata['count'], 4)
+        self.assertEqual(thread.message, 'Message 3')
+
+        # Once read, a new row is started
+        Notification.objects.update(is_read=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.user, 'new_message', 'New Message', 'Message 4', coalesce_key='thread:1')
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_email_delivery_runs_as_a_job_for_opted_in_users(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.user, 'system', 'Hello', 'Body', action_url='/dashboard')
+            notify(self.other, 'system', 'Hello', 'Body')
+
+        job = Job.objects.get(job_type=DELIVER_NOTIFICATIONS)
+        self.assertEqual(job.payload['channel'], 'email')
+        self.assertEqual(len(job.payload['notification_ids']), 1)
+        self.assertEqual(mail.outbox, [])
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['one@example.com'])
+        self.assertIn('/dashboard', mail.outbox[0].body)
+
+
+class UnreadCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('+250725000001', 'badge@example.com', None)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def notify_many(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for n in range(count):
+                    notify(self.user, 'system', f'Title {n}', 'Body')
+
+    def badge(self):
+        return self.client.get('/api/core/api/notifications/unread_count/').data['count']
+
+    def test_counter_follows_notification_changes(self):
+        self.notify_many(3)
+        self.assertEqual(self.badge(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.badge(), 3)
+
+        first, second, third = Notification.objects.filter(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/core/api/notifications/{first.pk}/mark_read/')
+            self.client.post(f'/api/core/api/notifications/{first.pk}/mark_read/')
+        self.assertEqual(self.badge(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/core/api/notifications/{second.pk}/')
+        self.assertEqual(self.badge(), 1)
+
+        self.notify_many(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/core/api/notifications/mark_all_read/')
+        self.assertEqual(self.badge(), 0)
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 0)
+
+    def test_admin_mark_as_read_adjusts_counters(self):
+        other = User.objects.create_user('+250725000002', 'badge2@example.com', None)
+        self.notify_many(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(other, 'system', 'Hello', 'Body')
+        first = Notification.objects.filter(user=self.user).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/core/api/notifications/{first.pk}/mark_read/')
+        self.assertEqual((unread_count(self.user.pk), unread_count(other.pk)), (2, 1))
+
+        request = RequestFactory().post('/admin/core/notification/')
+        request.user = other
+        with self.captureOnCommitCallbacks(execute=True):
+            site._registry[Notification].mark_as_read(request, Notification.objects.all())
+
+        self.assertEqual((unread_count(self.user.pk), unread_count(other.pk)), (0, 0))
+        self.assertEqual(reconcile_unread_counters(dry_run=True), {})
+
+    def test_reconcile_repairs_drift(self):
+        self.notify_many(4)
+        self.assertEqual(unread_count(self.user.pk), 4)
+        # A queryset update bypasses the counter
+        Notification.objects.filter(user=self.user)[:1].get().delete()
+        Notification.objects.filter(pk__in=Notification.objects.filter(user=self.user)[:1]).update(is_read=True)
+
+        out = StringIO()
+        call_command('reconcile_notification_counters', '--dry-run', stdout=out)
+        self.assertIn('counter 4, actual 2', out.getvalue())
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 4)
+
+        call_command('reconcile_notification_counters', stdout=StringIO())
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 2)
+        self.assertEqual(unread_count(self.user.pk), 2)
+
+
+class RecordingBroker(BaseBroker):
+    published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event))
+
+
+class FailingBroker(BaseBroker):
+
+    def publish(self, channel, event):
+        raise ConnectionError('broker unavailable')
+
+
+class EventStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('+250726000001', 'stream@example.com', None)
+
+    @override_settings(EVENT_BROKER='core.tests.RecordingBroker', NOTIFICATION_DELIVERY_BACKENDS={})
+    def test_dispatched_notifications_are_published(self):
+        RecordingBroker.published = []
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                notify(self.user, 'system', 'Hello', 'Body')
+                self.assertEqual(RecordingBroker.published, [])
+
+        [(channel, event)] = RecordingBroker.published
+        self.assertEqual(channel, user_channel(self.user.pk))
+        self.assertEqual(event['type'], 'notification')
+        self.assertEqual(event['data']['title'], 'Hello')
+
+    @override_settings(EVENT_BROKER='core.tests.FailingBroker', NOTIFICATION_DELIVERY_BACKENDS={})
+    def test_publish_failures_are_logged(self):
+        with self.assertLogs('core.events', 'ERROR') as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                notify(self.user, 'system', 'Hello', 'Body')
+        self.assertIn(f'Failed to publish notification to {user_channel(self.user.pk)}', logs.output[0])
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 1)
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get('/api/core/api/stream/')
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.get('/api/core/api/stream/?ticket=not-a-ticket')
+        self.assertEqual(response.status_code, 401)
+
+        # Access tokens are not accepted in the URL
+        response = await self.async_client.get(f'/api/core/api/stream/?token={AccessToken.for_user(self.user)}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_requires_asgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/core/api/stream/')
+        self.assertEqual(response.status_code, 501)
+
+    def issue_ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/core/api/stream/ticket/')
+        self.assertEqual(response.status_code, 201)
+        return response.data['ticket']
+
+    async def open_stream(self):
+        response = await self.async_client.get(f'/api/core/api/stream/?ticket={await sync_to_async(self.issue_ticket)()}')
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+        return stream
+
+    async def disconnect(self, stream):
+        # A client disconnect cancels the pending read, which closes the subscription
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+    def test_ticket_requires_authentication(self):
+        response = APIClient().post('/api/core/api/stream/ticket/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_ticket_is_single_use(self):
+        ticket = await sync_to_async(self.issue_ticket)()
+        response = await self.async_client.get(f'/api/core/api/stream/?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        await self.disconnect(stream)
+
+        response = await self.async_client.get(f'/api/core/api/stream/?ticket={ticket}')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_tickets_need_no_shared_cache(self):
+        ticket = await sync_to_async(self.issue_ticket)()
+        # As if another worker, with its own cache, served the stream
+        await sync_to_async(cache.clear)()
+        response = await self.async_client.get(f'/api/core/api/stream/?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        await self.disconnect(stream)
+
+    async def test_expired_tickets_are_rejected(self):
+        ticket = await sync_to_async(self.issue_ticket)()
+        with override_settings(EVENT_STREAM_TICKET_TTL=-1):
+            response = await self.async_client.get(f'/api/core/api/stream/?ticket={ticket}')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(EVENT_STREAM_MAX_PER_USER=1)
+    async def test_open_streams_are_limited_per_user(self):
+        stream = await self.open_stream()
+        response = await self.async_client.get(f'/api/core/api/stream/?ticket={await sync_to_async(self.issue_ticket)()}')
+        self.assertEqual(response.status_code, 429)
+
+        await self.disconnect(stream)
+        await self.disconnect(await self.open_stream())
+
+    async def test_stream_delivers_published_events(self):
+        ticket = await sync_to_async(self.issue_ticket)()
+        response = await self.async_client.get(f'/api/core/api/stream/?ticket={ticket}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+        self.assertEqual(get_broker().publish(user_channel(self.user.pk), {
+            'type': 'message', 'data': {'content': 'Hi'},
+        }), 1)
+        self.assertEqual(await anext(stream), b'event: message\ndata: {"content": "Hi"}\n\n')
+
+        await self.disconnect(stream)
+        self.assertEqual(get_broker().publish(user_channel(self.user.pk), {'type': 'message', 'data': {}}), 0)
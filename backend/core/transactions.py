@@ -0,0 +1,36 @@
+"""
+Per-transaction buffers.
+
+core.notifications and core.audit collect work while a transaction is open
+and hand it on once, in bulk, when it commits. `transaction_buffer()` returns
+the buffer for the current transaction, creating it and scheduling its
+`flush()` with transaction.on_commit on first use.
+
+The only strong reference to a buffer is that on_commit callback; the
+thread-local slot keeps a weak one. When the transaction (or the savepoint
+the buffer was created in) rolls back, Django discards the callback, the
+buffer goes with it and the next call starts a new one. After a commit the
+callback clears the slot before flushing.
+"""
+import weakref
+
+from django.db import transaction
+
+
+def transaction_buffer(local, factory):
+    """The buffer stored on `local` for the open transaction, made with `factory()` if there is none"""
+    ref = getattr(local, 'buffer', None)
+    buffer = ref() if ref is not None else None
+    if buffer is not None:
+        return buffer
+
+    buffer = factory()
+    ref = local.buffer = weakref.ref(buffer)
+
+    def flush():
+        if getattr(local, 'buffer', None) is ref:
+            local.buffer = None
+        buffer.flush()
+
+    transaction.on_commit(flush)
+    return buffer
@@ -1,13 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AuditLogViewSet, NotificationViewSet, UserPreferencesViewSet, DeletionRequestViewSet
+from .streams import event_stream, stream_ticket
+from .views import AuditLogViewSet, NotificationViewSet, UserPreferencesViewSet, DeletionRequestViewSet, JobViewSet
 
 router = DefaultRouter()
 router.register(r'audit-logs', AuditLogViewSet)
 router.register(r'notifications', NotificationViewSet)
 router.register(r'preferences', UserPreferencesViewSet)
 router.register(r'deletion-requests', DeletionRequestViewSet)
+router.register(r'jobs', JobViewSet)
 
 urlpatterns = [
+    path('api/stream/', event_stream, name='event-stream'),
+    path('api/stream/ticket/', stream_ticket, name='event-stream-ticket'),
     path('api/', include(router.urls)),
 ]
@@ -2,19 +2,51 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Count, Q
-from datetime import timedelta
-from .models import AuditLog, Notification, UserPreferences, DeletionRequest
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Q
+from datetime import datetime, time, timedelta
+import uuid
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from admin_dashboard.metrics import metric_totals
+from . import archive
+from .counters import adjust_unread, unread_count
+from .models import AuditArchive, AuditLog, Notification, UserPreferences, DeletionRequest, Job
+from .pagination import AuditLogCursorPagination, FeedCursorPagination
 from .serializers import (
     AuditLogSerializer, NotificationSerializer, 
-    UserPreferencesSerializer, DeletionRequestSerializer
+    UserPreferencesSerializer, DeletionRequestSerializer, JobSerializer
 )
 
 
 class IsAdminUser(permissions.BasePermission):
     """Only allow admin users"""
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.user_type in ['admin', 'superadmin']
+        return request.principal.is_admin
+
+
+def _parse_bound(value, end_of_day=False):
+    """An ISO date or datetime query param as an aware datetime (None if absent)"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_id(value):
+    """A UUID query param (None if absent)"""
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValueError(f"Invalid id: {value}")
 
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -22,9 +54,10 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AuditLogCursorPagination
     
     def get_queryset(self):
-        queryset = AuditLog.objects.all().order_by('-timestamp')
+        queryset = AuditLog.objects.select_related('user').order_by('-timestamp')
         
         # Filter by action
         action_filter = self.request.query_params.get('action')
@@ -51,19 +84,76 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        try:
+            start = _parse_bound(request.query_params.get('start_date'))
+            end = _parse_bound(request.query_params.get('end_date'), end_of_day=True)
+            before = _parse_bound(request.query_params.get('before'))
+            before_id = _parse_id(request.query_params.get('before_id'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Rows past the hot window live in the monthly archive files
+        include_archived = request.query_params.get('include_archived', '').lower() in ('1', 'true', 'yes')
+        if not include_archived and not (start and start < archive.hot_window_start()):
+            response = super().list(request, *args, **kwargs)
+            if response.data['next'] is not None or not AuditArchive.objects.exists():
+                return response
+            # The hot rows ran out: carry on into the archive from the last one
+            page = self.paginator.page
+            if page:
+                next_url = remove_query_param(request.build_absolute_uri(), 'cursor')
+                next_url = replace_query_param(next_url, 'include_archived', 'true')
+                response.data['next'] = self._archive_page_url(next_url, page[-1])
+                return response
+            if request.query_params.get('cursor'):
+                return response
+        
+        page_size = self.paginator.get_page_size(request)
+        entries = archive.search(
+            action=request.query_params.get('action') or None,
+            model_name=request.query_params.get('model_name') or None,
+            user_id=request.query_params.get('user_id') or None,
+            start=start,
+            end=end,
+            before=before,
+            before_id=before_id,
+            limit=page_size + 1,
+        )
+        next_url = None
+        if len(entries) > page_size:
+            entries = entries[:page_size]
+            next_url = self._archive_page_url(request.build_absolute_uri(), entries[-1])
+        return Response({
+            'next': next_url,
+            'previous': None,
+            'results': self.get_serializer(entries, many=True).data,
+        })
+    
+    def _archive_page_url(self, url, last_entry):
+        # (timestamp, id) keyset: entries sharing the last timestamp aren't skipped
+        url = replace_query_param(url, 'before', last_entry.timestamp.isoformat())
+        return replace_query_param(url, 'before_id', str(last_entry.pk))
+    
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Get audit log summary for dashboard"""
-        today = timezone.now().date()
+        today = timezone.localdate()
         last_30_days = today - timedelta(days=30)
         
-        logs = AuditLog.objects.filter(timestamp__date__gte=last_30_days)
+        # Counts come from the admin_dashboard rollups instead of scanning the log
+        totals = metric_totals(['audit_actions', 'audit_models'], start=last_30_days)
+        by_action = totals.get('audit_actions', {})
+        by_model = totals.get('audit_models', {})
+        # A plain range on timestamp, so the index can be used (__date can't)
+        since = timezone.make_aware(datetime.combine(last_30_days, time.min))
+        recent = AuditLog.objects.filter(timestamp__gte=since).select_related('user')
         
         summary = {
-            'total_actions': logs.count(),
-            'by_action': list(logs.values('action').annotate(count=Count('id'))),
-            'by_model': list(logs.values('model_name').annotate(count=Count('id'))),
-            'recent': AuditLogSerializer(logs[:10], many=True).data
+            'total_actions': sum(by_action.values()),
+            'by_action': [{'action': name, 'count': count} for name, count in by_action.items() if count],
+            'by_model': [{'model_name': name or None, 'count': count} for name, count in by_model.items() if count],
+            'recent': AuditLogSerializer(recent[:10], many=True).data
         }
         
         return Response(summary)
@@ -74,10 +164,26 @@ class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedCursorPagination
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user).order_by('-created_at')
     
+    def perform_create(self, serializer):
+        notification = serializer.save()
+        if not notification.is_read:
+            adjust_unread({notification.user_id: 1})
+    
+    def perform_update(self, serializer):
+        was_unread = not serializer.instance.is_read
+        notification = serializer.save()
+        adjust_unread({notification.user_id: int(not notification.is_read) - int(was_unread)})
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        if not instance.is_read:
+            adjust_unread({instance.user_id: -1})
+    
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get unread notifications"""
@@ -88,30 +194,35 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get count of unread notifications"""
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'count': count})
+        # Served from the user's NotificationCounter, cached
+        return Response({'count': unread_count(request.user.pk)})
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark a notification as read"""
         notification = self.get_object()
-        notification.is_read = True
-        notification.read_at = timezone.now()
-        notification.save()
+        # Conditional update so concurrent calls only decrement the counter once
+        marked = Notification.objects.filter(pk=notification.pk, is_read=False).update(
+            is_read=True,
+            read_at=timezone.now()
+        )
+        adjust_unread({notification.user_id: -marked})
         return Response({'message': 'Notification marked as read'})
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        self.get_queryset().filter(is_read=False).update(
+        marked = self.get_queryset().filter(is_read=False).update(
             is_read=True, 
             read_at=timezone.now()
         )
+        adjust_unread({request.user.pk: -marked})
         return Response({'message': 'All notifications marked as read'})
     
     @action(detail=False, methods=['delete'])
     def clear_read(self, request):
         """Delete all read notifications"""
+        # Only read notifications are removed, so the unread counter is unchanged
         self.get_queryset().filter(is_read=True).delete()
         return Response({'message': 'Read notifications cleared'})
 
@@ -129,7 +240,7 @@ class UserPreferencesViewSet(viewsets.ModelViewSet):
         # Get or create preferences for current user
         preferences, created = UserPreferences.objects.get_or_create(
             user=self.request.user,
-            defaults={'language': 'en', 'timezone': 'Africa/Kigali'}
+            defaults={'language': 'en'}
         )
         return preferences
     
@@ -157,7 +268,8 @@ class DeletionRequestViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        if user.user_type in ['admin', 'superadmin']:
+        principal = self.request.principal
+        if principal.is_admin:
             return DeletionRequest.objects.all().order_by('-created_at')
         return DeletionRequest.objects.filter(user=user)
     
@@ -188,7 +300,7 @@ class DeletionRequestViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Admin approves deletion request"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         deletion_request = self.get_object()
@@ -205,7 +317,7 @@ class DeletionRequestViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         """Admin rejects deletion request"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         deletion_request = self.get_object()
@@ -231,3 +343,26 @@ class DeletionRequestViewSet(viewsets.ModelViewSet):
         
         deletion_request.delete()
         return Response({'message': 'Deletion request cancelled'})
+
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Poll background jobs. Users see the jobs they queued; admins see all."""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        principal = self.request.principal
+        queryset = Job.objects.all()
+        if not principal.is_admin:
+            queryset = queryset.filter(created_by=user)
+
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        job_type = self.request.query_params.get('job_type')
+        if job_type:
+            queryset = queryset.filter(job_type=job_type)
+        return queryset
@@ -0,0 +1,225 @@
+"""
+Auto-fill resolver for form fields.
+
+FormField (partner funding forms) and BusinessProfileField declare where an
+auto-filled answer comes from in `auto_fill_source`:
+
+    profile.<enterprise field>   e.g. profile.business_name;
+                                 business_registration_number and
+                                 phone_number are aliases for
+                                 registration_number and phone
+    <enterprise field>           BusinessProfileField shorthand, e.g. sector
+    profile.<profile field id>   an answer in the enterprise's profile form
+    profile.responses.<id>       (same)
+    assessment.<field>           the latest completed assessment, e.g.
+                                 assessment.percentage_score; readiness_score
+                                 is an alias for percentage_score
+
+`compile_plan()` turns a form's sources into one loading plan: the source
+rows it needs (enterprise, latest assessment, profile response) and a
+lookup per field. `resolve_auto_fill()` loads each needed row at most once
+and fills every field in a single pass, so a form costs at most three
+queries however many auto-fill fields it has. Loaded rows are cached per
+enterprise until they change (see enterprises.signals) or
+AUTO_FILL_CACHE_TTL expires. Unknown sources resolve to nothing.
+
+Evictions only reach the local process's cache, so other workers may serve
+a stale row until the TTL runs out. That is fine for the read-only auto-fill
+endpoints, but `fill_missing()` - whose values are saved with an
+application - always reads the source rows from the database.
+"""
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Enterprise, EnterpriseProfileFormResponse
+
+
+DEFAULT_CACHE_TTL = 300
+
+ENTERPRISE = 'enterprise'
+ASSESSMENT = 'assessment'
+RESPONSES = 'responses'
+PARTS = (ENTERPRISE, ASSESSMENT, RESPONSES)
+
+ENTERPRISE_FIELDS = (
+    'business_name', 'tin_number', 'registration_number', 'enterprise_type',
+    'management_structure', 'sector', 'province', 'district', 'phone', 'email',
+    'website', 'year_established', 'number_of_employees', 'annual_revenue',
+    'description', 'verification_status',
+)
+# Names the partner form builder offers for Enterprise fields
+ENTERPRISE_ALIASES = {
+    'business_registration_number': 'registration_number',
+    'phone_number': 'phone',
+}
+
+ASSESSMENT_FIELDS = (
+    'fiscal_year', 'status', 'total_score', 'max_possible_score',
+    'percentage_score', 'completed_at',
+)
+ASSESSMENT_ALIASES = {'readiness_score': 'percentage_score'}
+
+AutoFillPlan = namedtuple('AutoFillPlan', [
+    'parts',    # source rows to load, a subset of PARTS
+    'lookups',  # (response key, part, name) per resolvable field
+])
+
+
+@lru_cache(maxsize=1024)
+def parse_source(source):
+    """(part, name) for an auto_fill_source, or None if it cannot be resolved"""
+    prefix, _, rest = (source or '').strip().partition('.')
+    if not rest:
+        prefix, rest = 'profile', prefix
+
+    if prefix in ('profile', 'enterprise'):
+        if rest.startswith('responses.'):
+            rest = rest[len('responses.'):]
+        if rest.isdigit():
+            return (RESPONSES, rest)
+        rest = ENTERPRISE_ALIASES.get(rest, rest)
+        if rest in ENTERPRISE_FIELDS:
+            return (ENTERPRISE, rest)
+    elif prefix == 'assessment':
+        rest = ASSESSMENT_ALIASES.get(rest, rest)
+        if rest in ASSESSMENT_FIELDS:
+            return (ASSESSMENT, rest)
+    return None
+
+
+@lru_cache(maxsize=256)
+def compile_plan(sources):
+    """AutoFillPlan for ((response key, auto_fill_source), ...)"""
+    lookups = []
+    for key, source in sources:
+        parsed = parse_source(source)
+        if parsed is not None:
+            lookups.append((key, *parsed))
+    return AutoFillPlan(
+        parts=frozenset(part for _, part, _ in lookups),
+        lookups=tuple(lookups),
+    )
+
+
+def plan_for_fields(fields):
+    """The plan for form fields (FormField, BusinessProfileField or FieldSchema)"""
+    return compile_plan(tuple(
+        (str(field.id), field.auto_fill_source) for field in fields if field.auto_fill_source
+    ))
+
+
+def resolve_auto_fill(enterprise, fields, use_cache=True):
+    """{str(field id): value} for the fields whose auto_fill_source has a value for `enterprise`"""
+    plan = plan_for_fields(fields)
+    if not plan.lookups:
+        return {}
+    data = load_sources(enterprise, plan.parts, use_cache)
+
+    values = {}
+    for key, part, name in plan.lookups:
+        value = data[part].get(name)
+        if value is not None and value != '':
+            values[key] = value
+    return values
+
+
+def fill_missing(enterprise, fields, responses):
+    """`responses` with unanswered auto-fill fields filled in, from uncached source rows"""
+    responses = dict(responses or {})
+    for key, value in resolve_auto_fill(enterprise, fields, use_cache=False).items():
+        if responses.get(key) in (None, ''):
+            responses[key] = value
+    return responses
+
+
+# ---------------------------------------------------------------------------
+# Source rows
+# ---------------------------------------------------------------------------
+
+def _cache_key(enterprise_id, part):
+    return f'enterprises:auto-fill:{enterprise_id}:{part}'
+
+
+def _plain(value):
+    """Cache- and JSON-friendly copy of a model value"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _load_enterprise(enterprise_id):
+    row = Enterprise.objects.filter(pk=enterprise_id).values(*ENTERPRISE_FIELDS).first()
+    return {name: _plain(value) for name, value in (row or {}).items()}
+
+
+def _load_assessment(enterprise_id):
+    from assessments.models import Assessment
+
+    row = (
+        Assessment.objects.filter(enterprise_id=enterprise_id, status__in=['completed', 'reviewed'])
+        .order_by('-completed_at', '-created_at')
+        .values(*ASSESSMENT_FIELDS)
+        .first()
+    )
+    return {name: _plain(value) for name, value in (row or {}).items()}
+
+
+def _load_responses(enterprise_id):
+    responses = (
+        EnterpriseProfileFormResponse.objects.filter(enterprise_id=enterprise_id)
+        .values_list('responses', flat=True)
+        .first()
+    )
+    return {str(key): value for key, value in (responses or {}).items()}
+
+
+LOADERS = {
+    ENTERPRISE: _load_enterprise,
+    ASSESSMENT: _load_assessment,
+    RESPONSES: _load_responses,
+}
+
+
+def load_sources(enterprise, parts, use_cache=True):
+    """
+    {part: {name: value}} for `enterprise` (an Enterprise or its id). Parts
+    come from the cache when possible (unless `use_cache` is False); a
+    loaded Enterprise instance is read directly instead of being fetched
+    again.
+    """
+    enterprise_id = getattr(enterprise, 'pk', enterprise)
+    data = {}
+    if ENTERPRISE in parts and isinstance(enterprise, Enterprise):
+        data[ENTERPRISE] = {name: _plain(getattr(enterprise, name)) for name in ENTERPRISE_FIELDS}
+
+    wanted = {_cache_key(enterprise_id, part): part for part in parts if part not in data}
+    if not wanted:
+        return data
+    if not use_cache:
+        for part in wanted.values():
+            data[part] = LOADERS[part](enterprise_id)
+        return data
+    cached = cache.get_many(list(wanted))
+    missing = {}
+    for key, part in wanted.items():
+        if key in cached:
+            data[part] = cached[key]
+        else:
+            data[part] = missing[key] = LOADERS[part](enterprise_id)
+    if missing:
+        cache.set_many(missing, getattr(settings, 'AUTO_FILL_CACHE_TTL', DEFAULT_CACHE_TTL))
+    return data
+
+
+def invalidate_auto_fill(enterprise_id, *parts):
+    """Drop cached source rows of an enterprise (all parts by default) once the transaction commits"""
+    keys = [_cache_key(enterprise_id, part) for part in (parts or PARTS)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from core.form_tree import save_form_tree
 from .models import (
     Enterprise, EnterpriseDocument,
     BusinessProfileForm, BusinessProfileSection, BusinessProfileField,
@@ -142,6 +145,13 @@ class BusinessProfileFormSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+PROFILE_SECTION_ATTRS = ('title', 'description', 'order')
+PROFILE_FIELD_ATTRS = (
+    'field_type', 'label', 'help_text', 'placeholder', 'is_required', 'order', 'min_value',
+    'max_value', 'choices', 'accepted_file_types', 'max_file_size_mb', 'auto_fill_source',
+)
+
+
 class BusinessProfileFormDetailSerializer(serializers.ModelSerializer):
     """Used when saving a full form (sections + fields) in one request."""
     sections_data = BusinessProfileSectionSerializer(many=True, read_only=True, source='sections')
@@ -159,50 +169,38 @@ class BusinessProfileFormDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at', 'updated_at']
 
     def _save_sections(self, form, sections_data):
-        # Delete existing sections to do a full replace
-        form.sections.all().delete()
-        for s_idx, section in enumerate(sections_data):
-            sec_obj = BusinessProfileSection.objects.create(
-                form=form,
-                title=section.get('title', ''),
-                description=section.get('description', ''),
-                order=section.get('order', s_idx),
-            )
-            for f_idx, field in enumerate(section.get('fields', [])):
-                BusinessProfileField.objects.create(
-                    section=sec_obj,
-                    field_type=field.get('field_type', 'text'),
-                    label=field.get('label', ''),
-                    help_text=field.get('help_text', ''),
-                    placeholder=field.get('placeholder', ''),
-                    is_required=field.get('is_required', True),
-                    order=field.get('order', f_idx),
-                    min_value=field.get('min_value'),
-                    max_value=field.get('max_value'),
-                    choices=field.get('choices', []),
-                    accepted_file_types=field.get('accepted_file_types', []),
-                    max_file_size_mb=field.get('max_file_size_mb'),
-                    auto_fill_source=field.get('auto_fill_source', ''),
-                )
+        # Diff against the stored tree so unchanged rows, and the field ids
+        # that key EnterpriseProfileFormResponse.responses, are kept
+        save_form_tree(
+            form, sections_data, BusinessProfileSection, BusinessProfileField,
+            PROFILE_SECTION_ATTRS, PROFILE_FIELD_ATTRS, field_defaults={'field_type': 'text'},
+        )
 
     def create(self, validated_data):
         sections_data = validated_data.pop('sections', [])
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             validated_data['created_by'] = request.user
-        form = BusinessProfileForm.objects.create(**validated_data)
-        self._save_sections(form, sections_data)
+        with transaction.atomic():
+            form = BusinessProfileForm.objects.create(**validated_data)
+            self._save_sections(form, sections_data)
         return form
 
     def update(self, instance, validated_data):
         sections_data = validated_data.pop('sections', None)
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        if sections_data is not None:
-            self._save_sections(instance, sections_data)
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            if sections_data is not None:
+                self._save_sections(instance, sections_data)
         return instance
 
+    def to_representation(self, instance):
+        # The view drops prefetched sections after a save; load them in two queries
+        prefetch_related_objects([instance], 'sections__fields')
+        return super().to_representation(instance)
+
 
 class EnterpriseProfileFormResponseSerializer(serializers.ModelSerializer):
     """Stores / retrieves an enterprise's profile form answers."""
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .auto_fill import ASSESSMENT, ENTERPRISE, RESPONSES, invalidate_auto_fill
+from .models import Enterprise, EnterpriseProfileFormResponse
+
+
+@receiver([post_save, post_delete], sender=Enterprise)
+def drop_enterprise_auto_fill(sender, instance, **kwargs):
+    invalidate_auto_fill(instance.pk, ENTERPRISE)
+
+
+@receiver([post_save, post_delete], sender='assessments.Assessment')
+def drop_assessment_auto_fill(sender, instance, **kwargs):
+    invalidate_auto_fill(instance.enterprise_id, ASSESSMENT)
+
+
+@receiver([post_save, post_delete], sender=EnterpriseProfileFormResponse)
+def drop_profile_response_auto_fill(sender, instance, **kwargs):
+    invalidate_auto_fill(instance.enterprise_id, RESPONSES)
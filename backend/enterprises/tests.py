@@ -1,3 +1,191 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from assessments.models import Assessment, Questionnaire
+from .auto_fill import fill_missing, resolve_auto_fill
+from .models import (
+    BusinessProfileField, BusinessProfileForm, BusinessProfileSection,
+    Enterprise, EnterpriseProfileFormResponse,
+)
+
+User = get_user_model()
+
+
+class AutoFillTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('+250736000001', 'autofill@example.com', None, user_type='enterprise')
+        cls.enterprise = Enterprise.objects.create(
+            user=owner,
+            business_name='Autofill Ltd',
+            tin_number='AUTO001',
+            registration_number='RDB-2019-0001',
+            enterprise_type='limited_company',
+            sector='technology',
+            province='Kigali',
+            district='Gasabo',
+            phone='+250736000001',
+            email='hello@autofill.example',
+            website='https://autofill.example',
+            year_established=2019,
+            number_of_employees=12,
+            annual_revenue=Decimal('2500000.00'),
+            description='Payments for SMEs',
+        )
+        admin = User.objects.create_user('+250736000002', 'admin-af@example.com', None, user_type='admin')
+        questionnaire = Questionnaire.objects.create(title='Readiness', description='', created_by=admin)
+        cls.assessment = Assessment.objects.create(
+            enterprise=cls.enterprise, questionnaire=questionnaire, fiscal_year=2026,
+            status='completed', percentage_score=Decimal('72.50'),
+        )
+        cls.form = BusinessProfileForm.objects.create(sector='technology', name='Technology profile')
+        section = BusinessProfileSection.objects.create(form=cls.form, title='About')
+        cls.question = BusinessProfileField.objects.create(section=section, field_type='text', label='Market')
+        EnterpriseProfileFormResponse.objects.create(
+            enterprise=cls.enterprise, form=cls.form, responses={str(cls.question.id): 'East Africa'},
+        )
+
+        sources = [
+            'business_name', 'profile.sector', 'profile.annual_revenue', 'assessment.readiness_score',
+            'assessment.fiscal_year', f'profile.{cls.question.id}', 'profile.unknown', '',
+        ]
+        cls.fields = [
+            BusinessProfileField.objects.create(
+                section=section, field_type='auto_fill', label=f'Field {n}', order=n,
+                auto_fill_source=sources[n % len(sources)],
+            )
+            for n in range(60)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def resolve(self):
+        return resolve_auto_fill(self.enterprise.pk, self.fields)
+
+    def test_resolves_every_source_with_constant_queries(self):
+        with self.assertNumQueries(3):
+            values = self.resolve()
+        self.assertEqual(len(values), 60 // 8 * 6 + 4)
+        self.assertEqual(values[str(self.fields[0].id)], 'Autofill Ltd')
+        self.assertEqual(values[str(self.fields[1].id)], 'technology')
+        self.assertEqual(values[str(self.fields[2].id)], 2500000.0)
+        self.assertEqual(values[str(self.fields[3].id)], 72.5)
+        self.assertEqual(values[str(self.fields[4].id)], 2026)
+        self.assertEqual(values[str(self.fields[5].id)], 'East Africa')
+        self.assertNotIn(str(self.fields[6].id), values)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolve(), values)
+
+    def test_source_changes_drop_cached_rows(self):
+        self.resolve()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assessment.percentage_score = Decimal('80.00')
+            self.assessment.save()
+        with self.assertNumQueries(1):
+            values = self.resolve()
+        self.assertEqual(values[str(self.fields[3].id)], 80.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enterprise.objects.get(pk=self.enterprise.pk).save()
+            EnterpriseProfileFormResponse.objects.get(enterprise=self.enterprise).save()
+        with self.assertNumQueries(2):
+            self.resolve()
+
+    def test_saved_answers_skip_stale_cached_rows(self):
+        self.resolve()
+        # A save on another worker only evicts that worker's cache
+        Assessment.objects.filter(pk=self.assessment.pk).update(percentage_score=Decimal('80.00'))
+        self.assertEqual(self.resolve()[str(self.fields[3].id)], 72.5)
+
+        with self.assertNumQueries(3):
+            responses = fill_missing(self.enterprise.pk, self.fields, {str(self.fields[0].id): 'Typed'})
+        self.assertEqual(responses[str(self.fields[0].id)], 'Typed')
+        self.assertEqual(responses[str(self.fields[3].id)], 80.0)
+
+    def test_every_builder_source_resolves(self):
+        # The options of AdminPartnerFormBuilder and AdminBusinessProfileFormEditor
+        sources = [
+            'profile.business_name', 'profile.business_registration_number', 'profile.year_established',
+            'profile.sector', 'profile.phone_number', 'profile.email', 'assessment.readiness_score',
+            'assessment.total_score',
+            'business_name', 'tin_number', 'registration_number', 'enterprise_type', 'sector', 'province',
+            'district', 'phone', 'email', 'website', 'year_established', 'number_of_employees',
+            'annual_revenue', 'description',
+        ]
+        section = self.question.section
+        fields = [
+            BusinessProfileField(section=section, field_type='auto_fill', label=source, auto_fill_source=source)
+            for source in sources
+        ]
+        BusinessProfileField.objects.bulk_create(fields)
+        values = resolve_auto_fill(self.enterprise.pk, fields)
+        self.assertEqual([field.auto_fill_source for field in fields if str(field.id) not in values], [])
+        by_source = {field.auto_fill_source: values[str(field.id)] for field in fields}
+        self.assertEqual(by_source['profile.business_registration_number'], 'RDB-2019-0001')
+        self.assertEqual(by_source['profile.phone_number'], '+250736000001')
+
+    def test_profile_form_auto_fill_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.enterprise.user)
+        response = client.get(f'/api/enterprises/api/profile-forms/{self.form.pk}/auto-fill/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.resolve())
+
+
+class BusinessProfileFormSaveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('+250738000001', 'forms-admin@example.com', None, user_type='admin')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def payload(self, sections):
+        return {'sector': 'agriculture', 'name': 'Agriculture profile', 'is_active': True, 'sections': sections}
+
+    def test_save_keeps_unchanged_rows_and_field_ids(self):
+        sections = [
+            {'title': f'Section {s}', 'fields': [{'label': f'Question {s}.{f}'} for f in range(4)]}
+            for s in range(3)
+        ]
+        response = self.client.post('/api/enterprises/api/profile-forms/', self.payload(sections), format='json')
+        self.assertEqual(response.status_code, 201)
+        form = BusinessProfileForm.objects.get(pk=response.data['id'])
+        self.assertEqual(BusinessProfileField.objects.filter(section__form=form).count(), 12)
+        self.assertEqual(BusinessProfileField.objects.filter(section__form=form, field_type='text').count(), 12)
+
+        # Edit the stored tree as the builder posts it back: every row with its id
+        sections = [
+            {**section, 'fields': [dict(field) for field in section['fields']]}
+            for section in response.data['sections_data']
+        ]
+        changed = sections[0]['fields'][1]
+        removed = sections[1]['fields'].pop()
+        changed['label'] = 'Farm size (ha)'
+        sections[2]['fields'].append({'label': 'Cooperative member?', 'field_type': 'choice'})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(f'/api/enterprises/api/profile-forms/{form.pk}/', self.payload(sections), format='json')
+        self.assertEqual(response.status_code, 200)
+        writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(len(writes), 4)  # the form, one field update, one insert, one delete
+        self.assertIn('"id" IN (%d)' % changed['id'], next(sql for sql in writes if 'enterprises_businessprofilefield' in sql and sql.startswith('UPDATE')))
 
-# Create your tests here.
+        fields = {field.id: field for field in BusinessProfileField.objects.filter(section__form=form)}
+        self.assertEqual(len(fields), 12)
+        self.assertNotIn(removed['id'], fields)
+        self.assertEqual(fields[changed['id']].label, 'Farm size (ha)')
+        rendered = [field['label'] for section in response.data['sections_data'] for field in section['fields']]
+        self.assertIn('Farm size (ha)', rendered)
+        self.assertIn('Cooperative member?', rendered)
@@ -32,9 +32,10 @@ class EnterpriseViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
+        principal = self.request.principal
         if user.user_type == 'enterprise':
             return Enterprise.objects.filter(user=user).select_related('user', 'vetted_by').prefetch_related('documents', 'assessments', 'assessments__questionnaire')
-        elif user.user_type in ['admin', 'superadmin']:
+        elif principal.is_admin:
             queryset = Enterprise.objects.all().select_related('user', 'vetted_by').prefetch_related('documents', 'assessments', 'assessments__questionnaire')
             # Add search by TIN number
             tin = self.request.query_params.get('tin', None)
@@ -64,7 +65,7 @@ class EnterpriseViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def approve(self, request, pk=None):
         """Admin action to approve an enterprise"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         enterprise = get_object_or_404(Enterprise, pk=pk)
@@ -85,7 +86,7 @@ class EnterpriseViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def reject(self, request, pk=None):
         """Admin action to reject an enterprise"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         enterprise = get_object_or_404(Enterprise, pk=pk)
@@ -106,7 +107,7 @@ class EnterpriseViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def request_documents(self, request, pk=None):
         """Admin action to request additional documents"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         enterprise = get_object_or_404(Enterprise, pk=pk)
@@ -152,7 +153,7 @@ class EnterpriseViewSet(viewsets.ModelViewSet):
         
         # Check permissions
         if (request.user.user_type == 'enterprise' and enterprise.user != request.user and 
-            request.user.user_type not in ['admin', 'superadmin']):
+            not request.principal.is_admin):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         documents = enterprise.documents.all()
@@ -166,16 +167,17 @@ class EnterpriseDocumentViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
+        principal = self.request.principal
         if user.user_type == 'enterprise':
             return EnterpriseDocument.objects.filter(enterprise__user=user).select_related('enterprise', 'verified_by')
-        elif user.user_type in ['admin', 'superadmin']:
+        elif principal.is_admin:
             return EnterpriseDocument.objects.all().select_related('enterprise', 'verified_by')
         return EnterpriseDocument.objects.none()
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def verify(self, request, pk=None):
         """Admin action to verify a document"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         document = get_object_or_404(EnterpriseDocument, pk=pk)
@@ -195,7 +197,7 @@ class EnterpriseDocumentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def reject_document(self, request, pk=None):
         """Admin action to reject a document"""
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         document = get_object_or_404(EnterpriseDocument, pk=pk)
@@ -217,7 +219,7 @@ class EnterpriseDocumentViewSet(viewsets.ModelViewSet):
 
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.user_type in ['admin', 'superadmin']
+        return request.principal.is_admin
 
 
 class BusinessProfileFormViewSet(viewsets.ModelViewSet):
@@ -234,22 +236,36 @@ class BusinessProfileFormViewSet(viewsets.ModelViewSet):
         return BusinessProfileFormSerializer
 
     def perform_create(self, serializer):
-        if self.request.user.user_type not in ['admin', 'superadmin']:
+        if not self.request.principal.is_admin:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("Only admins can create profile forms.")
         serializer.save(created_by=self.request.user)
 
     def perform_update(self, serializer):
-        if self.request.user.user_type not in ['admin', 'superadmin']:
+        if not self.request.principal.is_admin:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("Only admins can edit profile forms.")
         serializer.save()
 
     def destroy(self, request, *args, **kwargs):
-        if request.user.user_type not in ['admin', 'superadmin']:
+        if not request.principal.is_admin:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         return super().destroy(request, *args, **kwargs)
 
+    @action(detail=True, methods=['get'], url_path='auto-fill')
+    def auto_fill(self, request, pk=None):
+        """GET /api/profile-forms/{id}/auto-fill/ → {field_id: value} for the current enterprise"""
+        from .auto_fill import resolve_auto_fill
+        enterprise = request.principal.enterprise
+        if request.principal.is_admin and request.query_params.get('enterprise'):
+            enterprise = get_object_or_404(Enterprise, pk=request.query_params['enterprise'])
+        if enterprise is None:
+            return Response({'error': 'Not an enterprise user'}, status=status.HTTP_403_FORBIDDEN)
+
+        form = get_object_or_404(BusinessProfileForm, pk=pk)
+        fields = BusinessProfileField.objects.filter(section__form=form).only('id', 'auto_fill_source')
+        return Response(resolve_auto_fill(enterprise, fields.exclude(auto_fill_source='')))
+
     @action(detail=False, methods=['get'], url_path='by-sector')
     def by_sector(self, request):
         """GET /api/profile-forms/by-sector/?sector=agriculture"""
@@ -288,19 +304,20 @@ class EnterpriseProfileFormResponseViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        if user.user_type in ['admin', 'superadmin']:
+        principal = self.request.principal
+        if principal.is_admin:
             return EnterpriseProfileFormResponse.objects.select_related('enterprise', 'form').all()
-        if user.user_type == 'enterprise' and hasattr(user, 'enterprise'):
-            return EnterpriseProfileFormResponse.objects.filter(enterprise=user.enterprise)
+        if user.user_type == 'enterprise' and principal.enterprise:
+            return EnterpriseProfileFormResponse.objects.filter(enterprise=principal.enterprise)
         return EnterpriseProfileFormResponse.objects.none()
 
     def perform_create(self, serializer):
-        user = self.request.user
-        if not hasattr(user, 'enterprise'):
+        principal = self.request.principal
+        if not principal.enterprise:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("Only enterprise users can submit profile responses.")
         from django.utils import timezone as tz
-        serializer.save(enterprise=user.enterprise, submitted_at=tz.now())
+        serializer.save(enterprise=principal.enterprise, submitted_at=tz.now())
 
     def perform_update(self, serializer):
         from django.utils import timezone as tz
@@ -309,11 +326,11 @@ class EnterpriseProfileFormResponseViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get', 'put', 'patch'], url_path='mine')
     def mine(self, request):
         """GET or update the current enterprise's profile form response."""
-        user = request.user
-        if not hasattr(user, 'enterprise'):
+        principal = request.principal
+        if not principal.enterprise:
             return Response({'error': 'Not an enterprise user'}, status=status.HTTP_403_FORBIDDEN)
         try:
-            obj = EnterpriseProfileFormResponse.objects.select_related('form').get(enterprise=user.enterprise)
+            obj = EnterpriseProfileFormResponse.objects.select_related('form').get(enterprise=principal.enterprise)
         except EnterpriseProfileFormResponse.DoesNotExist:
             return Response({'detail': 'No profile form response found'}, status=status.HTTP_404_NOT_FOUND)
 
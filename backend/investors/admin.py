@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Investor, InvestorCriteria, Match, MatchInteraction, PartnerFundingForm, FormSection, FormField
+from .models import Investor, InvestorCriteria, Match, MatchScore, MatchInteraction, PartnerFundingForm, FormSection, FormField
 
 
 class FormFieldInline(admin.TabularInline):
@@ -36,6 +36,13 @@ class MatchAdmin(admin.ModelAdmin):
     search_fields = ['enterprise__business_name', 'investor__organization_name']
 
 
+@admin.register(MatchScore)
+class MatchScoreAdmin(admin.ModelAdmin):
+    list_display = ['criteria', 'campaign', 'match_score', 'computed_at']
+    list_select_related = ['criteria__investor', 'campaign']
+    readonly_fields = ['computed_at']
+
+
 @admin.register(MatchInteraction)
 class MatchInteractionAdmin(admin.ModelAdmin):
     list_display = ['match', 'interaction_type', 'initiated_by', 'created_at']
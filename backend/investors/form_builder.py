@@ -0,0 +1,72 @@
+"""
+Bulk writes for funding-form sections and fields.
+
+`clone_form()` (the duplicate action) and `save_sections()` (nested create and
+update in PartnerFundingFormDetailSerializer) write sections, then fields,
+with bulk_create/bulk_update, so the number of queries does not grow with
+the size of the form. `clone_form()` runs in its own transaction;
+`save_sections()` runs in the serializer's, together with the form row.
+
+`save_sections()` diffs the posted sections against the stored ones instead
+of deleting and recreating them (core.form_tree), so field ids, the keys of
+CampaignPartnerApplication.form_responses and
+PartnerApplicationDocument.document_key, survive form edits.
+
+Bulk writes send no model signals, so both functions bump the form's
+updated_at themselves (see investors.form_schema).
+"""
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
+from core.form_tree import save_form_tree
+from .models import FormField, FormSection, PartnerFundingForm
+
+
+SECTION_ATTRS = ('title', 'description', 'order')
+FIELD_ATTRS = (
+    'field_type', 'label', 'help_text', 'is_required', 'order', 'min_value', 'max_value',
+    'choices', 'accepted_file_types', 'max_file_size_mb', 'auto_fill_source', 'conditional_rules',
+)
+
+
+@transaction.atomic
+def clone_form(form, **overrides):
+    """Copy `form` with its sections and fields; `overrides` set attributes of the new form."""
+    attrs = {
+        'partner_id': form.partner_id,
+        'name': form.name,
+        'description': form.description,
+        'funding_type': form.funding_type,
+        'min_readiness_score': form.min_readiness_score,
+        'status': form.status,
+        'version': form.version,
+        'created_by_id': form.created_by_id,
+    }
+    for name in overrides:
+        attrs.pop(f'{name}_id', None)
+    attrs.update(overrides)
+    new_form = PartnerFundingForm.objects.create(**attrs)
+
+    # Reuses sections__fields when the caller's queryset already prefetched them
+    prefetch_related_objects([form], 'sections__fields')
+    sections = list(form.sections.all())
+    new_sections = FormSection.objects.bulk_create([
+        FormSection(form=new_form, **{name: getattr(section, name) for name in SECTION_ATTRS})
+        for section in sections
+    ])
+    FormField.objects.bulk_create([
+        FormField(section=new_section, **{name: getattr(field, name) for name in FIELD_ATTRS})
+        for section, new_section in zip(sections, new_sections)
+        for field in section.fields.all()
+    ])
+    return new_form
+
+
+def save_sections(form, sections_data):
+    """
+    Make the form's sections and fields match `sections_data` (nested dicts,
+    as posted). Call it inside transaction.atomic().
+    """
+    save_form_tree(form, sections_data, FormSection, FormField, SECTION_ATTRS, FIELD_ATTRS)
+    form.save(update_fields=['updated_at'])
+    return form
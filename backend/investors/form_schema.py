@@ -0,0 +1,163 @@
+"""
+Compiled funding-form schemas.
+
+Rendering a partner application needs the funding form's sections and
+fields in order, which used to cost a query per section on every request.
+`get_form_schema(form)` compiles them once per form version into an
+immutable FormSchema: ordered sections and fields, the file fields, each
+field's conditional rules, the response validators (investors.form_validation)
+and the sections already rendered the way FormSectionSerializer renders them.
+
+Schemas are kept in a per-process LRU keyed by (form id, updated_at). Every
+FormSection and FormField write touches the form's updated_at (see
+investors.signals; bulk writes call `touch_forms` themselves), so the next
+lookup compiles the new version and stale versions age out of the LRU.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .form_validation import compile_validators
+from .models import FormField, FormSection, PartnerFundingForm
+
+
+DEFAULT_CACHE_SIZE = 256
+
+FieldSchema = namedtuple('FieldSchema', [
+    'id', 'section_id', 'field_type', 'label', 'help_text', 'is_required', 'order',
+    'min_value', 'max_value', 'choices', 'accepted_file_types', 'max_file_size_mb',
+    'auto_fill_source', 'conditional_rules',
+])
+
+SectionSchema = namedtuple('SectionSchema', ['id', 'title', 'description', 'order', 'fields'])
+
+FormSchema = namedtuple('FormSchema', [
+    'form_id', 'updated_at',
+    'sections',          # SectionSchema, in display order
+    'fields',            # every FieldSchema, in display order
+    'fields_by_id',      # {field id: FieldSchema}
+    'file_fields',       # FieldSchema with field_type 'file', in display order
+    'conditional_rules', # {field id: rules} for fields that have any
+    'validators',        # FieldValidator per field, see form_validation
+    'sections_data',     # frozen FormSectionSerializer output, see render_sections()
+])
+
+_schemas = OrderedDict()
+_lock = threading.Lock()
+
+
+def freeze(value):
+    """Read-only copy of JSON-like data: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Plain, JSON-serializable copy of frozen data"""
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def get_form_schema(form):
+    """The compiled schema for this version of `form` (a PartnerFundingForm)."""
+    key = (form.pk, form.updated_at)
+    with _lock:
+        schema = _schemas.get(key)
+        if schema is not None:
+            _schemas.move_to_end(key)
+            return schema
+
+    schema = compile_form_schema(form)
+    with _lock:
+        _schemas[key] = schema
+        while len(_schemas) > getattr(settings, 'FORM_SCHEMA_CACHE_SIZE', DEFAULT_CACHE_SIZE):
+            _schemas.popitem(last=False)
+    return schema
+
+
+def compile_form_schema(form):
+    """Load the form's sections and fields (two queries) and build its FormSchema."""
+    from .serializers import FormSectionSerializer
+
+    sections = list(
+        FormSection.objects.filter(form_id=form.pk)
+        .order_by('order', 'id')
+        .prefetch_related(Prefetch('fields', queryset=FormField.objects.order_by('order', 'id')))
+    )
+
+    section_schemas = []
+    fields = []
+    for section in sections:
+        section_fields = tuple(
+            FieldSchema(
+                id=field.id,
+                section_id=section.id,
+                field_type=field.field_type,
+                label=field.label,
+                help_text=field.help_text,
+                is_required=field.is_required,
+                order=field.order,
+                min_value=field.min_value,
+                max_value=field.max_value,
+                choices=freeze(field.choices or []),
+                accepted_file_types=freeze(field.accepted_file_types or []),
+                max_file_size_mb=field.max_file_size_mb,
+                auto_fill_source=field.auto_fill_source,
+                conditional_rules=freeze(field.conditional_rules or {}),
+            )
+            for field in section.fields.all()
+        )
+        section_schemas.append(SectionSchema(
+            id=section.id,
+            title=section.title,
+            description=section.description,
+            order=section.order,
+            fields=section_fields,
+        ))
+        fields.extend(section_fields)
+
+    return FormSchema(
+        form_id=form.pk,
+        updated_at=form.updated_at,
+        sections=tuple(section_schemas),
+        fields=tuple(fields),
+        fields_by_id=MappingProxyType({field.id: field for field in fields}),
+        file_fields=tuple(field for field in fields if field.field_type == 'file'),
+        conditional_rules=MappingProxyType({field.id: field.conditional_rules for field in fields if field.conditional_rules}),
+        validators=compile_validators(fields),
+        sections_data=freeze(FormSectionSerializer(sections, many=True).data),
+    )
+
+
+def render_sections(schema):
+    """The form's sections as FormSectionSerializer(many=True) would render them"""
+    return thaw(schema.sections_data)
+
+
+def touch_forms(form_ids):
+    """Bump updated_at on the given forms so their cached schemas are recompiled."""
+    form_ids = [form_id for form_id in set(form_ids) if form_id is not None]
+    if form_ids:
+        PartnerFundingForm.objects.filter(pk__in=form_ids).update(updated_at=timezone.now())
+
+
+def touch_section_forms(section_ids):
+    """touch_forms() for the forms owning the given sections, in one UPDATE"""
+    section_ids = {section_id for section_id in section_ids if section_id is not None}
+    if section_ids:
+        PartnerFundingForm.objects.filter(sections__in=section_ids).update(updated_at=timezone.now())
+
+
+def clear_form_schemas():
+    with _lock:
+        _schemas.clear()
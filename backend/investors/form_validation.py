@@ -0,0 +1,275 @@
+"""
+Funding-form response validation.
+
+`compile_validators(fields)` turns a form's FieldSchemas into one small
+validator per field: the required flag, a value check built from the field's
+min_value/max_value, choices or accepted_file_types, and its show_if
+condition. The validators are compiled together with the form schema (see
+investors.form_schema), so they are cached per form version as well, and
+`validate_form_responses()` is a single pass over them with no queries.
+
+Responses are keyed by str(field id). A show_if rule names the field it
+depends on by id (or by the raw response key) and compares its value:
+
+    {'show_if': {'field': '12', 'operator': '>', 'value': 10000000}}
+
+A list of rules must all match. Hidden fields are neither required nor
+checked.
+
+Auto-fill fields are answered by the server (enterprises.auto_fill), not the
+applicant, so they are never required; a resolved value is still checked
+against the field's min_value/max_value or choices.
+"""
+import os
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+
+REQUIRED_MESSAGE = 'This field is required.'
+
+FieldValidator = namedtuple('FieldValidator', ['key', 'field_type', 'is_required', 'check', 'is_shown'])
+
+
+def is_empty(value):
+    return value is None or value == '' or value == [] or value == {}
+
+
+def to_decimal(value):
+    """Decimal for numbers and numeric strings, None for anything else"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    if isinstance(value, str):
+        try:
+            return Decimal(value.strip().replace(',', ''))
+        except InvalidOperation:
+            return None
+    return None
+
+
+def file_name(value):
+    """The file name of a file response: a name or URL, or {name: ...}"""
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('file_name') or value.get('url') or ''
+    return str(value).split('?', 1)[0]
+
+
+def normalize_file_types(file_types):
+    return frozenset(
+        file_type.lower() if file_type.startswith('.') else f'.{file_type.lower()}'
+        for file_type in file_types if isinstance(file_type, str) and file_type
+    )
+
+
+def file_type_error(name, accepted):
+    """Error message if `name` has an extension outside `accepted`, else None"""
+    if accepted and os.path.splitext(name)[1].lower() not in accepted:
+        return f"File type not accepted. Allowed: {', '.join(sorted(accepted))}."
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Value checks, one per field type
+# ---------------------------------------------------------------------------
+
+def number_check(min_value, max_value):
+    def check(value):
+        number = to_decimal(value)
+        if number is None:
+            return 'Enter a number.'
+        if min_value is not None and number < min_value:
+            return f'Must be at least {min_value}.'
+        if max_value is not None and number > max_value:
+            return f'Must be at most {max_value}.'
+        return None
+    return check
+
+
+def choice_check(choices):
+    allowed = frozenset(
+        str(choice.get('value')) if hasattr(choice, 'get') else str(choice)
+        for choice in choices
+    )
+    if not allowed:
+        return None
+
+    def check(value):
+        values = value if isinstance(value, (list, tuple)) else (value,)
+        for item in values:
+            if str(item) not in allowed:
+                return f'"{item}" is not a valid choice.'
+        return None
+    return check
+
+
+def file_check(accepted_file_types):
+    accepted = normalize_file_types(accepted_file_types)
+    if not accepted:
+        return None
+
+    def check(value):
+        values = value if isinstance(value, (list, tuple)) else (value,)
+        for item in values:
+            error = file_type_error(file_name(item), accepted)
+            if error:
+                return error
+        return None
+    return check
+
+
+def value_check(field):
+    if field.field_type == 'number':
+        return number_check(field.min_value, field.max_value)
+    if field.field_type == 'choice':
+        return choice_check(field.choices)
+    if field.field_type == 'file':
+        return file_check(field.accepted_file_types)
+    if field.field_type == 'auto_fill':
+        if field.choices:
+            return choice_check(field.choices)
+        if field.min_value is not None or field.max_value is not None:
+            return number_check(field.min_value, field.max_value)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# show_if conditions
+# ---------------------------------------------------------------------------
+
+def _compare(compare):
+    """Ordering operator on numbers when both sides are numeric, else on strings"""
+    def operator(actual, expected):
+        if is_empty(actual):
+            return False
+        left, right = to_decimal(actual), to_decimal(expected)
+        if left is None or right is None:
+            left, right = str(actual), str(expected)
+        return compare(left, right)
+    return operator
+
+
+def _equals(actual, expected):
+    if actual == expected:
+        return True
+    left, right = to_decimal(actual), to_decimal(expected)
+    if left is not None and right is not None:
+        return left == right
+    return not is_empty(actual) and str(actual) == str(expected)
+
+
+def _one_of(actual, expected):
+    options = expected if isinstance(expected, (list, tuple)) else (expected,)
+    return any(_equals(actual, option) for option in options)
+
+
+def _contains(actual, expected):
+    if isinstance(actual, (list, tuple)):
+        return any(_equals(item, expected) for item in actual)
+    return isinstance(actual, str) and str(expected) in actual
+
+
+OPERATORS = {
+    '==': _equals,
+    '!=': lambda actual, expected: not _equals(actual, expected),
+    '>': _compare(lambda left, right: left > right),
+    '>=': _compare(lambda left, right: left >= right),
+    '<': _compare(lambda left, right: left < right),
+    '<=': _compare(lambda left, right: left <= right),
+    'in': _one_of,
+    'not_in': lambda actual, expected: not _one_of(actual, expected),
+    'contains': _contains,
+    'is_empty': lambda actual, expected: is_empty(actual),
+    'is_not_empty': lambda actual, expected: not is_empty(actual),
+}
+OPERATORS.update({
+    '=': OPERATORS['=='],
+    'equals': OPERATORS['=='],
+    'not_equals': OPERATORS['!='],
+    'gt': OPERATORS['>'],
+    'gte': OPERATORS['>='],
+    'lt': OPERATORS['<'],
+    'lte': OPERATORS['<='],
+})
+
+
+def compile_condition(conditional_rules, keys):
+    """
+    is_shown(responses) for a field's conditional_rules, or None if the field
+    is always shown. `keys` maps field ids, as strings, to response keys.
+    Rules with an unknown operator never match, so the field stays hidden.
+    """
+    rules = conditional_rules.get('show_if') if conditional_rules else None
+    if not rules:
+        return None
+    if not isinstance(rules, (list, tuple)):
+        rules = (rules,)
+
+    tests = []
+    for rule in rules:
+        if not hasattr(rule, 'get'):
+            continue
+        reference = str(rule.get('field', ''))
+        tests.append((
+            keys.get(reference, reference),
+            OPERATORS.get(str(rule.get('operator', '==')).lower(), lambda actual, expected: False),
+            rule.get('value'),
+        ))
+    if not tests:
+        return None
+
+    def is_shown(responses):
+        for key, operator, expected in tests:
+            if not operator(responses.get(key), expected):
+                return False
+        return True
+    return is_shown
+
+
+def compile_validators(fields):
+    """One FieldValidator per FieldSchema, in display order"""
+    keys = {str(field.id): str(field.id) for field in fields}
+    return tuple(
+        FieldValidator(
+            key=str(field.id),
+            field_type=field.field_type,
+            is_required=field.is_required and field.field_type != 'auto_fill',
+            check=value_check(field),
+            is_shown=compile_condition(field.conditional_rules, keys),
+        )
+        for field in fields
+    )
+
+
+def validate_responses(validators, responses, uploaded_keys=(), partial=False):
+    """
+    {response key: [error]} for `responses` against compiled validators; empty
+    when they are valid. With `partial` (saving a draft) missing answers are
+    allowed. A required file field is also satisfied by an uploaded document
+    whose key is in `uploaded_keys`.
+    """
+    if not isinstance(responses, dict):
+        return {'form_responses': ['Expected an object of field id to answer.']}
+
+    errors = {}
+    for validator in validators:
+        if validator.is_shown is not None and not validator.is_shown(responses):
+            continue
+        value = responses.get(validator.key)
+        if is_empty(value):
+            if (validator.is_required and not partial
+                    and not (validator.field_type == 'file' and validator.key in uploaded_keys)):
+                errors[validator.key] = [REQUIRED_MESSAGE]
+            continue
+        if validator.check is not None:
+            error = validator.check(value)
+            if error:
+                errors[validator.key] = [error]
+    return errors
+
+
+def validate_form_responses(form, responses, uploaded_keys=(), partial=False):
+    """validate_responses() against the compiled schema of `form` (a PartnerFundingForm)"""
+    from .form_schema import get_form_schema
+
+    return validate_responses(get_form_schema(form).validators, responses, uploaded_keys, partial)
@@ -0,0 +1,34 @@
+"""
+Management command: refresh_match_scores
+
+Rebuilds the precomputed MatchScore table. The table is normally maintained
+incrementally by investors.signals; run this after a bulk import or to
+backfill an existing database.
+
+Usage:
+    python manage.py refresh_match_scores
+    python manage.py refresh_match_scores --investor 12
+"""
+
+from django.core.management.base import BaseCommand
+from investors.models import InvestorCriteria
+from investors.matching import refresh_match_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute precomputed campaign match scores for partner criteria'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--investor',
+            type=int,
+            help='Only refresh scores for this investor id',
+        )
+
+    def handle(self, *args, **options):
+        criteria = InvestorCriteria.objects.all()
+        if options['investor']:
+            criteria = criteria.filter(investor_id=options['investor'])
+
+        written = refresh_match_scores(criteria_queryset=criteria)
+        self.stdout.write(self.style.SUCCESS(f'Stored {written} match scores.'))
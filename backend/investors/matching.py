@@ -0,0 +1,120 @@
+"""
+Campaign <-> partner match scoring, evaluated in the database.
+
+Every rule is a CASE/WHEN expression so campaigns can be scored, filtered and
+ordered by a single query. Scores are materialised into MatchScore by
+`refresh_match_scores`, which investors.signals calls for just the rows
+affected by a Campaign, Enterprise, Investor or InvestorCriteria change.
+"""
+from django.db import transaction
+from django.db.models import Case, When, Value, IntegerField, Q, F
+
+
+# Points awarded per matching rule (max total: 75)
+SECTOR_POINTS = 30
+FUNDING_AMOUNT_POINTS = 20
+MANAGEMENT_STRUCTURE_POINTS = 15
+MIN_INVESTMENT_POINTS = 10
+
+
+def _points(condition, points):
+    return Case(
+        When(condition, then=Value(points)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def match_score_expressions(investor, criteria):
+    """
+    Return the per-rule score expressions for a Campaign queryset, keyed by
+    the annotation name. Empty criteria lists never match, mirroring the
+    behaviour of `x in []`.
+    """
+    return {
+        'sector_score': _points(
+            Q(enterprise__sector__in=criteria.sectors or []),
+            SECTOR_POINTS,
+        ),
+        'funding_amount_score': _points(
+            Q(target_amount__gte=criteria.min_funding_amount,
+              target_amount__lte=criteria.max_funding_amount),
+            FUNDING_AMOUNT_POINTS,
+        ),
+        'management_structure_score': _points(
+            Q(enterprise__management_structure__in=criteria.preferred_sizes or []),
+            MANAGEMENT_STRUCTURE_POINTS,
+        ),
+        'min_investment_score': _points(
+            Q(min_investment__lte=investor.max_investment),
+            MIN_INVESTMENT_POINTS,
+        ),
+    }
+
+
+def score_campaigns(queryset, investor, criteria):
+    """
+    Annotate `queryset` (Campaigns) with `match_score` plus the rule
+    breakdown, drop campaigns scoring zero and order best matches first.
+    """
+    expressions = match_score_expressions(investor, criteria)
+    total = None
+    for name in expressions:
+        total = F(name) if total is None else total + F(name)
+
+    return (
+        queryset
+        .annotate(**expressions)
+        .annotate(match_score=total)
+        .filter(match_score__gt=0)
+        .order_by('-match_score', '-created_at')
+    )
+
+
+def build_match_scores(criteria_queryset, campaigns, score_model):
+    """
+    Unsaved `score_model` (MatchScore) rows for `campaigns` against every
+    active criteria set in `criteria_queryset`, one query per criteria set.
+    Takes the models as arguments so migrations can pass historical ones.
+    """
+    rows = []
+    for criteria in criteria_queryset.filter(is_active=True).select_related('investor'):
+        expressions = match_score_expressions(criteria.investor, criteria)
+        scored = score_campaigns(campaigns, criteria.investor, criteria).values(
+            'pk', 'match_score', *expressions
+        )
+        for row in scored:
+            rows.append(score_model(
+                criteria=criteria,
+                campaign_id=row['pk'],
+                match_score=row['match_score'],
+                match_details={name: row[name] for name in expressions},
+            ))
+    return rows
+
+
+def refresh_match_scores(criteria_queryset=None, campaign_ids=None):
+    """
+    Recompute MatchScore rows for the given criteria and/or campaigns.
+
+    Existing rows in scope are replaced; criteria that are inactive and
+    campaigns that are no longer active simply end up with no rows.
+    Returns the number of rows written.
+    """
+    from campaigns.models import Campaign
+    from .models import InvestorCriteria, MatchScore
+
+    if criteria_queryset is None:
+        criteria_queryset = InvestorCriteria.objects.all()
+
+    stale = MatchScore.objects.filter(criteria__in=criteria_queryset)
+    campaigns = Campaign.objects.filter(status='active')
+    if campaign_ids is not None:
+        stale = stale.filter(campaign_id__in=campaign_ids)
+        campaigns = campaigns.filter(pk__in=campaign_ids)
+
+    rows = build_match_scores(criteria_queryset, campaigns, MatchScore)
+    with transaction.atomic():
+        stale.delete()
+        MatchScore.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
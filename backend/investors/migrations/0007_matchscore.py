@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0008_campaigninterest_enterprise_decision_at_and_more'),
+        ('investors', '0006_formsection_investorcriteria_auto_reject_below_score_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('match_details', models.JSONField(default=dict, help_text='Points awarded per matching rule')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='campaigns.campaign')),
+                ('criteria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='investors.investorcriteria')),
+            ],
+            options={
+                'ordering': ['-match_score'],
+                'indexes': [models.Index(fields=['criteria', '-match_score'], name='investors_m_criteri_ac6f0b_idx')],
+                'unique_together': {('criteria', 'campaign')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-17 09:12
+
+from django.db import migrations
+
+
+def backfill_match_scores(apps, schema_editor):
+    """Score the campaigns that were already active when MatchScore was added"""
+    from investors.matching import build_match_scores
+
+    Campaign = apps.get_model('campaigns', 'Campaign')
+    InvestorCriteria = apps.get_model('investors', 'InvestorCriteria')
+    MatchScore = apps.get_model('investors', 'MatchScore')
+    rows = build_match_scores(
+        InvestorCriteria.objects.all(), Campaign.objects.filter(status='active'), MatchScore,
+    )
+    MatchScore.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investors', '0007_matchscore'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_match_scores, reverse_code=migrations.RunPython.noop),
+    ]
@@ -168,6 +168,31 @@ class Match(models.Model):
         verbose_name_plural = "Matches"
 
 
+class MatchScore(models.Model):
+    """
+    Precomputed score of an active campaign against a partner's active criteria.
+    Kept up to date by investors.signals so the opportunity feed is an indexed
+    lookup; only pairs with a positive score are stored.
+    """
+    criteria = models.ForeignKey(InvestorCriteria, on_delete=models.CASCADE, related_name='match_scores')
+    campaign = models.ForeignKey('campaigns.Campaign', on_delete=models.CASCADE, related_name='match_scores')
+
+    match_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    match_details = models.JSONField(default=dict, help_text="Points awarded per matching rule")
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.criteria} -> {self.campaign_id}: {self.match_score}"
+
+    class Meta:
+        unique_together = ['criteria', 'campaign']
+        ordering = ['-match_score']
+        indexes = [
+            models.Index(fields=['criteria', '-match_score']),
+        ]
+
+
 class MatchInteraction(models.Model):
     """Track interactions between investor and SME"""
     INTERACTION_TYPES = (
@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from .models import (
     Investor, InvestorCriteria, Match, MatchInteraction, 
@@ -146,7 +148,10 @@ class MatchedCampaignSerializer(serializers.ModelSerializer):
     
     def get_documents(self, obj):
         from campaigns.serializers import CampaignDocumentSerializer
-        documents = obj.documents.filter(is_public=True)
+        # Prefer the batch-prefetched public documents when the view supplied them
+        documents = getattr(obj, 'public_documents', None)
+        if documents is None:
+            documents = obj.documents.filter(is_public=True)
         return CampaignDocumentSerializer(documents, many=True, context=self.context).data
 
 
@@ -191,6 +196,14 @@ class PartnerFundingFormSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class CompiledFundingFormSerializer(PartnerFundingFormSerializer):
+    """PartnerFundingFormSerializer with the sections rendered from the compiled form schema"""
+    sections = serializers.SerializerMethodField()
+
+    def get_sections(self, obj):
+        from .form_schema import get_form_schema, render_sections
+        return render_sections(get_form_schema(obj))
+
 class PartnerFundingFormDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer for creating/updating forms with nested data"""
     sections = serializers.ListField(child=serializers.DictField(), write_only=True, required=False)
@@ -206,42 +219,37 @@ class PartnerFundingFormDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at', 'updated_at']
     
     def create(self, validated_data):
+        from .form_builder import save_sections
         sections_data = validated_data.pop('sections', [])
         request = self.context.get('request')
         if request and request.user:
             validated_data['created_by'] = request.user
         
-        # Create the form
-        form = PartnerFundingForm.objects.create(**validated_data)
-        
-        # Create sections and fields
-        for section_data in sections_data:
-            fields_data = section_data.pop('fields', [])
-            section = FormSection.objects.create(form=form, **section_data)
-            
-            for field_data in fields_data:
-                FormField.objects.create(section=section, **field_data)
+        # Create the form, then its sections and fields in bulk
+        with transaction.atomic():
+            form = PartnerFundingForm.objects.create(**validated_data)
+            save_sections(form, sections_data)
         
         return form
     
     def update(self, instance, validated_data):
+        from .form_builder import save_sections
         sections_data = validated_data.pop('sections', None)
         
-        # Update form fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # If sections data provided, update sections
-        if sections_data is not None:
-            # Delete existing sections and recreate
-            instance.sections.all().delete()
+        with transaction.atomic():
+            # Update form fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
             
-            for section_data in sections_data:
-                fields_data = section_data.pop('fields', [])
-                section = FormSection.objects.create(form=instance, **section_data)
-                
-                for field_data in fields_data:
-                    FormField.objects.create(section=section, **field_data)
+            # If sections data provided, update sections in place so field ids
+            # (the keys of application form_responses) are kept
+            if sections_data is not None:
+                save_sections(instance, sections_data)
         
         return instance
+    
+    def to_representation(self, instance):
+        # The view drops prefetched sections after a save; load them in two queries
+        prefetch_related_objects([instance], 'sections__fields')
+        return super().to_representation(instance)
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from campaigns.models import Campaign
+from enterprises.models import Enterprise
+from .form_schema import touch_forms, touch_section_forms
+from .models import FormField, FormSection, Investor, InvestorCriteria
+from .matching import refresh_match_scores
+
+
+# Fields that feed investors.matching; saves touching none of them are ignored
+CAMPAIGN_SCORE_FIELDS = {'status', 'target_amount', 'min_investment', 'enterprise'}
+ENTERPRISE_SCORE_FIELDS = {'sector', 'management_structure'}
+INVESTOR_SCORE_FIELDS = {'max_investment'}
+
+
+def _affects_score(update_fields, score_fields):
+    return update_fields is None or bool(score_fields & set(update_fields))
+
+
+@receiver(post_save, sender=Campaign)
+def rescore_campaign(sender, instance, update_fields=None, **kwargs):
+    """Rescore one campaign against every active criteria set."""
+    if not _affects_score(update_fields, CAMPAIGN_SCORE_FIELDS):
+        return
+    campaign_ids = [instance.pk]
+    transaction.on_commit(lambda: refresh_match_scores(campaign_ids=campaign_ids))
+
+
+@receiver(post_save, sender=Enterprise)
+def rescore_enterprise_campaigns(sender, instance, created, update_fields=None, **kwargs):
+    """Rescore the enterprise's active campaigns when its profile changes."""
+    if created or not _affects_score(update_fields, ENTERPRISE_SCORE_FIELDS):
+        return
+    enterprise_id = instance.pk
+
+    def refresh():
+        campaign_ids = list(
+            Campaign.objects.filter(enterprise_id=enterprise_id, status='active')
+            .values_list('id', flat=True)
+        )
+        if campaign_ids:
+            refresh_match_scores(campaign_ids=campaign_ids)
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_save, sender=InvestorCriteria)
+def rescore_criteria(sender, instance, **kwargs):
+    """Rescore every active campaign against a created or edited criteria set."""
+    criteria_id = instance.pk
+    transaction.on_commit(
+        lambda: refresh_match_scores(
+            criteria_queryset=InvestorCriteria.objects.filter(pk=criteria_id)
+        )
+    )
+
+
+@receiver(post_save, sender=Investor)
+def rescore_investor(sender, instance, created, update_fields=None, **kwargs):
+    """The investor's max_investment feeds the min-investment rule."""
+    if created or not _affects_score(update_fields, INVESTOR_SCORE_FIELDS):
+        return
+    investor_id = instance.pk
+    transaction.on_commit(
+        lambda: refresh_match_scores(
+            criteria_queryset=InvestorCriteria.objects.filter(investor_id=investor_id)
+        )
+    )
+
+
+@receiver([post_save, post_delete], sender=FormSection)
+def touch_section_form(sender, instance, **kwargs):
+    """A new form version: cached schemas are keyed by the form's updated_at."""
+    touch_forms([instance.form_id])
+
+
+@receiver([post_save, post_delete], sender=FormField)
+def touch_field_form(sender, instance, **kwargs):
+    touch_section_forms([instance.section_id])
@@ -0,0 +1,281 @@
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient
+
+from campaigns.models import Campaign
+from enterprises.models import Enterprise
+from .form_schema import get_form_schema
+from .matching import score_campaigns
+from .models import FormField, FormSection, Investor, InvestorCriteria, MatchScore, PartnerFundingForm
+
+User = get_user_model()
+
+
+class FundingFormBuilderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('+250737000001', 'builder@example.com', None, user_type='investor')
+        cls.partner = Investor.objects.create(
+            user=user,
+            investor_type='bank',
+            organization_name='Builder Bank',
+            contact_email=user.email,
+            min_investment=Decimal('100000'),
+            max_investment=Decimal('50000000'),
+        )
+        cls.form = PartnerFundingForm.objects.create(partner=cls.partner, name='SME Loan', funding_type='loan')
+        for s in range(12):
+            section = FormSection.objects.create(form=cls.form, title=f'Section {s}', order=s)
+            FormField.objects.bulk_create([
+                FormField(
+                    section=section, field_type='choice', label=f'Question {s}.{f}', order=f,
+                    choices=[{'value': 'yes', 'label': 'Yes'}], conditional_rules={'show_if': {'field': '1', 'value': 'yes'}},
+                )
+                for f in range(7 if s < 8 else 6)
+            ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.partner.user)
+
+    def url(self, suffix=''):
+        return f'/api/investors/funding-forms/{self.form.pk}/{suffix}'
+
+    def structure(self, form):
+        return [
+            (section.title, section.order, [
+                (field.label, field.order, field.choices, field.conditional_rules) for field in section.fields.all()
+            ])
+            for section in form.sections.order_by('order').prefetch_related('fields')
+        ]
+
+    def test_duplicate_copies_in_bulk(self):
+        with self.assertNumQueries(12):
+            response = self.client.post(self.url('duplicate/'))
+        self.assertEqual(response.status_code, 201)
+
+        copy = PartnerFundingForm.objects.get(pk=response.data['id'])
+        self.assertEqual(copy.name, 'SME Loan (Copy)')
+        self.assertEqual(copy.status, 'draft')
+        self.assertEqual(copy.created_by, self.partner.user)
+        self.assertEqual(FormField.objects.filter(section__form=copy).count(), 80)
+        self.assertEqual(self.structure(copy), self.structure(self.form))
+
+    def test_update_keeps_field_ids(self):
+        schema = get_form_schema(self.form)
+        sections = PartnerFundingForm.objects.get(pk=self.form.pk).sections.order_by('order')
+        first, second = sections[0], sections[1]
+        kept, moved = first.fields.order_by('order')[:2]
+        payload = [
+            {
+                'id': first.id, 'title': 'Renamed', 'order': 0,
+                'fields': [{'id': kept.id, 'field_type': 'number', 'label': 'Amount', 'order': 0}],
+            },
+            {
+                'id': second.id, 'title': second.title, 'order': 1,
+                'fields': [
+                    {'id': moved.id, 'field_type': 'choice', 'label': moved.label, 'order': 0},
+                    {'field_type': 'text', 'label': 'New question', 'order': 1},
+                ],
+            },
+            {'title': 'New section', 'order': 2, 'fields': [{'field_type': 'file', 'label': 'Statements'}]},
+        ]
+
+        with self.assertNumQueries(15):
+            response = self.client.patch(self.url(), {'sections': payload}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.form.refresh_from_db()
+        self.assertEqual(self.structure(self.form), [
+            ('Renamed', 0, [('Amount', 0, [{'value': 'yes', 'label': 'Yes'}], {'show_if': {'field': '1', 'value': 'yes'}})]),
+            (second.title, 1, [
+                (moved.label, 0, [{'value': 'yes', 'label': 'Yes'}], {'show_if': {'field': '1', 'value': 'yes'}}),
+                ('New question', 1, [], {}),
+            ]),
+            ('New section', 2, [('Statements', 0, [], {})]),
+        ])
+        self.assertEqual(FormField.objects.get(pk=kept.pk).field_type, 'number')
+        self.assertEqual(FormField.objects.get(pk=moved.pk).section_id, second.id)
+        self.assertEqual(FormField.objects.filter(section__form=self.form).count(), 4)
+
+        # Bulk writes send no signals, so the schema is recompiled through updated_at
+        self.assertNotEqual(get_form_schema(self.form), schema)
+        self.assertEqual(len(get_form_schema(self.form).fields), 4)
+
+
+def python_match_score(campaign, investor, criteria):
+    """The scoring InvestorMatchesView did in Python before it moved into SQL"""
+    score = 0
+    enterprise = campaign.enterprise
+    if enterprise.sector in criteria.sectors:
+        score += 30
+    if criteria.min_funding_amount <= campaign.target_amount <= criteria.max_funding_amount:
+        score += 20
+    if enterprise.management_structure in criteria.preferred_sizes:
+        score += 15
+    if campaign.min_investment <= investor.max_investment:
+        score += 10
+    return score
+
+
+class MatchScoreTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('+250738000001', 'scored@example.com', None, user_type='enterprise')
+        cls.enterprise = Enterprise.objects.create(
+            user=owner,
+            business_name='Scored Ltd',
+            tin_number='SCO001',
+            enterprise_type='limited_company',
+            sector='technology',
+            management_structure='owner_managed',
+            district='Gasabo',
+            phone='+250738000001',
+            year_established=2020,
+            number_of_employees=5,
+        )
+        user = User.objects.create_user('+250738100001', 'scorer@example.com', None, user_type='investor')
+        cls.investor = Investor.objects.create(
+            user=user,
+            investor_type='bank',
+            organization_name='Scoring Bank',
+            contact_email=user.email,
+            min_investment=Decimal('100000'),
+            max_investment=Decimal('50000000'),
+        )
+        cls.criteria = InvestorCriteria.objects.create(
+            investor=cls.investor,
+            sectors=['technology'],
+            min_funding_amount=Decimal('1000000'),
+            max_funding_amount=Decimal('20000000'),
+            preferred_sizes=['owner_managed'],
+        )
+
+    def create_campaign(self, **attrs):
+        attrs = {
+            'enterprise': self.enterprise,
+            'title': 'Growth round',
+            'description': 'Growth round',
+            'campaign_type': 'equity',
+            'target_amount': Decimal('10000000'),
+            'min_investment': Decimal('100000'),
+            'status': 'active',
+            **attrs,
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            return Campaign.objects.create(**attrs)
+
+    def scores(self):
+        return dict(MatchScore.objects.filter(criteria=self.criteria).values_list('campaign_id', 'match_score'))
+
+    def save(self, instance, update_fields=None, **attrs):
+        for name, value in attrs.items():
+            setattr(instance, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save(update_fields=update_fields)
+
+    def test_sql_scores_match_python_scoring(self):
+        owner = User.objects.create_user('+250738000002', 'other@example.com', None, user_type='enterprise')
+        other = Enterprise.objects.create(
+            user=owner,
+            business_name='Retail Ltd',
+            tin_number='SCO002',
+            enterprise_type='limited_company',
+            sector='retail',
+            management_structure='professional_management',
+            district='Gasabo',
+            phone='+250738000002',
+            year_established=2020,
+            number_of_employees=5,
+        )
+        for enterprise in (self.enterprise, other):
+            for target_amount in ('500000', '1000000', '20000000', '90000000'):
+                for min_investment in ('100000', '50000000', '60000000'):
+                    self.create_campaign(
+                        enterprise=enterprise,
+                        target_amount=Decimal(target_amount),
+                        min_investment=Decimal(min_investment),
+                    )
+
+        criteria_sets = [
+            {},
+            {'sectors': [], 'preferred_sizes': []},
+            {'sectors': ['retail', 'technology'], 'preferred_sizes': ['professional_management']},
+            {'sectors': ['agriculture'], 'min_funding_amount': Decimal('0'), 'max_funding_amount': Decimal('0')},
+            {'min_funding_amount': Decimal('20000000'), 'max_funding_amount': Decimal('90000000')},
+        ]
+        for max_investment in (Decimal('50000000'), Decimal('0')):
+            investor = Investor(pk=self.investor.pk, max_investment=max_investment)
+            for attrs in criteria_sets:
+                criteria = InvestorCriteria(
+                    investor=investor,
+                    sectors=attrs.get('sectors', self.criteria.sectors),
+                    preferred_sizes=attrs.get('preferred_sizes', self.criteria.preferred_sizes),
+                    min_funding_amount=attrs.get('min_funding_amount', self.criteria.min_funding_amount),
+                    max_funding_amount=attrs.get('max_funding_amount', self.criteria.max_funding_amount),
+                )
+                with self.subTest(max_investment=max_investment, **attrs):
+                    campaigns = Campaign.objects.select_related('enterprise')
+                    expected = {}
+                    for campaign in campaigns:
+                        score = python_match_score(campaign, investor, criteria)
+                        if score > 0:
+                            expected[campaign.pk] = score
+                    scored = score_campaigns(campaigns, investor, criteria)
+                    self.assertEqual(dict(scored.values_list('pk', 'match_score')), expected)
+                    self.assertEqual(
+                        [campaign.match_score for campaign in scored],
+                        sorted(expected.values(), reverse=True),
+                    )
+
+    def test_campaign_changes_rescore(self):
+        campaign = self.create_campaign()
+        self.assertEqual(self.scores(), {campaign.pk: 75})
+
+        self.save(campaign, target_amount=Decimal('90000000'))
+        self.assertEqual(self.scores(), {campaign.pk: 55})
+
+        self.save(campaign, status='completed')
+        self.assertEqual(self.scores(), {})
+
+    def test_enterprise_changes_rescore(self):
+        campaign = self.create_campaign()
+        self.save(self.enterprise, sector='retail', management_structure='professional_management')
+        self.assertEqual(self.scores(), {campaign.pk: 30})
+
+        # Fields that do not feed the score leave the rows alone
+        with self.assertNumQueries(1):
+            self.save(self.enterprise, update_fields=['business_name'], business_name='Renamed Ltd')
+
+    def test_criteria_changes_rescore(self):
+        campaign = self.create_campaign()
+        self.save(self.criteria, sectors=['retail'], preferred_sizes=[])
+        self.assertEqual(self.scores(), {campaign.pk: 30})
+
+        self.save(self.criteria, is_active=False)
+        self.assertEqual(self.scores(), {})
+
+    def test_admin_approve_rescores(self):
+        campaign = self.create_campaign(status='approved')
+        self.assertEqual(self.scores(), {})
+
+        admin = User.objects.create_user('+250738200001', 'staff@example.com', None, user_type='admin')
+        request = RequestFactory().post('/admin/campaigns/campaign/')
+        request.user = admin
+        site._registry[Campaign].approve_campaigns(request, Campaign.objects.filter(pk=campaign.pk))
+        self.assertEqual(self.scores(), {campaign.pk: 75})
+
+    def test_migration_backfills_active_campaigns(self):
+        campaign = self.create_campaign()
+        self.create_campaign(status='draft')
+        MatchScore.objects.all().delete()
+
+        import_module('investors.migrations.0008_backfill_match_scores').backfill_match_scores(apps, None)
+        self.assertEqual(self.scores(), {campaign.pk: 75})
@@ -3,7 +3,7 @@ from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Q, F, Max, Prefetch, prefetch_related_objects
 from .models import Investor, InvestorCriteria, Match, MatchInteraction, PartnerFundingForm, FormSection, FormField
 from .serializers import (
     InvestorSerializer, InvestorCriteriaSerializer, 
@@ -12,7 +12,7 @@ from .serializers import (
     FormSectionSerializer, FormFieldSerializer
 )
 from enterprises.models import Enterprise
-from campaigns.models import Campaign
+from campaigns.models import Campaign, CampaignDocument
 from rest_framework import generics
 
 
@@ -21,13 +21,13 @@ class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return request.user.is_authenticated
-        return request.user.is_authenticated and request.user.user_type in ['admin', 'superadmin']
+        return request.principal.is_admin
 
 
 class IsInvestor(permissions.BasePermission):
     """Check if user is an investor"""
     def has_permission(self, request, view):
-        return request.user.is_authenticated and hasattr(request.user, 'investor_profile')
+        return request.principal.investor is not None
 
 
 from rest_framework.decorators import action, api_view, permission_classes
@@ -43,25 +43,26 @@ class InvestorViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        if hasattr(user, 'investor_profile'):
+        principal = self.request.principal
+        if principal.investor:
             return Investor.objects.filter(user=user)
         return Investor.objects.all()
 
     @action(detail=False, methods=['get'])
     def my_profile(self, request):
         """Get the current investor's own profile."""
-        if not hasattr(request.user, 'investor_profile'):
+        if not request.principal.investor:
             return Response({'error': 'No investor profile found'}, status=status.HTTP_404_NOT_FOUND)
         from .serializers import InvestorSerializer
-        serializer = InvestorSerializer(request.user.investor_profile)
+        serializer = InvestorSerializer(request.principal.investor)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        if not hasattr(request.user, 'investor_profile'):
+        if not request.principal.investor:
             return Response({'error': 'Not an investor'}, status=403)
 
-        investor = request.user.investor_profile
+        investor = request.principal.investor
 
         from campaigns.models import CampaignInterest
         from django.db.models import Sum
@@ -101,18 +102,18 @@ class InvestorCriteriaViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        if user.user_type in ['admin', 'superadmin']:
+        principal = self.request.principal
+        if principal.is_admin:
             return InvestorCriteria.objects.all()
-        if hasattr(user, 'investor_profile'):
-            return InvestorCriteria.objects.filter(investor=user.investor_profile)
+        if principal.investor:
+            return InvestorCriteria.objects.filter(investor=principal.investor)
         return InvestorCriteria.objects.none()
     
     def perform_create(self, serializer):
         """Upsert: update existing criteria if one already exists for this investor."""
         from rest_framework.exceptions import PermissionDenied
-        user = self.request.user
-        if user.user_type in ['admin', 'superadmin']:
+        principal = self.request.principal
+        if principal.is_admin:
             investor_id = serializer.validated_data.get('investor')
             if investor_id:
                 existing = InvestorCriteria.objects.filter(investor=investor_id).first()
@@ -122,8 +123,8 @@ class InvestorCriteriaViewSet(viewsets.ModelViewSet):
                     existing.save()
                     return
             serializer.save()
-        elif hasattr(user, 'investor_profile'):
-            investor = user.investor_profile
+        elif principal.investor:
+            investor = principal.investor
             existing = InvestorCriteria.objects.filter(investor=investor).first()
             if existing:
                 for attr, value in serializer.validated_data.items():
@@ -137,11 +138,11 @@ class InvestorCriteriaViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         """Ensure investors can only update their own criteria; admins can update any."""
-        user = self.request.user
-        if user.user_type in ['admin', 'superadmin']:
+        principal = self.request.principal
+        if principal.is_admin:
             serializer.save()
-        elif hasattr(user, 'investor_profile'):
-            serializer.save(investor=user.investor_profile)
+        elif principal.investor:
+            serializer.save(investor=principal.investor)
         else:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("Only investors or admins can manage criteria.")
@@ -159,21 +160,22 @@ class MatchViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        if user.user_type in ['admin', 'superadmin']:
+        principal = self.request.principal
+        if principal.is_admin:
             return Match.objects.all().select_related('enterprise__user', 'investor__user', 'campaign')
-        if hasattr(user, 'investor_profile'):
-            return Match.objects.filter(investor=user.investor_profile).select_related('enterprise__user', 'investor__user', 'campaign')
-        if user.user_type == 'enterprise' and hasattr(user, 'enterprise'):
-            return Match.objects.filter(enterprise=user.enterprise).select_related('enterprise__user', 'investor__user', 'campaign')
+        if principal.investor:
+            return Match.objects.filter(investor=principal.investor).select_related('enterprise__user', 'investor__user', 'campaign')
+        if user.user_type == 'enterprise' and principal.enterprise:
+            return Match.objects.filter(enterprise=principal.enterprise).select_related('enterprise__user', 'investor__user', 'campaign')
         return Match.objects.none()
     
     @action(detail=False, methods=['get'])
     def find_matches(self, request):
         """Find potential matches for an investor based on criteria"""
-        if not hasattr(request.user, 'investor_profile'):
+        if not request.principal.investor:
             return Response({'error': 'Not an investor'}, status=status.HTTP_403_FORBIDDEN)
         
-        investor = request.user.investor_profile
+        investor = request.principal.investor
         criteria = InvestorCriteria.objects.filter(investor=investor, is_active=True).first()
         
         if not criteria:
@@ -207,6 +209,14 @@ class MatchViewSet(viewsets.ModelViewSet):
         existing_matches = Match.objects.filter(investor=investor).values_list('enterprise_id', flat=True)
         enterprises = enterprises.exclude(id__in=existing_matches)
         
+        # Rank by the best precomputed score of each enterprise's active campaigns
+        enterprises = enterprises.annotate(
+            best_match_score=Max(
+                'campaigns__match_scores__match_score',
+                filter=Q(campaigns__match_scores__criteria=criteria),
+            )
+        ).order_by(F('best_match_score').desc(nulls_last=True), '-created_at')
+        
         # Return serialized data
         from enterprises.serializers import EnterpriseSerializer
         serializer = EnterpriseSerializer(enterprises[:50], many=True)
@@ -217,7 +227,7 @@ class MatchViewSet(viewsets.ModelViewSet):
         """Investor approves a match"""
         match = self.get_object()
         
-        if not hasattr(request.user, 'investor_profile') or match.investor != request.user.investor_profile:
+        if not request.principal.investor or match.investor != request.principal.investor:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         match.investor_approved = True
@@ -240,7 +250,7 @@ class MatchViewSet(viewsets.ModelViewSet):
         """Investor requests documents from SME"""
         match = self.get_object()
         
-        if not hasattr(request.user, 'investor_profile') or match.investor != request.user.investor_profile:
+        if not request.principal.investor or match.investor != request.principal.investor:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         documents = request.data.get('documents', [])
@@ -263,7 +273,7 @@ class MatchViewSet(viewsets.ModelViewSet):
         """Enterprise accepts a match"""
         match = self.get_object()
         
-        if not hasattr(request.user, 'enterprise') or match.enterprise != request.user.enterprise:
+        if not request.principal.enterprise or match.enterprise != request.principal.enterprise:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         match.enterprise_accepted = True
@@ -286,7 +296,7 @@ class MatchViewSet(viewsets.ModelViewSet):
         """Enterprise rejects a match"""
         match = self.get_object()
         
-        if not hasattr(request.user, 'enterprise') or match.enterprise != request.user.enterprise:
+        if not request.principal.enterprise or match.enterprise != request.principal.enterprise:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         match.status = 'rejected'
@@ -307,7 +317,7 @@ class MatchViewSet(viewsets.ModelViewSet):
         """Investor commits to an investment amount"""
         match = self.get_object()
         
-        if not hasattr(request.user, 'investor_profile') or match.investor != request.user.investor_profile:
+        if not request.principal.investor or match.investor != request.principal.investor:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         committed_amount = request.data.get('committed_amount')
@@ -335,7 +345,7 @@ class MatchViewSet(viewsets.ModelViewSet):
         """Investor withdraws from a match"""
         match = self.get_object()
         
-        if not hasattr(request.user, 'investor_profile') or match.investor != request.user.investor_profile:
+        if not request.principal.investor or match.investor != request.principal.investor:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         match.status = 'withdrawn'
@@ -356,7 +366,7 @@ class MatchViewSet(viewsets.ModelViewSet):
         """Enterprise confirms payment received from investor"""
         match = self.get_object()
         
-        if not hasattr(request.user, 'enterprise') or match.enterprise != request.user.enterprise:
+        if not request.principal.enterprise or match.enterprise != request.principal.enterprise:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         if not match.committed_amount:
@@ -390,18 +400,18 @@ class MatchInteractionViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
+        principal = self.request.principal
         match_id = self.request.query_params.get('match_id')
         
         if match_id:
             return MatchInteraction.objects.filter(match_id=match_id)
         
-        if user.user_type in ['admin', 'superadmin']:
+        if principal.is_admin:
             return MatchInteraction.objects.all()
-        if hasattr(user, 'investor_profile'):
-            return MatchInteraction.objects.filter(match__investor=user.investor_profile)
-        if hasattr(user, 'enterprise'):
-            return MatchInteraction.objects.filter(match__enterprise=user.enterprise)
+        if principal.investor:
+            return MatchInteraction.objects.filter(match__investor=principal.investor)
+        if principal.enterprise:
+            return MatchInteraction.objects.filter(match__enterprise=principal.enterprise)
         return MatchInteraction.objects.none()
 
 
@@ -410,13 +420,13 @@ class InvestorMatchesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        if not hasattr(user, 'investor_profile'):
+        principal = self.request.principal
+        if not principal.investor:
             return Campaign.objects.none()
 
-        investor = user.investor_profile
-        # Get the first criteria set (assuming one for now)
-        criteria = investor.criteria.first()
+        investor = principal.investor
+        # Get the first active criteria set (assuming one for now)
+        criteria = investor.criteria.filter(is_active=True).first()
         
         queryset = Campaign.objects.filter(status='active')
 
@@ -429,40 +439,21 @@ class InvestorMatchesView(generics.ListAPIView):
         else:
             queryset = queryset.exclude(id__in=existing_match_campaigns)
 
+        queryset = queryset.select_related('enterprise').prefetch_related(
+            Prefetch(
+                'documents',
+                queryset=CampaignDocument.objects.filter(is_public=True),
+                to_attr='public_documents',
+            )
+        )
+
         if not criteria:
             return queryset[:50]
 
-        # Calculate matches in Python for scoring
-        # Note: For large datasets, this should be done in DB or search engine
-        matches = []
-        for campaign in queryset:
-            score = 0
-            enterprise = campaign.enterprise
-            
-            # Sector match (+30)
-            if enterprise.sector in criteria.sectors:
-                score += 30
-            
-            # Funding amount match (+20)
-            if (criteria.min_funding_amount <= campaign.target_amount <= criteria.max_funding_amount):
-                score += 20
-            
-            # Management structure match (+15)
-            if enterprise.management_structure in criteria.preferred_sizes:
-                score += 15
-                
-            # Min investment match (+10)
-            if campaign.min_investment <= investor.max_investment:
-                score += 10
-
-            # Only include if score > 0
-            if score > 0:
-                campaign.match_score = score
-                matches.append(campaign)
-        
-        # Sort by score descending
-        matches.sort(key=lambda x: x.match_score, reverse=True)
-        return matches
+        # Scores are precomputed into MatchScore (see investors.matching)
+        return queryset.filter(match_scores__criteria=criteria).annotate(
+            match_score=F('match_scores__match_score')
+        ).order_by('-match_score', '-created_at')
 
     
     def perform_create(self, serializer):
@@ -475,16 +466,22 @@ class InterestedCampaignsView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        if not hasattr(user, 'investor_profile'):
+        principal = self.request.principal
+        if not principal.investor:
             return Campaign.objects.none()
 
-        investor = user.investor_profile
+        investor = principal.investor
         
         # Get campaigns where investor has matches (any status except rejected)
         matches = Match.objects.filter(
             investor=investor
-        ).exclude(status='rejected').select_related('campaign', 'campaign__enterprise')
+        ).exclude(status='rejected').select_related('campaign', 'campaign__enterprise').prefetch_related(
+            Prefetch(
+                'campaign__documents',
+                queryset=CampaignDocument.objects.filter(is_public=True),
+                to_attr='public_documents',
+            )
+        )
         
         result = []
         for match in matches:
@@ -502,10 +499,11 @@ class InteractWithOpportunityView(APIView):
 
     def post(self, request, pk):
         user = request.user
-        if not hasattr(user, 'investor_profile'):
+        principal = request.principal
+        if not principal.investor:
             return Response({'error': 'Not an investor'}, status=403)
         
-        investor = user.investor_profile
+        investor = principal.investor
         campaign = get_object_or_404(Campaign, pk=pk)
         enterprise = campaign.enterprise
         
@@ -554,24 +552,28 @@ class IsAdminOrPartnerOwner(permissions.BasePermission):
             return False
         
         # Admins can do everything
-        if request.user.user_type in ['admin', 'superadmin']:
+        if request.principal.is_admin:
             return True
         
         # Partners can create their own forms
-        if request.method == 'POST' and hasattr(request.user, 'investor_profile'):
+        if request.method == 'POST' and request.principal.investor:
             return True
         
         # For other methods, check object permissions
-        return hasattr(request.user, 'investor_profile')
+        return request.principal.investor is not None
     
     def has_object_permission(self, request, view, obj):
         # Admins can do everything
-        if request.user.user_type in ['admin', 'superadmin']:
+        if request.principal.is_admin:
             return True
         
-        # Partners can only manage their own forms
-        if hasattr(request.user, 'investor_profile'):
-            return obj.partner == request.user.investor_profile
+        # Partners can only manage their own forms (and their sections/fields)
+        if request.principal.investor:
+            if isinstance(obj, FormField):
+                obj = obj.section
+            if isinstance(obj, FormSection):
+                obj = obj.form
+            return obj.partner_id == request.principal.investor.pk
         
         return False
 
@@ -629,52 +631,44 @@ class PartnerFundingFormViewSet(viewsets.ModelViewSet):
         original_form = self.get_object()
         
         # Check if user can duplicate (must be admin or form owner)
-        if not (request.user.user_type in ['admin', 'superadmin'] or 
-                (hasattr(request.user, 'investor_profile') and 
-                 original_form.partner == request.user.investor_profile)):
+        if not (request.principal.is_admin or 
+                (request.principal.investor and 
+                 original_form.partner == request.principal.investor)):
             return Response({'error': 'Permission denied'}, status=403)
         
-        # Duplicate the form
-        new_form = PartnerFundingForm.objects.create(
-            partner=original_form.partner,
+        # Duplicate the form with its sections and fields, in bulk
+        from .form_builder import clone_form
+        new_form = clone_form(
+            original_form,
             name=f"{original_form.name} (Copy)",
-            description=original_form.description,
-            funding_type=original_form.funding_type,
-            min_readiness_score=original_form.min_readiness_score,
             status='draft',
             version=1,
-            created_by=request.user
+            created_by=request.user,
         )
-        
-        # Duplicate sections and fields
-        for section in original_form.sections.all():
-            new_section = FormSection.objects.create(
-                form=new_form,
-                title=section.title,
-                description=section.description,
-                order=section.order
-            )
-            
-            for field in section.fields.all():
-                FormField.objects.create(
-                    section=new_section,
-                    field_type=field.field_type,
-                    label=field.label,
-                    help_text=field.help_text,
-                    is_required=field.is_required,
-                    order=field.order,
-                    min_value=field.min_value,
-                    max_value=field.max_value,
-                    choices=field.choices,
-                    accepted_file_types=field.accepted_file_types,
-                    max_file_size_mb=field.max_file_size_mb,
-                    auto_fill_source=field.auto_fill_source,
-                    conditional_rules=field.conditional_rules
-                )
+        prefetch_related_objects([new_form], 'sections__fields')
         
         serializer = self.get_serializer(new_form)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=True, methods=['get'], url_path='auto-fill')
+    def auto_fill(self, request, pk=None):
+        """
+        GET /funding-forms/{id}/auto-fill/ → {field_id: value} for the form's
+        auto-fill fields, resolved for the current enterprise (admins pass
+        ?enterprise=<id>).
+        """
+        from enterprises.auto_fill import resolve_auto_fill
+        from .form_schema import get_form_schema
+
+        enterprise = request.principal.enterprise
+        if request.principal.is_admin and request.query_params.get('enterprise'):
+            enterprise = get_object_or_404(Enterprise, pk=request.query_params['enterprise'])
+        if enterprise is None:
+            return Response({'error': 'Not an enterprise user'}, status=status.HTTP_403_FORBIDDEN)
+
+        form = get_object_or_404(PartnerFundingForm, pk=pk)
+        return Response(resolve_auto_fill(enterprise, get_form_schema(form).fields))
+    
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         """Activate a draft form"""
@@ -711,7 +705,7 @@ class FormSectionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminOrPartnerOwner]
     
     def get_queryset(self):
-        queryset = FormSection.objects.all()
+        queryset = FormSection.objects.select_related('form')
         
         # Filter by form if provided
         form_id = self.request.query_params.get('form')
@@ -728,7 +722,7 @@ class FormFieldViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminOrPartnerOwner]
     
     def get_queryset(self):
-        queryset = FormField.objects.all()
+        queryset = FormField.objects.select_related('section__form')
         
         # Filter by section if provided
         section_id = self.request.query_params.get('section')
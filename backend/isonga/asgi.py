@@ -2,6 +2,10 @@
 ASGI config for isonga project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The live event stream (core.streams) needs it, so production runs gunicorn
+with uvicorn workers:
+
+    gunicorn isonga.asgi:application -k uvicorn_worker.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -63,6 +63,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.principal.PrincipalMiddleware',
+    'core.audit.AuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -98,13 +100,14 @@ WSGI_APPLICATION = 'isonga.wsgi.application'
 #     }
 # }
 
-DATABASE_URL = os.environ.get("DATABASE_URL")
+DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
 
 DATABASES = {
     'default': dj_database_url.config(
         default=DATABASE_URL,
         conn_max_age=600,
-        ssl_require=True,
+        # SQLite (local runs and the test suite) does not understand sslmode
+        ssl_require=not DATABASE_URL.startswith('sqlite'),
     )
 }
 
@@ -157,7 +160,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication that also loads the enterprise and partner profile
+        'core.authentication.PrincipalJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.TokenAuthentication',
     ],
@@ -246,3 +250,80 @@ STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 
 # Gemini AI settings
 GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
+AI_INSIGHTS_CLIENT = config('AI_INSIGHTS_CLIENT', default='assessments.ai_utils.GeminiClient')
+# Insights for unchanged prompt inputs are reused (assessments.ai_cache)
+AI_INSIGHTS_CACHE_TTL = config('AI_INSIGHTS_CACHE_TTL', default=60 * 60 * 24 * 30, cast=int)
+AI_INSIGHTS_CACHE_MAX_ENTRIES = config('AI_INSIGHTS_CACHE_MAX_ENTRIES', default=1000, cast=int)
+
+# Background jobs (core.jobs, run with `python manage.py run_jobs`)
+JOB_CONCURRENCY = {
+    'default': 4,
+    # Keep parallel Gemini calls within the API quota
+    'assessments.generate_insights': config('AI_INSIGHTS_CONCURRENCY', default=2, cast=int),
+}
+JOB_RETRY_BACKOFF_SECONDS = 30
+JOB_RETRY_MAX_BACKOFF_SECONDS = 3600
+JOB_LOCK_TIMEOUT_SECONDS = 900
+
+# Admin dashboard counters are cached this many seconds (admin_dashboard.metrics)
+ADMIN_DASHBOARD_CACHE_TTL = 60
+
+# External notification channels (core.notifications); delivered by run_jobs.
+# WhatsApp and SMS have no provider yet - point them at a backend once one is
+# integrated (core.notifications.ConsoleBackend prints instead of sending).
+NOTIFICATION_DELIVERY_BACKENDS = {
+    'email': 'core.notifications.EmailBackend',
+}
+
+# Unread notification badges are cached this many seconds (core.counters).
+# Counter changes only evict the local process's copy; with several workers
+# point CACHES at a shared backend (Redis/Memcached) for exact badges.
+NOTIFICATION_COUNTER_CACHE_TTL = 300
+
+# Compiled funding-form schemas kept per process (investors.form_schema)
+FORM_SCHEMA_CACHE_SIZE = 256
+
+# Source rows for auto-filled form fields are cached this many seconds per
+# enterprise (enterprises.auto_fill); saves and deletes evict them sooner,
+# but only in the local process, so with several workers the auto-fill
+# endpoints may show a stale value until then. Values saved with an
+# application are always read from the database.
+AUTO_FILL_CACHE_TTL = 300
+
+# Server-push events (core.events, streamed by core.streams over ASGI).
+# The in-process broker only reaches streams on the same worker process.
+EVENT_BROKER = 'core.events.InProcessBroker'
+EVENT_QUEUE_SIZE = 100
+EVENT_STREAM_HEARTBEAT_SECONDS = 15
+# Seconds a stream ticket stays valid, and open streams per user per process
+EVENT_STREAM_TICKET_TTL = 30
+EVENT_STREAM_MAX_PER_USER = 5
+
+# Hold EndpointBudgetTests to the latency ceilings in core.perf as well as
+# the query budgets (see `manage.py perf_report`)
+PERF_CHECK_LATENCY = config('PERF_CHECK_LATENCY', default=False, cast=bool)
+
+# Audit log (core.audit, core.signals). Entries are written in batches by a
+# background thread after the response is sent; when AUDIT_BUFFER_SIZE
+# entries are already waiting, requests write their own entries instead.
+# The test runner (core.test_runner) turns AUDIT_ASYNC_WRITES off.
+AUDIT_LOG_ENABLED = config('AUDIT_LOG_ENABLED', default=True, cast=bool)
+AUDIT_ASYNC_WRITES = config('AUDIT_ASYNC_WRITES', default=True, cast=bool)
+AUDIT_BUFFER_SIZE = 10000
+AUDIT_BATCH_SIZE = 500
+TEST_RUNNER = 'core.test_runner.TestRunner'
+AUDIT_MODELS = [
+    'accounts.User',
+    'enterprises.Enterprise',
+    'assessments.Assessment',
+    'campaigns.Campaign',
+    'campaigns.CampaignInterest',
+    'investors.Investor',
+    'payments.Payment',
+    'core.DeletionRequest',
+]
+
+# Rows older than AUDIT_HOT_DAYS are moved to monthly gzip files in
+# AUDIT_ARCHIVE_DIR by `manage.py archive_audit_logs` (core.archive).
+AUDIT_HOT_DAYS = config('AUDIT_HOT_DAYS', default=180, cast=int)
+AUDIT_ARCHIVE_DIR = config('AUDIT_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'audit_archive'))
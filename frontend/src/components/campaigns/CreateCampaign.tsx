@@ -141,6 +141,10 @@ const CreateCampaign: React.FC = () => {
   const [expandedSections, setExpandedSections] = useState<
     Record<string, boolean>
   >({});
+  // Files picked for partner form file fields, keyed `${formId}_${fieldId}`
+  const [partnerFieldFiles, setPartnerFieldFiles] = useState<
+    Record<string, File>
+  >({});
 
   const createCampaignMutation = useCreateCampaign();
 
@@ -298,6 +302,60 @@ const CreateCampaign: React.FC = () => {
 
   const partnerForms = partnerFormsQuery.data || [];
 
+  // Auto-fill fields are answered by the server from the SME's profile and
+  // assessment; fetch the resolved values so they can be shown read-only
+  const { data: autoFillValues = {} } = useQuery({
+    queryKey: ["partnerFormsAutoFill", partnerForms.map((f: any) => f.id)],
+    queryFn: async () => {
+      const entries = await Promise.all(
+        partnerForms.map(async (f: any) => {
+          const response = await api.get(
+            `/investors/funding-forms/${f.id}/auto-fill/`,
+          );
+          return [f.id, response.data];
+        }),
+      );
+      return Object.fromEntries(entries) as Record<
+        number,
+        Record<string, any>
+      >;
+    },
+    enabled: partnerForms.length > 0,
+  });
+
+  const setPartnerFormResponse = (form: any, fieldKey: string, value: any) => {
+    const existing = partnerFormResponses.find(
+      (r) => r.partnerId === form.partner && r.formId === form.id,
+    );
+    setPartnerFormResponses([
+      ...partnerFormResponses.filter((r) => r !== existing),
+      {
+        partnerId: form.partner,
+        formId: form.id,
+        responses: { ...(existing?.responses || {}), [fieldKey]: value },
+      },
+    ]);
+  };
+
+  // "• Label: message" lines for the server's field_errors of a partner form
+  const describeFieldErrors = (
+    form: any,
+    fieldErrors: Record<string, string[] | string>,
+  ) => {
+    const labels: Record<string, string> = {};
+    (form?.sections || []).forEach((section: any) =>
+      (section.fields || []).forEach((field: any) => {
+        labels[String(field.id)] = field.label;
+      }),
+    );
+    return Object.entries(fieldErrors).map(
+      ([key, messages]) =>
+        `  • ${labels[key] || key}: ${
+          Array.isArray(messages) ? messages.join(" ") : messages
+        }`,
+    );
+  };
+
   React.useEffect(() => {
     if (partnerForms.length === 1 && expandedFormId === null) {
       setExpandedFormId(partnerForms[0].id);
@@ -416,6 +474,8 @@ const CreateCampaign: React.FC = () => {
 
       // Create partner applications and upload required docs
       const requiredDocList = getRequiredDocList();
+      // Applications the server would not submit, left as drafts
+      const applicationProblems: string[] = [];
 
       for (const partnerId of selectedPartners) {
         const partnerFormResponse = partnerFormResponses.find(
@@ -424,6 +484,10 @@ const CreateCampaign: React.FC = () => {
         const partnerForm = partnerForms.find(
           (f: any) => f.partner === partnerId,
         );
+        const partnerName =
+          partners.find((p: any) => p.id === partnerId)?.organization_name ||
+          partnerForm?.partner_name ||
+          `Partner ${partnerId}`;
 
         try {
           // Format form responses: { field_id: value }
@@ -449,15 +513,6 @@ const CreateCampaign: React.FC = () => {
           );
           const applicationId = appResponse.data.id;
 
-          // Submit the application to partner
-          try {
-            await api.post(
-              `/campaigns/api/partner-applications/${applicationId}/submit/`,
-            );
-          } catch (submitErr) {
-            console.warn("Could not auto-submit application:", submitErr);
-          }
-
           // Upload required documents for this partner
           for (const doc of requiredDocList) {
             if (!doc.partnerIds.includes(partnerId)) continue;
@@ -474,6 +529,41 @@ const CreateCampaign: React.FC = () => {
               console.error(`Failed to upload doc ${doc.name}:`, docErr);
             }
           }
+
+          // Upload files answering the partner form's file fields; the
+          // document key is the field id
+          for (const section of partnerForm?.sections || []) {
+            for (const field of section.fields || []) {
+              const file = partnerFieldFiles[`${partnerForm.id}_${field.id}`];
+              if (field.field_type !== "file" || !file) continue;
+              const fieldFormData = new FormData();
+              fieldFormData.append("application", applicationId);
+              fieldFormData.append("document_key", String(field.id));
+              fieldFormData.append("document_name", field.label);
+              fieldFormData.append("file", file);
+              try {
+                await appDocAPI.upload(fieldFormData);
+              } catch (docErr) {
+                console.error(`Failed to upload ${field.label}:`, docErr);
+              }
+            }
+          }
+
+          // Submit once the documents are uploaded: required file fields
+          // are checked against them
+          try {
+            await api.post(
+              `/campaigns/api/partner-applications/${applicationId}/submit/`,
+            );
+          } catch (submitErr: any) {
+            const errData = submitErr?.response?.data || {};
+            applicationProblems.push(
+              [
+                `${partnerName}: ${errData.error || "Could not submit the application"}`,
+                ...describeFieldErrors(partnerForm, errData.field_errors || {}),
+              ].join("\n"),
+            );
+          }
         } catch (appErr: any) {
           const errStr = JSON.stringify(appErr?.response?.data || "");
           if (errStr.includes("already exists")) {
@@ -485,6 +575,15 @@ const CreateCampaign: React.FC = () => {
               `Failed to create application for partner ${partnerId}:`,
               appErr,
             );
+            applicationProblems.push(
+              [
+                `${partnerName}: Could not create the application`,
+                ...describeFieldErrors(
+                  partnerForm,
+                  appErr?.response?.data?.form_responses || {},
+                ),
+              ].join("\n"),
+            );
           }
         }
       }
@@ -503,6 +602,13 @@ const CreateCampaign: React.FC = () => {
         }
       }
 
+      if (applicationProblems.length > 0) {
+        alert(
+          `Your application was created, but these partner applications were saved as drafts and not submitted:\n\n${applicationProblems.join(
+            "\n\n",
+          )}\n\nPlease correct them from the application page and submit again.`,
+        );
+      }
       navigate("/campaigns");
     } catch (error: any) {
       console.error("Failed to create campaign:", error);
@@ -1139,8 +1245,10 @@ const CreateCampaign: React.FC = () => {
                                                 />
                                               )}
 
-                                              {field.field_type ===
-                                                "textarea" && (
+                                              {(field.field_type ===
+                                                "textarea" ||
+                                                field.field_type ===
+                                                  "long_text") && (
                                                 <textarea
                                                   value={
                                                     existingResponse
@@ -1225,8 +1333,10 @@ const CreateCampaign: React.FC = () => {
                                                 />
                                               )}
 
-                                              {field.field_type ===
-                                                "select" && (
+                                              {(field.field_type ===
+                                                "select" ||
+                                                field.field_type ===
+                                                  "choice") && (
                                                 <select
                                                   value={
                                                     existingResponse
@@ -1263,18 +1373,81 @@ const CreateCampaign: React.FC = () => {
                                                     Select an option
                                                   </option>
                                                   {field.choices?.map(
-                                                    (choice: string) => (
-                                                      <option
-                                                        key={choice}
-                                                        value={choice}
-                                                      >
-                                                        {choice}
-                                                      </option>
-                                                    ),
+                                                    (choice: any) => {
+                                                      // Choices are plain strings or {value, label}
+                                                      const value =
+                                                        typeof choice ===
+                                                        "object"
+                                                          ? String(choice.value)
+                                                          : String(choice);
+                                                      return (
+                                                        <option
+                                                          key={value}
+                                                          value={value}
+                                                        >
+                                                          {typeof choice ===
+                                                          "object"
+                                                            ? choice.label ||
+                                                              value
+                                                            : value}
+                                                        </option>
+                                                      );
+                                                    },
                                                   )}
                                                 </select>
                                               )}
 
+                                              {field.field_type === "file" && (
+                                                <input
+                                                  type="file"
+                                                  accept={
+                                                    (
+                                                      field.accepted_file_types ||
+                                                      []
+                                                    ).join(",") || undefined
+                                                  }
+                                                  onChange={(e) => {
+                                                    const file =
+                                                      e.target.files?.[0];
+                                                    const fileKey = `${form.id}_${field.id}`;
+                                                    setPartnerFieldFiles(
+                                                      (prev) => {
+                                                        const next = {
+                                                          ...prev,
+                                                        };
+                                                        if (file) {
+                                                          next[fileKey] = file;
+                                                        } else {
+                                                          delete next[fileKey];
+                                                        }
+                                                        return next;
+                                                      },
+                                                    );
+                                                    setPartnerFormResponse(
+                                                      form,
+                                                      fieldKey,
+                                                      file?.name || "",
+                                                    );
+                                                  }}
+                                                  className="w-full text-sm text-neutral-600 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:bg-primary-50 file:text-primary-700 hover:file:bg-primary-100"
+                                                />
+                                              )}
+
+                                              {field.field_type ===
+                                                "auto_fill" && (
+                                                <input
+                                                  type="text"
+                                                  readOnly
+                                                  value={
+                                                    autoFillValues[form.id]?.[
+                                                      String(field.id)
+                                                    ] ?? ""
+                                                  }
+                                                  className="w-full px-4 py-3 border-2 border-neutral-200 rounded-xl bg-neutral-100 text-neutral-600 outline-none"
+                                                  placeholder="Filled in from your business profile"
+                                                />
+                                              )}
+
                                               {field.help_text && (
                                                 <p className="text-xs text-neutral-500 mt-1">
                                                   {field.help_text}